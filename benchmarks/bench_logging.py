@@ -0,0 +1,50 @@
+"""
+Debug output on hot paths: print() and eagerly formatted messages (previous implementation) vs lazy %-style logging
+through the per-subsystem loggers, with debug output enabled and disabled
+
+Run from the root of the repository: python3 benchmarks/bench_logging.py
+"""
+import io
+import logging
+import argparse
+import contextlib
+from timeit import timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--messages", type=int, default=200000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger('hpim.Interface.Neighbor')
+    logger.propagate = False
+    logger.addHandler(logging.StreamHandler(io.StringIO()))
+    adapter = logging.LoggerAdapter(logger, {'vif': 0, 'interfacename': 'eth0', 'neighbor_ip': '10.0.0.2'})
+    tree = ("10.1.1.1", "224.12.12.12")
+    (sn, boot_time, neighbor_ip) = (1234, 1600000000, "10.0.0.2")
+
+    def printed():
+        print("Received IamUpstream message regarding tree " + str(tree) + " with SN " + str(sn) + " and BootTime " +
+              str(boot_time) + " from " + neighbor_ip)
+
+    def eager():
+        adapter.debug("Received IamUpstream message regarding tree " + str(tree) + " with SN " + str(sn) +
+                      " and BootTime " + str(boot_time) + " from " + neighbor_ip)
+
+    def lazy():
+        adapter.debug("Received IamUpstream message regarding tree %s with SN %s and BootTime %s from %s", tree, sn,
+                      boot_time, neighbor_ip)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        duration = timeit(printed, number=args.messages)
+    print("%-24s: %10.0f messages/s" % ("print()", args.messages / duration))
+    for level in (logging.DEBUG, logging.INFO):
+        logger.setLevel(level)
+        for (name, log) in (("eager formatting", eager), ("lazy formatting", lazy)):
+            duration = timeit(log, number=args.messages)
+            print("%-24s: %10.0f messages/s (level %s)" % (name, args.messages / duration,
+                                                            logging.getLevelName(level)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Longest prefix match of RPF lookups: probe the unicast table once per mask length (previous implementation of
+UnicastRouting.get_route) vs PrefixTrie
+
+Run from the root of the repository: python3 benchmarks/bench_lpm.py
+"""
+import sys
+import random
+import socket
+import argparse
+import ipaddress
+from timeit import timeit
+
+sys.path.insert(0, ".")
+from hpimdm.PrefixTrie import PrefixTrie
+
+
+def build_table(number_of_prefixes, rnd):
+    """
+    Random IPv4 prefixes with lengths between 8 and 32, keyed as in the IPDB routing table
+    """
+    table = set()
+    while len(table) < number_of_prefixes:
+        address = ipaddress.ip_address(rnd.getrandbits(32))
+        table.add(str(ipaddress.ip_interface("%s/%d" % (address, rnd.randint(8, 32))).network))
+    return table
+
+
+def probe_lookup(table, ip_dst):
+    for mask_len in range(32, 0, -1):
+        dst_network = str(ipaddress.ip_interface(ip_dst + "/" + str(mask_len)).network)
+        if dst_network in table:
+            return dst_network
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-p", "--prefixes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("-l", "--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    for number_of_prefixes in args.prefixes:
+        table = build_table(number_of_prefixes, rnd)
+        trie = PrefixTrie(32)
+        for network in table:
+            (network_address, mask_len) = network.split("/")
+            trie.insert(int.from_bytes(socket.inet_aton(network_address), 'big'), int(mask_len), network)
+
+        # half of the lookups hit a prefix of the table
+        destinations = []
+        networks = sorted(table)
+        for i in range(args.lookups):
+            if i % 2 == 0:
+                network = ipaddress.ip_network(rnd.choice(networks))
+                destinations.append(str(network.network_address + rnd.randrange(network.num_addresses)))
+            else:
+                destinations.append(str(ipaddress.ip_address(rnd.getrandbits(32))))
+        addresses = [int.from_bytes(socket.inet_aton(d), 'big') for d in destinations]
+
+        for (d, a) in zip(destinations, addresses):
+            assert probe_lookup(table, d) == trie.longest_prefix_match(a)
+
+        probe = timeit(lambda: [probe_lookup(table, d) for d in destinations], number=1)
+        patricia = timeit(lambda: [trie.longest_prefix_match(a) for a in addresses], number=1)
+        print("%7d prefixes: probe per mask length %8.2f us/lookup; PrefixTrie %6.2f us/lookup (%.0fx)" %
+              (number_of_prefixes, probe / args.lookups * 1e6, patricia / args.lookups * 1e6, probe / patricia))
+
+
+if __name__ == '__main__':
+    main()
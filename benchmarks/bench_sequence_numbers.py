@@ -0,0 +1,68 @@
+"""
+Purge of the last SN of each tree covered by the CheckpointSN of a neighbor: scan of the whole table (previous
+implementation) vs SequenceNumberTable (entries ordered by SN)
+Each round simulates the reception of a Hello from every neighbor whose CheckpointSN covers some more entries
+
+Run from the root of the repository: python3 benchmarks/bench_sequence_numbers.py
+"""
+import sys
+import random
+import argparse
+from timeit import timeit
+
+sys.path.insert(0, ".")
+from hpimdm.SequenceNumberTable import SequenceNumberTable
+
+
+def create_tables(table_class, number_of_neighbors, number_of_trees):
+    tables = []
+    for i in range(number_of_neighbors):
+        sequence_numbers = list(range(1, number_of_trees + 1))
+        random.Random(i).shuffle(sequence_numbers)
+        table = table_class()
+        for (tree_id, sn) in enumerate(sequence_numbers):
+            table[tree_id] = sn
+        tables.append(table)
+    return tables
+
+
+def full_scan(table, checkpoint_sn):
+    to_remove = {k for k, v in table.items() if v <= checkpoint_sn}
+    for k in to_remove:
+        table.pop(k)
+    return to_remove
+
+
+def ordered(table, checkpoint_sn):
+    return table.pop_lower_or_equal(checkpoint_sn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-t", "--trees", type=int, default=100000)
+    parser.add_argument("-n", "--neighbors", type=int, default=50)
+    parser.add_argument("-r", "--rounds", type=int, default=5)
+    parser.add_argument("-p", "--purged", type=int, nargs="+", default=[10, 1000],
+                        help="entries purged per neighbor in each round")
+    args = parser.parse_args()
+
+    for purged in args.purged:
+        results = []
+        for (table_class, purge) in ((dict, full_scan), (SequenceNumberTable, ordered)):
+            tables = create_tables(table_class, args.neighbors, args.trees)
+            checkpoint_sn = 0
+
+            def hello_round():
+                for table in tables:
+                    assert len(purge(table, checkpoint_sn)) == purged
+            duration = 0
+            for _ in range(args.rounds):
+                checkpoint_sn += purged
+                duration += timeit(hello_round, number=1)
+            results.append(duration / args.rounds)
+        print("%d trees x %d neighbors, %4d entries purged per neighbor: full scan %6.1f ms; ordered %6.1f ms per "
+              "round" % (args.trees, args.neighbors, purged, results[0] * 1e3, results[1] * 1e3))
+
+
+if __name__ == '__main__':
+    main()
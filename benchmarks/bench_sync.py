@@ -0,0 +1,68 @@
+"""
+Encoding of the Sync messages of a snapshot: entries created and serialized for each fragment of each neighbor
+(previous implementation) vs entries encoded once per snapshot, shared by all neighbors that synchronize with it and
+sent as slices of the encoded buffer
+
+Run from the root of the repository: python3 benchmarks/bench_sync.py
+"""
+import sys
+import argparse
+from timeit import timeit
+
+sys.path.insert(0, ".")
+from hpimdm.packet.PacketHPIMSync import PacketHPIMSync, PacketHPIMSyncEntry
+
+
+def per_fragment_encoding(trees, fragmentation):
+    messages = []
+    for (sync_sn, start) in enumerate(range(0, len(trees), fragmentation)):
+        entries = [PacketHPIMSyncEntry(source, group, metric_preference, metric)
+                   for ((source, group), (metric_preference, metric)) in trees[start:start + fragmentation]]
+        pkt = PacketHPIMSync(1, 1, sync_sn, [], more_flag=True)
+        msg = pkt.bytes()
+        for entry in entries:
+            msg += entry.bytes()
+        messages.append(msg)
+    return messages
+
+
+def shared_encoding(encoded_entries, number_of_trees, fragmentation):
+    messages = []
+    for (sync_sn, start) in enumerate(range(0, number_of_trees, fragmentation)):
+        upstream_trees = PacketHPIMSyncEntry.get_entries_fragment(encoded_entries, start, start + fragmentation)
+        messages.append(PacketHPIMSync(1, 1, sync_sn, upstream_trees, more_flag=True).bytes())
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-t", "--trees", type=int, default=50000)
+    parser.add_argument("-n", "--neighbors", type=int, nargs="+", default=[1, 10])
+    # number of entries that fit in a Sync message with a MTU of 1500 bytes
+    parser.add_argument("-f", "--fragmentation", type=int, default=91)
+    args = parser.parse_args()
+
+    trees = [(("10.%d.%d.%d" % (i // 62500, i // 250 % 250, i % 250 + 1), "224.0.%d.%d" % (i // 250 % 250, i % 250)),
+              (110, i % 100)) for i in range(args.trees)]
+    encoded_entries = PacketHPIMSyncEntry.encode_entries(trees)
+    assert per_fragment_encoding(trees, args.fragmentation) == \
+        shared_encoding(encoded_entries, len(trees), args.fragmentation)
+
+    for number_of_neighbors in args.neighbors:
+        def per_fragment():
+            for _ in range(number_of_neighbors):
+                per_fragment_encoding(trees, args.fragmentation)
+
+        def shared():
+            shared_entries = PacketHPIMSyncEntry.encode_entries(trees)
+            for _ in range(number_of_neighbors):
+                shared_encoding(shared_entries, len(trees), args.fragmentation)
+
+        old = timeit(per_fragment, number=1)
+        new = timeit(shared, number=1)
+        print("%d trees, %2d neighbors: per fragment %7.1f ms; shared snapshot %6.1f ms (%.1fx)" %
+              (args.trees, number_of_neighbors, old * 1e3, new * 1e3, old / new))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Convergence time of the synchronization of two routers: lock-step Sync exchange (SyncWindow of 1, previous
+implementation) vs Sync messages pipelined within a SyncWindow of SYNC_WINDOW messages
+Both routers store Upstream state about the same number of trees and synchronize through a link with a one-way delay
+(with jitter that reorders messages) that loses messages. The routers are the ones of tests/test_neighbor_sync.py,
+with virtual timers and a virtual clock... the convergence time is the virtual time that both routers take to reach
+the Synced state (the processing time of the routers is reported separately)
+
+Run from the root of the repository: python3 benchmarks/bench_sync_window.py
+"""
+import sys
+import time
+import random
+import argparse
+from unittest import mock
+
+sys.path.insert(0, ".")
+sys.path.insert(0, "tests")
+from hpimdm import Neighbor as neighbor_module
+from hpimdm.Neighbor import Synced
+from hpimdm.tree import hpim_globals
+from test_neighbor_sync import VirtualClock, Network, FakeInterface
+
+
+class DelayedNetwork(Network):
+    """
+    Link that delivers each message after a one-way delay with jitter
+    """
+    def __init__(self, rnd, loss, clock, delay):
+        super().__init__(rnd, loss)
+        self.clock = clock
+        self.delay = delay
+
+    def send(self, data, src_ip, dst_ip):
+        if self.rnd.random() >= self.loss:
+            delay = self.delay * self.rnd.uniform(0.8, 1.2)
+            self.clock.timer(delay, lambda: self.deliver(data, src_ip, dst_ip)).start()
+
+    def deliver(self, data, src_ip, dst_ip):
+        self.in_flight.append((data, src_ip, dst_ip))
+        self.deliver_next()
+
+
+class BenchmarkInterface(FakeInterface):
+    # number of entries that fit in a Sync message with a MTU of 1500 bytes
+    FRAGMENTATION = 91
+
+    def __init__(self, network, ip, time_of_boot, number_of_trees):
+        super().__init__(network, ip, time_of_boot, 0)
+        self.trees = [(("10.%d.%d.%d" % (i // 62500, i // 250 % 250, i % 250 + 1), "224.1.1.1"), (1, 10))
+                      for i in range(number_of_trees)]
+
+
+def synchronize(number_of_trees, sync_window, loss, delay, seed):
+    """
+    Return the virtual time that both routers take to become Synced and the processing time of the synchronization
+    """
+    rnd = random.Random(seed)
+    clock = VirtualClock()
+    network = DelayedNetwork(rnd, loss, clock, delay)
+    interface_a = BenchmarkInterface(network, "10.0.0.1", 100, number_of_trees)
+    interface_b = BenchmarkInterface(network, "10.0.0.2", 200, number_of_trees)
+    start_time = time.process_time()
+    with mock.patch.object(neighbor_module, "Timer", clock.timer), \
+            mock.patch.object(hpim_globals, "SYNC_WINDOW", sync_window):
+        neighbor_b = interface_a.add_neighbor("10.0.0.2", 200)
+        neighbor_a = interface_b.add_neighbor("10.0.0.1", 100)
+        neighbor_b.start_sync_process()
+        neighbor_a.start_sync_process()
+        while not (neighbor_a.neighbor_state == Synced and neighbor_b.neighbor_state == Synced):
+            if interface_a.removed_neighbors or interface_b.removed_neighbors or not clock.fire_next():
+                raise RuntimeError("synchronization did not finish (seed=%d)" % seed)
+    assert len(neighbor_a.tree_metric_state) == len(neighbor_b.tree_metric_state) == number_of_trees
+    return (clock.now, time.process_time() - start_time)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-t", "--trees", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("-w", "--window", type=int, default=hpim_globals.SYNC_WINDOW)
+    parser.add_argument("-l", "--loss", type=float, nargs="+", default=[0, 0.01])
+    parser.add_argument("-d", "--delay", type=float, default=0.005, help="one-way delay of the link (in seconds)")
+    parser.add_argument("-r", "--runs", type=int, default=3, help="runs (with different seeds) averaged with loss")
+    args = parser.parse_args()
+
+    for number_of_trees in args.trees:
+        for loss in args.loss:
+            runs = args.runs if loss > 0 else 1
+            results = []
+            for sync_window in (1, args.window):
+                measurements = [synchronize(number_of_trees, sync_window, loss, args.delay, seed)
+                                for seed in range(runs)]
+                results.append((sum(m[0] for m in measurements) / runs, sum(m[1] for m in measurements) / runs))
+            ((lock_step, lock_step_cpu), (windowed, windowed_cpu)) = results
+            print("%6d trees, loss %4.1f%%: lock-step %7.2f s (processing %5.2f s); window of %d %7.2f s "
+                  "(processing %5.2f s)" % (number_of_trees, loss * 100, lock_step, lock_step_cpu, args.window,
+                                            windowed, windowed_cpu))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Protocol timers: threading.Timer (one thread per armed timer, previous implementation) vs the shared TimerWheel
+- cost of arming and cancelling timers (most protocol timers are restarted or cancelled before expiring)
+- threads alive and process CPU time consumed while the timers are armed and idle
+- lateness of expiration of timers that expire at the same time
+threading.Timer is skipped for more than --max-threads timers (one thread per timer exhausts the limits of the system)
+
+Run from the root of the repository: python3 benchmarks/bench_timers.py
+"""
+import sys
+import time
+import argparse
+import threading
+from timeit import timeit
+
+sys.path.insert(0, ".")
+from hpimdm.TimerWheel import Timer as WheelTimer
+
+
+def armed_and_idle(timer_class, number_of_timers, idle_time):
+    """
+    Arm timers that do not expire during idle_time seconds and cancel them afterwards
+    Return the time to arm and cancel each timer, the number of threads alive while the timers were armed and the
+    process CPU time consumed (per second) while waiting
+    """
+    timers = [timer_class(idle_time + 60, lambda: None) for _ in range(number_of_timers)]
+    arm_time = timeit(lambda: [t.start() for t in timers], number=1)
+    threads = threading.active_count()
+    cpu_time = time.process_time()
+    time.sleep(idle_time)
+    cpu_time = time.process_time() - cpu_time
+    cancel_time = timeit(lambda: [t.cancel() for t in timers], number=1)
+    return ((arm_time + cancel_time) / number_of_timers, threads, cpu_time / idle_time)
+
+
+def expiration_lateness(timer_class, number_of_timers, interval):
+    """
+    Average time between the deadline and the execution of the callback of timers that expire simultaneously
+    """
+    lateness = []
+    lock = threading.Lock()
+    finished = threading.Event()
+
+    def callback(deadline):
+        with lock:
+            lateness.append(time.monotonic() - deadline)
+            if len(lateness) == number_of_timers:
+                finished.set()
+
+    deadline = time.monotonic() + interval
+    for _ in range(number_of_timers):
+        timer_class(deadline - time.monotonic(), callback, args=[deadline]).start()
+    finished.wait(60)
+    return sum(lateness) / len(lateness)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--timers", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("-i", "--idle", type=float, default=2, help="time (in seconds) during which timers are armed")
+    parser.add_argument("-m", "--max-threads", type=int, default=10000)
+    args = parser.parse_args()
+
+    for number_of_timers in args.timers:
+        for (name, timer_class) in (("threading.Timer", threading.Timer), ("TimerWheel", WheelTimer)):
+            if timer_class is threading.Timer and number_of_timers > args.max_threads:
+                print("%6d timers %-15s: skipped" % (number_of_timers, name))
+                continue
+            threads_before = threading.active_count()
+            (arm_cancel, threads, cpu) = armed_and_idle(timer_class, number_of_timers, args.idle)
+            # wait for cancelled threads to finish
+            while timer_class is threading.Timer and threading.active_count() > threads_before:
+                time.sleep(0.1)
+            lateness = expiration_lateness(timer_class, number_of_timers, 1)
+            print("%6d timers %-15s: arm+cancel %7.2f us/timer; %6d threads and %5.1f%% CPU while armed; lateness on "
+                  "expiration %7.1f ms" % (number_of_timers, name, arm_cancel * 1e6, threads, cpu * 100,
+                                           lateness * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Locks protecting the state of trees: a single lock for the whole routing table vs one lock per shard of trees
+(Kernel.get_tree_lock)
+- uncontended cost of acquiring/releasing the lock of a tree
+- throughput of threads that update random trees while holding their lock (the critical section releases the GIL,
+  as kernel calls that program MFC entries)
+
+Run from the root of the repository: python3 benchmarks/bench_tree_locks.py
+"""
+import sys
+import time
+import random
+import argparse
+from timeit import timeit
+from threading import Thread, RLock
+
+sys.path.insert(0, ".")
+from hpimdm.Kernel import TreeLock, TREE_LOCK_SHARDS
+
+
+def run_threads(get_lock, trees, number_of_threads, operations, critical_section_time):
+    def worker(seed):
+        rnd = random.Random(seed)
+        for _ in range(operations):
+            (source, group) = rnd.choice(trees)
+            with get_lock(source, group):
+                time.sleep(critical_section_time)
+
+    threads = [Thread(target=worker, args=(i,)) for i in range(number_of_threads)]
+    start_time = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return number_of_threads * operations / (time.monotonic() - start_time)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-t", "--threads", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("-o", "--operations", type=int, default=500)
+    parser.add_argument("-c", "--critical-section", type=float, default=0.0002,
+                        help="time (in seconds) during which the lock of a tree is held")
+    args = parser.parse_args()
+
+    trees = [("10.0.%d.%d" % (i // 250, i % 250 + 1), "224.0.0.%d" % (i % 200 + 1)) for i in range(1000)]
+    global_lock = RLock()
+    tree_locks = [TreeLock() for _ in range(TREE_LOCK_SHARDS)]
+
+    def get_global_lock(source, group):
+        return global_lock
+
+    def get_tree_lock(source, group):
+        return tree_locks[hash((source, group)) % TREE_LOCK_SHARDS]
+
+    number = 200000
+    for (name, get_lock) in (("single lock", get_global_lock), ("%d shards" % TREE_LOCK_SHARDS, get_tree_lock)):
+        def acquire_release():
+            with get_lock("10.0.0.1", "224.0.0.1"):
+                pass
+        duration = timeit(acquire_release, number=number)
+        print("%-12s: uncontended acquire+release %.3f us" % (name, duration / number * 1e6))
+
+    for number_of_threads in args.threads:
+        for tree_lock in tree_locks:
+            tree_lock.contentions = 0
+        single = run_threads(get_global_lock, trees, number_of_threads, args.operations, args.critical_section)
+        sharded = run_threads(get_tree_lock, trees, number_of_threads, args.operations, args.critical_section)
+        contentions = sum(tree_lock.contentions for tree_lock in tree_locks)
+        print("%3d threads: single lock %8.0f ops/s; %d shards %8.0f ops/s (%d contended acquisitions)" %
+              (number_of_threads, single, TREE_LOCK_SHARDS, sharded, contentions))
+
+
+if __name__ == '__main__':
+    main()
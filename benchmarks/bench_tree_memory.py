@@ -0,0 +1,154 @@
+"""
+Memory of trees: bytes per tree of the current per-tree classes vs the classes of a baseline revision (by default,
+the revision before per-tree objects declared __slots__, created their loggers lazily and allocated the
+HoldForwardingState timer on demand)
+Each tree is a KernelEntryNonOriginator built through its constructor, with one root and 7 non-root interfaces
+(8 interfaces by default) and kept in a routing table as in Kernel.routing. The kernel, the HPIM interfaces and the
+unicast routing table are stubbed. Each measurement runs in a separate process, with the baseline classes extracted
+from git
+
+Run from the root of the repository: python3 benchmarks/bench_tree_memory.py
+"""
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+
+
+class StubUpstreamTrees(object):
+    """
+    Set of Upstream trees of an interface (kept per interface, not per tree)
+    """
+    def set(self, tree, metric_preference, metric):
+        pass
+
+    def remove(self, tree):
+        pass
+
+
+class StubInterface(object):
+    """
+    HPIM interface that does not transmit control messages
+    """
+    def __init__(self, vif_index):
+        self.vif_index = vif_index
+        self.ip = "10.0.%d.1" % vif_index
+        self.upstream_trees = StubUpstreamTrees()
+
+    def get_ip(self):
+        return self.ip
+
+    def get_all_interface_networks(self):
+        return {"10.0.%d.0/24" % self.vif_index}
+
+    def __getattr__(self, name):
+        # send_* methods, retransmission and neighbor queries
+        return lambda *args, **kwargs: None
+
+
+class StubKernel(object):
+    def __init__(self, number_of_interfaces):
+        self.vif_index_to_name_dic = {i: "eth%d" % i for i in range(number_of_interfaces)}
+        self.interfaces = {i: StubInterface(i) for i in range(number_of_interfaces)}
+
+    def set_multicast_route(self, kernel_entry):
+        pass
+
+    def remove_multicast_route(self, kernel_entry):
+        pass
+
+
+def measure(number_of_trees, number_of_interfaces):
+    """
+    Bytes per tree allocated while creating number_of_trees trees (with the hpimdm package found first in sys.path)
+    """
+    from hpimdm import UnicastRouting
+    from hpimdm.tree import hpim_globals
+    from hpimdm.tree.metric import AssertMetric
+    from hpimdm.tree.KernelEntry import KernelEntryNonOriginator
+    from hpimdm.tree.KernelEntryInterface import KernelEntryInterface
+
+    kernel = StubKernel(number_of_interfaces)
+
+    class StubKernelEntryInterface(KernelEntryInterface):
+        @staticmethod
+        def get_interface_name(interface_id):
+            return kernel.vif_index_to_name_dic[interface_id]
+
+        @staticmethod
+        def get_interface(kernel_tree, interface_id):
+            return kernel.interfaces[interface_id]
+
+        @staticmethod
+        def get_membership_interface(kernel_tree, interface_id):
+            return None
+
+        @staticmethod
+        def get_kernel():
+            return kernel
+
+    # sources are reached through the interface with VIF 0
+    UnicastRouting.get_unicast_info = lambda source: (110, 10, False, 0)
+    # data packets detected by polling the MFC counters (no data packet listener)
+    hpim_globals.MFC_COUNTERS_POLL_INTERVAL = 5
+    upstream_neighbor = AssertMetric(100, 1, "10.0.0.2")
+
+    trees = [("10.%d.%d.%d" % (i // 62500, i // 250 % 250, i % 250 + 1), "224.1.%d.%d" % (i // 250 % 250, i % 250))
+             for i in range(number_of_trees)]
+    routing = {}
+    tracemalloc.start()
+    for (source, group) in trees:
+        upstream_state_dict = {i: None for i in range(number_of_interfaces)}
+        upstream_state_dict[0] = upstream_neighbor
+        interest_state_dict = {i: False for i in range(number_of_interfaces)}
+        routing.setdefault(source, {})[group] = \
+            KernelEntryNonOriginator(source, group, upstream_state_dict, interest_state_dict,
+                                     StubKernelEntryInterface)
+    (size, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    kernel_entry = routing[trees[0][0]][trees[0][1]]
+    assert kernel_entry.is_tree_active() and len(kernel_entry.interface_state) == number_of_interfaces
+    return size / number_of_trees
+
+
+def run_measurement(package_path, number_of_trees, number_of_interfaces):
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__), "--measure", package_path,
+                                      "-n", str(number_of_trees), "-i", str(number_of_interfaces)],
+                                     cwd=package_path, universal_newlines=True)
+    return float(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--trees", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("-i", "--interfaces", type=int, default=8)
+    parser.add_argument("-b", "--baseline", help="git revision of the baseline classes (default: revision before "
+                                                 "per-tree objects declared __slots__)")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure is not None:
+        sys.path.insert(0, args.measure)
+        print(measure(args.trees[0], args.interfaces))
+        return
+
+    baseline = args.baseline
+    if baseline is None:
+        slots_revision = subprocess.check_output(["git", "log", "-1", "--format=%H", "--fixed-strings",
+                                                  "--grep=Slot per-tree objects"], universal_newlines=True).strip()
+        baseline = slots_revision + "~1"
+
+    with tempfile.TemporaryDirectory() as baseline_path:
+        archive = subprocess.check_output(["git", "archive", baseline, "hpimdm"])
+        subprocess.run(["tar", "-x", "-C", baseline_path], input=archive, check=True)
+        for number_of_trees in args.trees:
+            current = run_measurement(os.getcwd(), number_of_trees, args.interfaces)
+            previous = run_measurement(baseline_path, number_of_trees, args.interfaces)
+            print("%6d trees with %d interfaces: baseline %6.0f bytes/tree; current %6.0f bytes/tree (%.0f%% less)" %
+                  (number_of_trees, args.interfaces, previous, current, (1 - current / previous) * 100))
+
+
+if __name__ == '__main__':
+    main()
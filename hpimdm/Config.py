@@ -28,10 +28,23 @@ def parse_config_file(file_path):
             hpim_globals.HELLO_PERIOD = hpim_config["DefaultTimers"].get("HELLO_PERIOD", hpim_globals.HELLO_PERIOD)
             hpim_globals.SOURCE_LIFETIME = hpim_config["DefaultTimers"].get("SOURCE_LIFETIME", hpim_globals.SOURCE_LIFETIME)
             hpim_globals.MESSAGE_RETRANSMISSION_TIME = hpim_config["DefaultTimers"].get("MESSAGE_RETRANSMISSION_TIME", hpim_globals.MESSAGE_RETRANSMISSION_TIME)
+            hpim_globals.MFC_COUNTERS_POLL_INTERVAL = hpim_config["DefaultTimers"].get("MFC_COUNTERS_POLL_INTERVAL", hpim_globals.MFC_COUNTERS_POLL_INTERVAL)
 
         if "Settings" in hpim_config:
             hpim_globals.INITIAL_FLOOD_ENABLED = hpim_config["Settings"].get("INITIAL_FLOOD_ENABLED", hpim_globals.INITIAL_FLOOD_ENABLED)
             hpim_globals.SYNC_FRAGMENTATION_MSG = hpim_config["Settings"].get("SYNC_FRAGMENTATION_MSG", hpim_globals.SYNC_FRAGMENTATION_MSG)
+            hpim_globals.SYNC_WINDOW = hpim_config["Settings"].get("SYNC_WINDOW", hpim_globals.SYNC_WINDOW)
+            hpim_globals.MSG_BUNDLE_INTERVAL = hpim_config["Settings"].get("MSG_BUNDLE_INTERVAL", hpim_globals.MSG_BUNDLE_INTERVAL)
+            hpim_globals.ACK_DELAY = hpim_config["Settings"].get("ACK_DELAY", hpim_globals.ACK_DELAY)
+            hpim_globals.UPCALL_DEDUP_INTERVAL = hpim_config["Settings"].get("UPCALL_DEDUP_INTERVAL", hpim_globals.UPCALL_DEDUP_INTERVAL)
+            hpim_globals.UPCALL_RATE_LIMIT = hpim_config["Settings"].get("UPCALL_RATE_LIMIT", hpim_globals.UPCALL_RATE_LIMIT)
+            hpim_globals.UPCALL_BURST = hpim_config["Settings"].get("UPCALL_BURST", hpim_globals.UPCALL_BURST)
+            hpim_globals.RECHECK_COALESCE_INTERVAL = hpim_config["Settings"].get("RECHECK_COALESCE_INTERVAL", hpim_globals.RECHECK_COALESCE_INTERVAL)
+
+        if "Logging" in hpim_config:
+            hpim_globals.LOG_LEVEL = hpim_config["Logging"].get("LOG_LEVEL", hpim_globals.LOG_LEVEL)
+            hpim_globals.LOG_LEVELS = hpim_config["Logging"].get("LOG_LEVELS", hpim_globals.LOG_LEVELS)
+            Main.set_log_levels()
 
         if "Interfaces" in hpim_config:
             interfaces = hpim_config["Interfaces"]  # type: dict
@@ -122,11 +135,23 @@ def get_yaml_file():
                 "INITIAL_FLOOD_TIME": hpim_globals.INITIAL_FLOOD_TIME,
                 "HELLO_PERIOD": hpim_globals.HELLO_PERIOD,
                 "SOURCE_LIFETIME": hpim_globals.SOURCE_LIFETIME,
-                "MESSAGE_RETRANSMISSION_TIME": hpim_globals.MESSAGE_RETRANSMISSION_TIME
+                "MESSAGE_RETRANSMISSION_TIME": hpim_globals.MESSAGE_RETRANSMISSION_TIME,
+                "MFC_COUNTERS_POLL_INTERVAL": hpim_globals.MFC_COUNTERS_POLL_INTERVAL
             },
             "Settings": {
                 "INITIAL_FLOOD_ENABLED": hpim_globals.INITIAL_FLOOD_ENABLED,
-                "SYNC_FRAGMENTATION_MSG": hpim_globals.SYNC_FRAGMENTATION_MSG
+                "SYNC_FRAGMENTATION_MSG": hpim_globals.SYNC_FRAGMENTATION_MSG,
+                "SYNC_WINDOW": hpim_globals.SYNC_WINDOW,
+                "MSG_BUNDLE_INTERVAL": hpim_globals.MSG_BUNDLE_INTERVAL,
+                "ACK_DELAY": hpim_globals.ACK_DELAY,
+                "UPCALL_DEDUP_INTERVAL": hpim_globals.UPCALL_DEDUP_INTERVAL,
+                "UPCALL_RATE_LIMIT": hpim_globals.UPCALL_RATE_LIMIT,
+                "UPCALL_BURST": hpim_globals.UPCALL_BURST,
+                "RECHECK_COALESCE_INTERVAL": hpim_globals.RECHECK_COALESCE_INTERVAL
+            },
+            "Logging": {
+                "LOG_LEVEL": hpim_globals.LOG_LEVEL,
+                "LOG_LEVELS": hpim_globals.LOG_LEVELS
             },
             "Interfaces": {},
         },
@@ -1,6 +1,8 @@
 import random
+import weakref
 import traceback
-from threading import Timer, RLock
+from threading import RLock, Lock
+from hpimdm.TimerWheel import Timer
 import socket
 import time
 import hmac
@@ -10,7 +12,15 @@ import netifaces
 
 from hpimdm import Main
 from hpimdm.Neighbor import Neighbor
+from hpimdm.TreeIdRegistry import registry as tree_ids
+from hpimdm.UpstreamTrees import UpstreamTrees
+from hpimdm.SyncSnapshot import SyncSnapshot
+from hpimdm.MessageBundler import MessageBundler
+from hpimdm.RetransmissionScheduler import RetransmissionScheduler
+from hpimdm.OutstandingSequenceNumbers import OutstandingSequenceNumbers
+from hpimdm.TreeStateIndex import TreeStateIndex
 from hpimdm.Interface import Interface
+from hpimdm.tree import hpim_globals
 from hpimdm.tree.hpim_globals import MSG_FORMAT, HELLO_HOLD_TIME_TIMEOUT, HELLO_PERIOD
 from hpimdm.ReliableMsgTransmission import ReliableMessageTransmission
 
@@ -18,17 +28,21 @@ from hpimdm.packet.Packet import Packet
 from hpimdm.packet.ReceivedPacket import ReceivedPacket
 if MSG_FORMAT == "BINARY":
     from hpimdm.packet.PacketHPIMHelloOptions import PacketHPIMHelloHoldtime, \
-        PacketHPIMHelloCheckpointSN
+        PacketHPIMHelloCheckpointSN, PacketHPIMHelloSyncWindow, PacketHPIMHelloBundle, PacketHPIMHelloMultiAck
     from hpimdm.packet.PacketHPIMHello import PacketHPIMHello
     from hpimdm.packet.PacketHPIMHeader import PacketHPIMHeader
     from hpimdm.packet.PacketHPIMSync import PacketHPIMSync, PacketHPIMSyncEntry
     from hpimdm.packet.PacketHPIMInterest import PacketHPIMNoInterest, PacketHPIMInterest
     from hpimdm.packet.PacketHPIMIamUpstream import PacketHPIMUpstream
     from hpimdm.packet.PacketHPIMNotUpstream import PacketHPIMNoLongerUpstream
-    from hpimdm.packet.PacketHPIMAck import PacketHPIMAck
+    from hpimdm.packet.PacketHPIMAck import PacketHPIMAck, PacketHPIMMultiAck
+    from hpimdm.packet.PacketHPIMBundle import PacketHPIMBundle
 else:
     from hpimdm.packet.PacketHPIMHelloOptions import PacketHPIMHelloHoldtimeJson as PacketHPIMHelloHoldtime,\
-        PacketHPIMHelloCheckpointSNJson as PacketHPIMHelloCheckpointSN
+        PacketHPIMHelloCheckpointSNJson as PacketHPIMHelloCheckpointSN, \
+        PacketHPIMHelloSyncWindowJson as PacketHPIMHelloSyncWindow, \
+        PacketHPIMHelloBundleJson as PacketHPIMHelloBundle, \
+        PacketHPIMHelloMultiAckJson as PacketHPIMHelloMultiAck
     from hpimdm.packet.PacketHPIMHello import PacketHPIMHelloJson as PacketHPIMHello
     from hpimdm.packet.PacketHPIMHeader import PacketHPIMHeaderJson as PacketHPIMHeader
     from hpimdm.packet.PacketHPIMSync import PacketHPIMSyncJson as PacketHPIMSync
@@ -37,7 +51,9 @@ else:
         PacketHPIMInterestJson as PacketHPIMInterest
     from hpimdm.packet.PacketHPIMSync import PacketHPIMSyncEntryJson as PacketHPIMSyncEntry
     from hpimdm.packet.PacketHPIMNotUpstream import PacketHPIMNoLongerUpstreamJson as PacketHPIMNoLongerUpstream
-    from hpimdm.packet.PacketHPIMAck import PacketHPIMAckJson as PacketHPIMAck
+    from hpimdm.packet.PacketHPIMAck import PacketHPIMAckJson as PacketHPIMAck, \
+        PacketHPIMMultiAckJson as PacketHPIMMultiAck
+    from hpimdm.packet.PacketHPIMBundle import PacketHPIMBundleJson as PacketHPIMBundle
 
 
 class InterfaceHPIM(Interface):
@@ -63,6 +79,8 @@ class InterfaceHPIM(Interface):
         self._had_neighbors = False
         self.neighbors = {}
         self.neighbors_lock = RLock()
+        # Upstream and Interest state of Synced neighbors aggregated per tree
+        self.tree_state_index = TreeStateIndex()
 
         # reliable transmission buffer
         self.reliable_transmission_buffer = {} # Key: ID da msg ; value: ReliableMsgTransmission
@@ -72,6 +90,19 @@ class InterfaceHPIM(Interface):
         self.sequencer = 0
         self.sequencer_lock = RLock()
 
+        # trees in which this router is Upstream (included in new snapshots)
+        self.upstream_trees = UpstreamTrees()
+        # weak reference to the last snapshot (shared by neighbors that start a synchronization while it is valid)
+        self._sync_snapshot = None
+        self._sync_snapshot_lock = Lock()
+
+        # bundle control messages regarding single trees
+        self.bundler = MessageBundler(self)
+        # retransmissions of control messages of all trees
+        self.retransmission_scheduler = RetransmissionScheduler(self)
+        # (BootTime, SN) of messages being reliably transmitted (used to calculate the CheckpointSN)
+        self.outstanding_sequence_numbers = OutstandingSequenceNumbers()
+
         # security
         self.security_id = 0
         self.security_len = 0
@@ -167,6 +198,44 @@ class InterfaceHPIM(Interface):
         """
         Send a new packet destined to group_ip IP
         """
+        #if self.drop_packet_type is not None and data.payload.get_pim_type() == self.drop_packet_type:
+        #    self.drop_packet_type = None
+        #    return
+        super().send(data=self.encode(data, group_ip), group_ip=group_ip)
+
+    def send_tree_msg(self, data: Packet, group_ip: str=None):
+        """
+        Send a new packet regarding a single tree (IamUpstream, IamNoLongerUpstream, Interest, NoInterest or Ack)
+        destined to group_ip IP (multicast if None)
+        The packet is bundled with other packets destined to the same IP if bundling is enabled and the destination
+        supports Bundle messages (all neighbors in case of multicast packets)
+        """
+        if hpim_globals.MSG_BUNDLE_INTERVAL > 0 and self.neighbors_support_bundles(group_ip):
+            self.bundler.add(data, group_ip)
+        elif group_ip is None:
+            self.send(data)
+        else:
+            self.send(data, group_ip)
+
+    def neighbors_support_bundles(self, neighbor_ip=None):
+        """
+        Verify if neighbor_ip (all neighbors if None) advertised the Bundle option in its Hello messages
+        """
+        if neighbor_ip is None:
+            return all(n.supports_bundles for n in list(self.neighbors.values()))
+        neighbor = self.neighbors.get(neighbor_ip, None)
+        return neighbor is not None and neighbor.supports_bundles
+
+    def send_bytes(self, data: bytes, group_ip: str=MCAST_GRP):
+        """
+        Send a packet that was previously encoded (via encode method) destined to group_ip IP
+        """
+        super().send(data=data, group_ip=group_ip)
+
+    def encode(self, data: Packet, group_ip: str=MCAST_GRP) -> bytes:
+        """
+        Obtain packet destined to group_ip IP in byte format (including its HMAC if security is enabled)
+        """
         if self.is_security_enabled():
             key = self.get_security_key()
             data.payload.security_id = self.security_id
@@ -175,11 +244,7 @@ class InterfaceHPIM(Interface):
                                       socket.inet_pton(self._get_address_family(), group_ip) +
                                       data.bytes(), digestmod=self.hash_function).digest()
             data.payload.security_value = security_value
-
-        #if self.drop_packet_type is not None and data.payload.get_pim_type() == self.drop_packet_type:
-        #    self.drop_packet_type = None
-        #    return
-        super().send(data=data.bytes(), group_ip=group_ip)
+        return data.bytes()
 
     def is_security_enabled(self):
         return self.get_security_key() != b''
@@ -229,21 +294,20 @@ class InterfaceHPIM(Interface):
     def get_checkpoint_sn(self):
         """
         Get the CheckpointSN to be transmitted in a new Hello message
+        Messages are registered as outstanding while holding the sequencer lock (the lowest SN of messages that are
+        being reliably transmitted is read from outstanding_sequence_numbers without iterating over all trees)
         """
-        print("ENTER CHECK_SN")
-        with self.neighbors_lock:
-            with self.sequencer_lock:
-                with self.reliable_transmission_lock:
-                    time_of_boot = self.time_of_boot
-                    checkpoint_sn = self.sequencer
+        with self.sequencer_lock:
+            time_of_boot = self.time_of_boot
+            checkpoint_sn = self.sequencer
 
-                    for rt in self.reliable_transmission_buffer.values():
-                        (msg_boot_time, msg_checkpoint_sn) = rt.get_sequence_number()
-                        if msg_boot_time == time_of_boot and checkpoint_sn > msg_checkpoint_sn:
-                            checkpoint_sn = msg_checkpoint_sn
+            oldest_msg = self.outstanding_sequence_numbers.get_oldest()
+            if oldest_msg is not None:
+                (msg_boot_time, msg_sn) = oldest_msg
+                if msg_boot_time == time_of_boot and checkpoint_sn > msg_sn - 1:
+                    checkpoint_sn = msg_sn - 1
 
-                    print("EXIT CHECK_SN")
-                    return (time_of_boot, checkpoint_sn)
+            return (time_of_boot, checkpoint_sn)
 
     #Random interval for initial Hello message on bootup or triggered Hello message to a rebooting neighbor
     def force_send_hello(self):
@@ -260,21 +324,23 @@ class InterfaceHPIM(Interface):
     def send_hello(self):
         """
         Send a new Hello message
-        Include in it the HelloHoldTime and CheckpointSN
+        Include in it the HelloHoldTime, CheckpointSN, SyncWindow, Bundle and MultiAck
         """
         self.hello_timer.cancel()
 
         pim_payload = PacketHPIMHello()
         pim_payload.add_option(PacketHPIMHelloHoldtime(holdtime=4 * HELLO_PERIOD))
+        if hpim_globals.SYNC_WINDOW > 1:
+            pim_payload.add_option(PacketHPIMHelloSyncWindow(hpim_globals.SYNC_WINDOW))
+        pim_payload.add_option(PacketHPIMHelloBundle())
+        pim_payload.add_option(PacketHPIMHelloMultiAck())
 
-        with self.neighbors_lock:
-            with self.sequencer_lock:
-                with self.reliable_transmission_lock:
-                    (bt, checkpoint_sn) = self.get_checkpoint_sn()
-                    if bt == self.time_of_boot:
-                        pim_payload.add_option(PacketHPIMHelloCheckpointSN(checkpoint_sn))
+        with self.sequencer_lock:
+            (bt, checkpoint_sn) = self.get_checkpoint_sn()
+            if bt == self.time_of_boot:
+                pim_payload.add_option(PacketHPIMHelloCheckpointSN(checkpoint_sn))
 
-                ph = PacketHPIMHeader(pim_payload, boot_time=self.time_of_boot)
+            ph = PacketHPIMHeader(pim_payload, boot_time=self.time_of_boot)
         packet = Packet(payload=ph)
         self.send(packet)
 
@@ -289,6 +355,7 @@ class InterfaceHPIM(Interface):
         """
         self.hello_timer.cancel()
         self.hello_timer = None
+        self.bundler.cancel()
 
         # send pim_hello timeout message
         pim_payload = PacketHPIMHello()
@@ -302,25 +369,42 @@ class InterfaceHPIM(Interface):
             n.remove_neighbor_state()
         self.neighbors.clear()
         self.clear_reliable_transmission()
+        self.retransmission_scheduler.cancel()
 
-    def snapshot_multicast_routing_table(self):
+    def get_sync_snapshot(self):
         """
-        Create a new snapshot
-        This method will return the current BootTime, SnapshotSN and all trees to be included in Sync messages
+        Get snapshot to be transmitted in Sync messages (SyncSnapshot)
+        Upstream trees are updated before the transmission of IamUpstream/IamNoLongerUpstream messages (holding the
+        sequencer lock), so the snapshot is consistent with SnapshotSN without holding any lock of the kernel
+        The last snapshot is reused while the Upstream trees did not change since its creation (neighbors that start
+        a synchronization together share the same snapshot and SnapshotSN), otherwise a new one is created
         """
-        with self.get_kernel().rwlock.genWlock():
+        with self._sync_snapshot_lock:
             with self.sequencer_lock:
+                snapshot = self._sync_snapshot() if self._sync_snapshot is not None else None
+                if snapshot is not None and snapshot.boot_time == self.time_of_boot and \
+                        snapshot.version == self.upstream_trees.version:
+                    return snapshot
+
                 (snapshot_bt, snapshot_sn) = self.get_sequence_number()
+                (version, trees_to_sync) = self.upstream_trees.snapshot()
 
-                trees_to_sync = self.get_kernel().snapshot_multicast_routing_table(self.vif_index)  # type: dict
-                tree_to_sync_in_msg_format = {}
+            entries = self.encode_sync_entries(list(trees_to_sync.items()))
+            snapshot = SyncSnapshot(snapshot_bt, snapshot_sn, version, entries, len(trees_to_sync),
+                                    self.get_sync_fragmentation())
+            self._sync_snapshot = weakref.ref(snapshot)
+            self.interface_logger.debug('New snapshot with BootTime: %s; SnapshotSN: %s; %d trees', snapshot_bt,
+                                        snapshot_sn, snapshot.length)
+            return snapshot
 
-                for (source_group, state) in trees_to_sync.items():
-                    tree_to_sync_in_msg_format[source_group] = self.create_sync_entry_hdr(source_group[0],
-                                                                                          source_group[1],
-                                                                                          state.metric_preference,
-                                                                                          state.route_metric)
-                return (snapshot_bt, snapshot_sn, tree_to_sync_in_msg_format)
+    def get_sync_fragmentation(self):
+        """
+        Get number of trees per Sync message (SYNC_FRAGMENTATION_MSG or the number of entries that fit in the MTU)
+        """
+        if hpim_globals.SYNC_FRAGMENTATION_MSG != 0:
+            return hpim_globals.SYNC_FRAGMENTATION_MSG
+        sync_entry_len = len(self.create_sync_entry_hdr("", "", 0, 0))
+        return (self.get_mtu() - self.get_ip_header_length() - 8 - self.security_len - 16) // sync_entry_len
 
     ##############################################
     # Check neighbor status
@@ -331,30 +415,19 @@ class InterfaceHPIM(Interface):
         Regarding Upstream this method will return the Upstream neighbor that offers the best RPC metric
         Regarding Interest this method will return "Interested/True" if at least one neighbor is interested
             or "NotInterested" if all neighbors are not interested in traffic regarding (source_group) tree
+        Both are obtained from the state of all Synced neighbors, aggregated per tree in tree_state_index
         """
-        interest_state = False
-        upstream_state = None
-        for n in list(self.neighbors.values()):
-            (neighbor_interest_state, neighbor_upstream_state) = n.get_tree_state(tree=source_group)
-            if not interest_state and neighbor_interest_state:
-                interest_state = neighbor_interest_state
-
-            if neighbor_upstream_state is not None:
-                if upstream_state is None:
-                    upstream_state = neighbor_upstream_state
-                elif neighbor_upstream_state.is_better_than(upstream_state):
-                    upstream_state = neighbor_upstream_state
-
-        print("GET_TREE_STATE_INTERFACE INTEREST:", interest_state)
-        print("GET_TREE_STATE_INTERFACE UPSTREAM:", upstream_state)
-        return (interest_state, upstream_state)
+        return self.tree_state_index.get_tree_state(tree_ids.find(source_group[0], source_group[1]))
 
     def remove_tree_state(self, source_ip, group_ip):
         """
         Remove tree state regarding a given (Source_IP, Group_IP) tree
         """
+        tree_id = tree_ids.find(source_ip, group_ip)
+        if tree_id is None:
+            return
         for n in list(self.neighbors.values()):
-            n.remove_tree_state(source_ip, group_ip)
+            n.remove_tree_state(tree_id)
 
     # Used to show list of neighbors in CLI interfaces
     def get_neighbors(self):
@@ -392,19 +465,19 @@ class InterfaceHPIM(Interface):
         """
         return neighbor_ip in self.neighbors
 
-    def remove_neighbor(self, ip):
+    def remove_neighbor(self, ip, known_trees=None):
         """
         Remove known neighbor
+        known_trees are the trees that the neighbor stored state about (None if its state was not being interpreted)
         """
         with self.neighbors_lock:
             if ip not in self.neighbors:
                 return
             self.neighbors.pop(ip)
 
-            # verifiar todas as arvores
-            print("REMOVER ANTES RECHECK")
-            self.get_kernel().recheck_all_trees(self.vif_index)
-            print("REMOVER DEPOIS RECHECK")
+            # verificar arvores afetadas pela remocao do vizinho
+            if known_trees is not None:
+                self.get_kernel().recheck_neighbor_trees(self.vif_index, known_trees)
 
     '''
     def change_interface(self):
@@ -448,9 +521,42 @@ class InterfaceHPIM(Interface):
                             neighbor_snapshot_sn=neighbor_snapshot_sn, my_snapshot_sn=my_snapshot_sn)
         return Packet(payload=PacketHPIMHeader(payload=ack, boot_time=my_boot_time))
 
+    def create_multi_ack_msg(self, my_boot_time, neighbor_boot_time, neighbor_snapshot_sn, my_snapshot_sn, entries):
+        multi_ack = PacketHPIMMultiAck(neighbor_boot_time=neighbor_boot_time, neighbor_snapshot_sn=neighbor_snapshot_sn,
+                                       my_snapshot_sn=my_snapshot_sn, entries=entries)
+        return Packet(payload=PacketHPIMHeader(payload=multi_ack, boot_time=my_boot_time))
+
+    def get_multi_ack_max_entries(self):
+        """
+        Maximum number of trees acknowledged by a MultiAck message (in order to fit in the MTU of the interface)
+        """
+        return PacketHPIMMultiAck.max_entries(self.get_bundle_max_size())
+
+    def create_bundle(self):
+        return PacketHPIMBundle()
+
+    def create_packet(self, payload, my_boot_time):
+        return Packet(payload=PacketHPIMHeader(payload=payload, boot_time=my_boot_time))
+
+    @staticmethod
+    def get_bundle_record_length(msg):
+        return PacketHPIMBundle.record_length(msg)
+
+    def get_bundle_max_size(self):
+        """
+        Maximum number of bytes of messages included in a Bundle (in order to fit in the MTU of the interface)
+        """
+        return self.get_mtu() - self.get_ip_header_length() - 8 - self.security_len
+
     def create_sync_entry_hdr(self, source, group, metric_preference, metric):
         return PacketHPIMSyncEntry(source, group, metric_preference, metric)
 
+    def encode_sync_entries(self, trees):
+        return PacketHPIMSyncEntry.encode_entries(trees)
+
+    def get_sync_entries_fragment(self, encoded_entries, start, end):
+        return PacketHPIMSyncEntry.get_entries_fragment(encoded_entries, start, end)
+
     def create_sync_msg(self, my_boot_time, my_snapshot_sn, neighbor_snapshot_sn, sync_sn, upstream_trees,
                         master_flag, more_flag, neighbor_boot_time):
         pkt_sync = PacketHPIMSync(my_snapshot_sn, neighbor_snapshot_sn, sync_sn, upstream_trees,
@@ -476,20 +582,29 @@ class InterfaceHPIM(Interface):
         """
         ip = packet.ip_header.ip_src
         boot_time = packet.payload.boot_time
-        print("ip = ", ip)
         options = packet.payload.payload.get_options()
         hello_hold_time = options["HOLDTIME"].holdtime
         checkpoint_sn = 0
         if "CHECKPOINT_SN" in options:
             checkpoint_sn = options["CHECKPOINT_SN"].checkpoint_sn
-        self.interface_logger.debug('Received Hello message with HelloHoldTime: ' + str(hello_hold_time) +
-                                    '; CheckpointSN: ' + str(checkpoint_sn) + ' from neighbor ' + ip)
+        sync_window = 1
+        if "SYNC_WINDOW" in options:
+            sync_window = options["SYNC_WINDOW"].sync_window
+        supports_bundles = "BUNDLE" in options
+        supports_multi_ack = "MULTI_ACK" in options
+        self.interface_logger.debug('Received Hello message with HelloHoldTime: %s; CheckpointSN: %s; SyncWindow: %s; '
+                                    'Bundle: %s; MultiAck: %s from neighbor %s', hello_hold_time, checkpoint_sn,
+                                    sync_window, supports_bundles, supports_multi_ack, ip)
 
         with self.neighbors_lock:
             if ip in self.neighbors:
-                self.neighbors[ip].recv_hello(boot_time, hello_hold_time, checkpoint_sn)
+                self.neighbors[ip].recv_hello(boot_time, hello_hold_time, checkpoint_sn, sync_window, supports_bundles,
+                                              supports_multi_ack)
             else:
                 self.new_neighbor(ip, boot_time, True)
+                self.neighbors[ip].sync_window = sync_window
+                self.neighbors[ip].supports_bundles = supports_bundles
+                self.neighbors[ip].supports_multi_ack = supports_multi_ack
 
     def receive_sync(self, packet):
         """
@@ -514,14 +629,10 @@ class InterfaceHPIM(Interface):
         master_flag = pkt_hs.master_flag
         more_flag = pkt_hs.more_flag
 
-        self.interface_logger.debug('Received Sync message with BootTime: ' + str(boot_time) +
-                                    '; NeighborBootTime: ' + str(my_boot_time) +
-                                    '; MySnapshotSN: ' + str(neighbor_sn) +
-                                    '; NeighborSnapshotSN: ' + str(my_sn) +
-                                    '; SyncSN: ' + str(sync_sn) +
-                                    '; Master flag: ' + str(master_flag) +
-                                    '; More flag: ' + str(more_flag) +
-                                    ' from neighbor ' + ip)
+        self.interface_logger.debug('Received Sync message with BootTime: %s; NeighborBootTime: %s; MySnapshotSN: %s; '
+                                    'NeighborSnapshotSN: %s; SyncSN: %s; Master flag: %s; More flag: %s '
+                                    'from neighbor %s', boot_time, my_boot_time, neighbor_sn, my_sn, sync_sn,
+                                    master_flag, more_flag, ip)
 
         with self.neighbors_lock:
             if ip not in self.neighbors:
@@ -542,10 +653,8 @@ class InterfaceHPIM(Interface):
         source_group = (pkt_jt.source, pkt_jt.group)
         sequence_number = pkt_jt.sequence_number
 
-        self.interface_logger.debug('Received Interest message with BootTime: ' + str(boot_time) +
-                                    '; Tree: ' + str(source_group) +
-                                    '; SN: ' + str(sequence_number) +
-                                    ' from neighbor ' + neighbor_source_ip)
+        self.interface_logger.debug('Received Interest message with BootTime: %s; Tree: %s; SN: %s from neighbor %s',
+                                    boot_time, source_group, sequence_number, neighbor_source_ip)
 
         # check neighbor existence
         with self.neighbors_lock:
@@ -554,17 +663,17 @@ class InterfaceHPIM(Interface):
                 self.new_neighbor(neighbor_source_ip, boot_time)
                 return
 
+            tree_id = tree_ids.acquire(pkt_jt.source, pkt_jt.group)
             try:
-                if neighbor.recv_reliable_packet(sequence_number, source_group, boot_time):
-                    if source_group not in neighbor.tree_metric_state:
-                        neighbor.tree_interest_state[source_group] = True
+                if neighbor.recv_reliable_packet(sequence_number, tree_id, boot_time):
+                    if not neighbor.set_interest_state(tree_id, True):
                         self.get_kernel().recv_interest_msg(source_group, self)
                     else:
-                        neighbor.tree_interest_state[source_group] = True
-                        neighbor.tree_metric_state.pop(source_group, None)
                         self.get_kernel().recv_upstream_msg(source_group, self)
             except:
                 traceback.print_exc()
+            finally:
+                tree_ids.release(tree_id)
 
     def receive_no_interest(self, packet):
         """
@@ -579,10 +688,8 @@ class InterfaceHPIM(Interface):
         source_group = (pkt_jt.source, pkt_jt.group)
         sequence_number = pkt_jt.sequence_number
 
-        self.interface_logger.debug('Received NoInterest message with BootTime: ' + str(boot_time) +
-                                    '; Tree: ' + str(source_group) +
-                                    '; SN: ' + str(sequence_number) +
-                                    ' from neighbor ' + neighbor_source_ip)
+        self.interface_logger.debug('Received NoInterest message with BootTime: %s; Tree: %s; SN: %s from neighbor %s',
+                                    boot_time, source_group, sequence_number, neighbor_source_ip)
 
         # check neighbor existence
         with self.neighbors_lock:
@@ -591,17 +698,17 @@ class InterfaceHPIM(Interface):
                 self.new_neighbor(neighbor_source_ip, boot_time)
                 return
 
+            tree_id = tree_ids.acquire(pkt_jt.source, pkt_jt.group)
             try:
-                if neighbor.recv_reliable_packet(sequence_number, source_group, boot_time):
-                    if source_group not in neighbor.tree_metric_state:
-                        neighbor.tree_interest_state[source_group] = False
+                if neighbor.recv_reliable_packet(sequence_number, tree_id, boot_time):
+                    if not neighbor.set_interest_state(tree_id, False):
                         self.get_kernel().recv_interest_msg(source_group, self)
                     else:
-                        neighbor.tree_interest_state[source_group] = False
-                        neighbor.tree_metric_state.pop(source_group, None)
                         self.get_kernel().recv_upstream_msg(source_group, self)
             except:
                 traceback.print_exc()
+            finally:
+                tree_ids.release(tree_id)
 
     def receive_i_am_upstream(self, packet):
         """
@@ -621,12 +728,9 @@ class InterfaceHPIM(Interface):
         received_metric = AssertMetric(metric_preference=metric_preference, route_metric=metric,
                                        ip_address=neighbor_source_ip)
 
-        self.interface_logger.debug('Received IamUpstream message with BootTime: ' + str(boot_time) +
-                                    '; Tree: ' + str(source_group) +
-                                    '; SN: ' + str(sequence_number) +
-                                    '; MetricPreference: ' + str(metric_preference) +
-                                    '; Metric: ' + str(metric) +
-                                    ' from neighbor ' + neighbor_source_ip)
+        self.interface_logger.debug('Received IamUpstream message with BootTime: %s; Tree: %s; SN: %s; '
+                                    'MetricPreference: %s; Metric: %s from neighbor %s', boot_time, source_group,
+                                    sequence_number, metric_preference, metric, neighbor_source_ip)
 
         # check neighbor existence
         with self.neighbors_lock:
@@ -635,13 +739,15 @@ class InterfaceHPIM(Interface):
                 self.new_neighbor(neighbor_source_ip, boot_time)
                 return
 
+            tree_id = tree_ids.acquire(pkt_jt.source, pkt_jt.group)
             try:
-                if neighbor.recv_reliable_packet(sequence_number, source_group, boot_time):
-                    neighbor.tree_interest_state.pop(source_group, None)
-                    neighbor.tree_metric_state[source_group] = received_metric
+                if neighbor.recv_reliable_packet(sequence_number, tree_id, boot_time):
+                    neighbor.set_upstream_state(tree_id, received_metric)
                     self.get_kernel().recv_upstream_msg(source_group, self)
             except:
                 traceback.print_exc()
+            finally:
+                tree_ids.release(tree_id)
 
     def receive_i_am_no_longer_upstream(self, packet):
         """
@@ -655,10 +761,8 @@ class InterfaceHPIM(Interface):
         source_group = (pkt_jt.source, pkt_jt.group)
         sequence_number = pkt_jt.sequence_number
 
-        self.interface_logger.debug('Received IamNoLongerUpstream message with BootTime: ' + str(boot_time) +
-                                    '; Tree: ' + str(source_group) +
-                                    '; SN: ' + str(sequence_number) +
-                                    ' from neighbor ' + neighbor_source_ip)
+        self.interface_logger.debug('Received IamNoLongerUpstream message with BootTime: %s; Tree: %s; SN: %s '
+                                    'from neighbor %s', boot_time, source_group, sequence_number, neighbor_source_ip)
 
         # check neighbor existence
         with self.neighbors_lock:
@@ -667,13 +771,15 @@ class InterfaceHPIM(Interface):
                 self.new_neighbor(neighbor_source_ip, boot_time)
                 return
 
+            tree_id = tree_ids.acquire(pkt_jt.source, pkt_jt.group)
             try:
-                if neighbor.recv_reliable_packet(sequence_number, source_group, boot_time):
-                    neighbor.tree_interest_state.pop(source_group, None)
-                    neighbor.tree_metric_state.pop(source_group, None)
+                if neighbor.recv_reliable_packet(sequence_number, tree_id, boot_time):
+                    neighbor.remove_upstream_state(tree_id)
                     self.get_kernel().recv_upstream_msg(source_group, self)
             except:
                 traceback.print_exc()
+            finally:
+                tree_ids.release(tree_id)
 
     def receive_ack(self, packet):
         """
@@ -690,13 +796,10 @@ class InterfaceHPIM(Interface):
         neighbor_snapshot_sn = pkt_ack.my_snapshot_sn
         sequence_number = pkt_ack.sequence_number
 
-        self.interface_logger.debug('Received Ack message with BootTime: ' + str(neighbor_boot_time) +
-                                    '; NeighborBootTime: ' + str(my_boot_time) +
-                                    '; MySnapshotSN: ' + str(neighbor_snapshot_sn) +
-                                    '; NeighborSnapshotSN: ' + str(my_snapshot_sn) +
-                                    '; Tree: ' + str(source_group) +
-                                    '; SN: ' + str(sequence_number) +
-                                    ' from neighbor ' + neighbor_source_ip)
+        self.interface_logger.debug('Received Ack message with BootTime: %s; NeighborBootTime: %s; MySnapshotSN: %s; '
+                                    'NeighborSnapshotSN: %s; Tree: %s; SN: %s from neighbor %s', neighbor_boot_time,
+                                    my_boot_time, neighbor_snapshot_sn, my_snapshot_sn, source_group, sequence_number,
+                                    neighbor_source_ip)
 
         # check neighbor existence
         with self.neighbors_lock:
@@ -713,10 +816,64 @@ class InterfaceHPIM(Interface):
                     #if my_boot_time != self.time_of_boot:
                     #    return
 
-                    reliable_transmission = self.reliable_transmission_buffer.get(source_group, None)
+                    tree_id = tree_ids.find(pkt_ack.source, pkt_ack.group)
+                    reliable_transmission = self.reliable_transmission_buffer.get(tree_id, None)
                     if reliable_transmission is not None:
                         reliable_transmission.receive_ack(neighbor_source_ip, my_boot_time, sequence_number)
 
+    def receive_multi_ack(self, packet):
+        """
+        Received a MultiAck packet... acknowledgements of all its trees are processed in one pass
+        """
+        neighbor_source_ip = packet.ip_header.ip_src
+        neighbor_boot_time = packet.payload.boot_time
+        pkt_multi_ack = packet.payload.payload  # type: PacketHPIMMultiAck
+
+        my_boot_time = pkt_multi_ack.neighbor_boot_time
+        my_snapshot_sn = pkt_multi_ack.neighbor_snapshot_sn
+        neighbor_snapshot_sn = pkt_multi_ack.my_snapshot_sn
+
+        self.interface_logger.debug('Received MultiAck message with BootTime: %s; NeighborBootTime: %s; '
+                                    'MySnapshotSN: %s; NeighborSnapshotSN: %s; %d trees from neighbor %s',
+                                    neighbor_boot_time, my_boot_time, neighbor_snapshot_sn, my_snapshot_sn,
+                                    len(pkt_multi_ack.entries), neighbor_source_ip)
+
+        # check neighbor existence
+        with self.neighbors_lock:
+            neighbor = self.neighbors.get(neighbor_source_ip, None) # type: Neighbor
+            if neighbor is None:
+                self.new_neighbor(neighbor_source_ip, neighbor_boot_time)
+                return
+
+            with self.sequencer_lock:
+                with self.reliable_transmission_lock:
+                    if not neighbor.recv_ack(my_boot_time, neighbor_boot_time, my_snapshot_sn, neighbor_snapshot_sn):
+                        return
+
+                    acks = []
+                    for (source, group, sequence_number) in pkt_multi_ack.entries:
+                        reliable_transmission = self.reliable_transmission_buffer.get(tree_ids.find(source, group),
+                                                                                      None)
+                        if reliable_transmission is not None:
+                            acks.append((reliable_transmission, sequence_number))
+                    ReliableMessageTransmission.receive_acks(acks, neighbor_source_ip, my_boot_time,
+                                                             self.get_neighbors_ip())
+
+    def receive_bundle(self, packet):
+        """
+        Received a Bundle packet... process each of its messages as if it was received in a separate packet
+        """
+        ip_header = packet.ip_header
+        boot_time = packet.payload.boot_time
+        messages = packet.payload.payload.messages
+        self.interface_logger.debug('Received Bundle message with BootTime: %s; %d messages from neighbor %s',
+                                    boot_time, len(messages), ip_header.ip_src)
+
+        with self.neighbors_lock:
+            for msg in messages:
+                msg_packet = self.create_packet(msg, boot_time)
+                msg_packet.ip_header = ip_header
+                self.PKT_FUNCTIONS[msg.PIM_TYPE](self, msg_packet)
 
     PKT_FUNCTIONS = {
         PacketHPIMHello.PIM_TYPE:            receive_hello,
@@ -726,6 +883,8 @@ class InterfaceHPIM(Interface):
         PacketHPIMInterest.PIM_TYPE:         receive_interest,
         PacketHPIMNoInterest.PIM_TYPE:       receive_no_interest,
         PacketHPIMAck.PIM_TYPE:              receive_ack,
+        PacketHPIMBundle.PIM_TYPE:           receive_bundle,
+        PacketHPIMMultiAck.PIM_TYPE:         receive_multi_ack,
     }
 
 
@@ -737,11 +896,12 @@ class InterfaceHPIM(Interface):
         Get object used to monitor the reliable transmission of messages regarding a given tree
         """
         with self.reliable_transmission_lock:
-            reliable_msg_transmission = self.reliable_transmission_buffer.get(tree, None)
+            tree_id = tree_ids.find(tree[0], tree[1])
+            reliable_msg_transmission = self.reliable_transmission_buffer.get(tree_id, None)
 
             if reliable_msg_transmission is None:
                 reliable_msg_transmission = ReliableMessageTransmission(self)
-                self.reliable_transmission_buffer[tree] = reliable_msg_transmission
+                self.reliable_transmission_buffer[tree_ids.acquire(tree[0], tree[1])] = reliable_msg_transmission
 
             return reliable_msg_transmission
 
@@ -751,6 +911,7 @@ class InterfaceHPIM(Interface):
         """
         tree = (source, group)
         with self.sequencer_lock:
+            self.upstream_trees.set(tree, rpc.metric_preference, rpc.route_metric)
             with self.reliable_transmission_lock:
                 self.get_reliable_message_transmission(tree).send_i_am_upstream(source, group, rpc)
 
@@ -760,6 +921,7 @@ class InterfaceHPIM(Interface):
         """
         tree = (source, group)
         with self.sequencer_lock:
+            self.upstream_trees.remove(tree)
             with self.reliable_transmission_lock:
                 self.get_reliable_message_transmission(tree).send_i_am_no_longer_upstream(source, group)
 
@@ -796,24 +958,27 @@ class InterfaceHPIM(Interface):
         Cancel the reliable monitoring of all messages regarding a given tree
         """
         with self.reliable_transmission_lock:
-            if tree in self.reliable_transmission_buffer:
-                self.reliable_transmission_buffer[tree].cancel_all_messages()
+            tree_id = tree_ids.find(tree[0], tree[1])
+            if tree_id in self.reliable_transmission_buffer:
+                self.reliable_transmission_buffer[tree_id].cancel_all_messages()
 
     def cancel_interest_message(self, tree, neighbor_ip):
         """
         Cancel the reliable monitoring of all interest messages regarding a given tree
         """
         with self.reliable_transmission_lock:
-            if tree in self.reliable_transmission_buffer:
-                self.reliable_transmission_buffer[tree].cancel_message_unicast(neighbor_ip)
+            tree_id = tree_ids.find(tree[0], tree[1])
+            if tree_id in self.reliable_transmission_buffer:
+                self.reliable_transmission_buffer[tree_id].cancel_message_unicast(neighbor_ip)
 
     def cancel_upstream_message(self, tree):
         """
         Cancel the reliable monitoring of all upstream messages regarding a given tree
         """
         with self.reliable_transmission_lock:
-            if tree in self.reliable_transmission_buffer:
-                self.reliable_transmission_buffer[tree].cancel_message_multicast()
+            tree_id = tree_ids.find(tree[0], tree[1])
+            if tree_id in self.reliable_transmission_buffer:
+                self.reliable_transmission_buffer[tree_id].cancel_message_multicast()
 
     def clear_reliable_transmission(self):
         """
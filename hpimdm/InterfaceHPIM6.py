@@ -4,13 +4,18 @@ import struct
 import logging
 import ipaddress
 import netifaces
-from threading import RLock
+from threading import RLock, Lock
 from socket import if_nametoindex
 
 from hpimdm import Main
 from .packet.Packet import Packet
 from .Interface import Interface
 from .InterfaceHPIM import InterfaceHPIM
+from .MessageBundler import MessageBundler
+from .RetransmissionScheduler import RetransmissionScheduler
+from .OutstandingSequenceNumbers import OutstandingSequenceNumbers
+from .UpstreamTrees import UpstreamTrees
+from .TreeStateIndex import TreeStateIndex
 from .packet.ReceivedPacket import ReceivedPacket_v6
 from hpimdm.tree.hpim_globals import MSG_FORMAT
 if MSG_FORMAT == "BINARY":
@@ -20,7 +25,8 @@ if MSG_FORMAT == "BINARY":
     from hpimdm.packet.PacketHPIMInterest import PacketHPIMInterest_v6
     from hpimdm.packet.PacketHPIMInterest import PacketHPIMNoInterest_v6
     from hpimdm.packet.PacketHPIMSync import PacketHPIMSyncEntry_v6, PacketHPIMSync_v6
-    from hpimdm.packet.PacketHPIMAck import PacketHPIMAck_v6
+    from hpimdm.packet.PacketHPIMAck import PacketHPIMAck_v6, PacketHPIMMultiAck_v6
+    from hpimdm.packet.PacketHPIMBundle import PacketHPIMBundle_v6
 else:
     from hpimdm.packet.PacketHPIMHeader import PacketHPIMHeaderJson as PacketHPIMHeader_v6
     from hpimdm.packet.PacketHPIMIamUpstream import PacketHPIMUpstreamJson as PacketHPIMUpstream_v6
@@ -29,7 +35,9 @@ else:
     from hpimdm.packet.PacketHPIMInterest import PacketHPIMNoInterestJson as PacketHPIMNoInterest_v6
     from hpimdm.packet.PacketHPIMSync import PacketHPIMSyncEntryJson as PacketHPIMSyncEntry_v6,\
         PacketHPIMSyncJson as PacketHPIMSync_v6
-    from hpimdm.packet.PacketHPIMAck import PacketHPIMAckJson as PacketHPIMAck_v6
+    from hpimdm.packet.PacketHPIMAck import PacketHPIMAckJson as PacketHPIMAck_v6, \
+        PacketHPIMMultiAckJson as PacketHPIMMultiAck_v6
+    from hpimdm.packet.PacketHPIMBundle import PacketHPIMBundleJson as PacketHPIMBundle_v6
 
 
 class InterfaceHPIM6(InterfaceHPIM):
@@ -49,6 +57,8 @@ class InterfaceHPIM6(InterfaceHPIM):
         self._had_neighbors = False
         self.neighbors = {}
         self.neighbors_lock = RLock()
+        # Upstream and Interest state of Synced neighbors aggregated per tree
+        self.tree_state_index = TreeStateIndex()
 
         # reliable transmission buffer
         self.reliable_transmission_buffer = {} # Key: ID da msg ; value: ReliableMsgTransmission
@@ -58,6 +68,19 @@ class InterfaceHPIM6(InterfaceHPIM):
         self.sequencer = 0
         self.sequencer_lock = RLock()
 
+        # trees in which this router is Upstream (included in new snapshots)
+        self.upstream_trees = UpstreamTrees()
+        # weak reference to the last snapshot (shared by neighbors that start a synchronization while it is valid)
+        self._sync_snapshot = None
+        self._sync_snapshot_lock = Lock()
+
+        # bundle control messages regarding single trees
+        self.bundler = MessageBundler(self)
+        # retransmissions of control messages of all trees
+        self.retransmission_scheduler = RetransmissionScheduler(self)
+        # (BootTime, SN) of messages being reliably transmitted (used to calculate the CheckpointSN)
+        self.outstanding_sequence_numbers = OutstandingSequenceNumbers()
+
         # security
         self.security_id = 0
         self.security_len = 0
@@ -160,9 +183,37 @@ class InterfaceHPIM6(InterfaceHPIM):
                                my_snapshot_sn=my_snapshot_sn)
         return Packet(payload=PacketHPIMHeader_v6(payload=ack, boot_time=my_boot_time))
 
+    def create_multi_ack_msg(self, my_boot_time, neighbor_boot_time, neighbor_snapshot_sn, my_snapshot_sn, entries):
+        multi_ack = PacketHPIMMultiAck_v6(neighbor_boot_time=neighbor_boot_time,
+                                          neighbor_snapshot_sn=neighbor_snapshot_sn, my_snapshot_sn=my_snapshot_sn,
+                                          entries=entries)
+        return Packet(payload=PacketHPIMHeader_v6(payload=multi_ack, boot_time=my_boot_time))
+
+    def get_multi_ack_max_entries(self):
+        """
+        Maximum number of trees acknowledged by a MultiAck message (in order to fit in the MTU of the interface)
+        """
+        return PacketHPIMMultiAck_v6.max_entries(self.get_bundle_max_size())
+
+    def create_bundle(self):
+        return PacketHPIMBundle_v6()
+
+    def create_packet(self, payload, my_boot_time):
+        return Packet(payload=PacketHPIMHeader_v6(payload=payload, boot_time=my_boot_time))
+
+    @staticmethod
+    def get_bundle_record_length(msg):
+        return PacketHPIMBundle_v6.record_length(msg)
+
     def create_sync_entry_hdr(self, source, group, metric_preference, metric):
         return PacketHPIMSyncEntry_v6(source, group, metric_preference, metric)
 
+    def encode_sync_entries(self, trees):
+        return PacketHPIMSyncEntry_v6.encode_entries(trees)
+
+    def get_sync_entries_fragment(self, encoded_entries, start, end):
+        return PacketHPIMSyncEntry_v6.get_entries_fragment(encoded_entries, start, end)
+
     def create_sync_msg(self, my_boot_time, my_snapshot_sn, neighbor_snapshot_sn, sync_sn, upstream_trees,
                         master_flag, more_flag, neighbor_boot_time):
         pkt_sync = PacketHPIMSync_v6(my_snapshot_sn, neighbor_snapshot_sn, sync_sn, upstream_trees,
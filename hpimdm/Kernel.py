@@ -1,15 +1,19 @@
 import os
+import time
+import fcntl
 import socket
 import struct
 import traceback
-import ipaddress
-from threading import Thread
+from threading import Thread, Lock, RLock, Condition
+from collections import OrderedDict
 from socket import if_nametoindex
 from abc import ABCMeta, abstractmethod
 
 from hpimdm import Main
 from hpimdm.tree import hpim_globals
 from hpimdm.rwlock.RWLock import RWLockWrite
+from hpimdm.PrefixTrie import PrefixTrie
+from hpimdm.TimerWheel import Timer
 from hpimdm import UnicastRouting
 
 from hpimdm.InterfaceMLD import InterfaceMLD
@@ -20,8 +24,62 @@ from .tree.KernelEntryInterface import KernelEntry4Interface, KernelEntry6Interf
 from hpimdm.tree.KernelEntry import KernelEntry, KernelEntryOriginator, KernelEntryNonOriginator
 
 
+# Operations of the MFC programming queue
+MFC_ADD = 0
+MFC_FLOOD = 1
+MFC_DELETE = 2
+
+# Receive buffer of the socket used to receive upcalls from the kernel (sized for bursts of upcalls regarding new
+# sources)
+KERNEL_SOCKET_RCVBUF = 1024 * 1024
+SO_RCVBUFFORCE = 33
+# Maximum number of upcalls read from the kernel socket in a single batch
+UPCALL_BATCH_SIZE = 64
+
+# Number of locks protecting the state of trees... each (S,G) is mapped to one of these locks by its hash
+TREE_LOCK_SHARDS = 64
+
+
+class TreeLock(object):
+    """
+    Lock of a shard of trees (reentrant) that counts the acquisitions that had to wait for another thread
+    The lock is acquired only once... a non-blocking attempt is followed by a blocking one if it fails
+    """
+    __slots__ = ('_lock', 'contentions')
+
+    def __init__(self):
+        self._lock = RLock()
+        self.contentions = 0
+
+    def __enter__(self):
+        if not self._lock.acquire(blocking=False):
+            self._lock.acquire()
+            # counted while holding the lock
+            self.contentions += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._lock.release()
+
+
+class ProgrammedMFCEntry(object):
+    """
+    Copy of a MFC entry programmed in the kernel (IIF and OIL as a bitmask of VIF indexes)
+    """
+    __slots__ = ('inbound_interface_index', 'outbound_interfaces_mask', 'kernel_calls', 'kernel_calls_latency')
+
+    def __init__(self):
+        self.inbound_interface_index = None
+        self.outbound_interfaces_mask = 0
+        self.kernel_calls = 0
+        self.kernel_calls_latency = 0.0
+
+
 class KernelInterface(metaclass=ABCMeta):
     MAXVIFS = 0
+    FAMILY = None
+    ADDRESS_BITS = 0
+    UPCALL_LENGTH = 0
 
     def __init__(self, kernel_socket):
         # Kernel is running
@@ -34,9 +92,20 @@ class KernelInterface(metaclass=ABCMeta):
 
         # KEY : source_ip, VALUE : {group_ip: KernelEntry}
         self.routing = {}
+        # Index of all sources of routing (used to find sources included in a prefix)
+        self.source_index = PrefixTrie(self.ADDRESS_BITS)
 
         self.socket = kernel_socket
+        try:
+            self.socket.setsockopt(socket.SOL_SOCKET, SO_RCVBUFFORCE, KERNEL_SOCKET_RCVBUF)
+        except OSError:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, KERNEL_SOCKET_RCVBUF)
+        # Table-level lock... acquired for writing only by structural operations (add/remove interfaces)
+        # Operations regarding a single tree acquire it for reading together with the lock of the shard of that tree
         self.rwlock = RWLockWrite()
+        self.tree_locks = [TreeLock() for _ in range(TREE_LOCK_SHARDS)]
+        # Protects insertion/removal of trees in routing and source_index (held for short periods)
+        self.routing_lock = Lock()
 
         self.hpim_interface = {}  # name: interface_protocol
         self.membership_interface = {}  # name: interface_igmp
@@ -44,12 +113,74 @@ class KernelInterface(metaclass=ABCMeta):
         # logs
         self.interface_logger = Main.logger.getChild('KernelInterface')
         self.tree_logger = Main.logger.getChild('KernelTree')
+        self.upcall_logger = Main.logger.getChild('KernelUpcall')
+
+        # What was programmed in the multicast routing table of the kernel
+        # KEY : (source_ip, group_ip), VALUE : ProgrammedMFCEntry
+        self.mfc_shadow = {}
+        self.mfc_shadow_lock = Lock()
+        self.mfc_updates_suppressed = 0
+        self.mfc_kernel_calls = 0
+        self.mfc_kernel_calls_latency = 0.0
+        self.mfc_kernel_calls_max_latency = 0.0
+
+        # Pending operations of the multicast routing table (applied in order by a single thread)
+        # KEY : (source_ip, group_ip), VALUE : [(MFC_ADD/MFC_FLOOD/MFC_DELETE, argument, enqueue time)]
+        self.mfc_queue = OrderedDict()
+        self.mfc_queue_condition = Condition(Lock())
+        self.mfc_queue_depth = 0
+        self.mfc_queue_max_depth = 0
+        self.mfc_queue_operations = 0
+        self.mfc_queue_coalesced = 0
+        self.mfc_queue_batches = 0
+        self.mfc_queue_processed = 0
+        self.mfc_queue_latency = 0.0
+        self.mfc_queue_max_latency = 0.0
+
+        # program the multicast routing table with a background thread
+        mfc_thread = Thread(target=self.mfc_programming_worker)
+        mfc_thread.daemon = True
+        mfc_thread.start()
+
+        # Upcalls recently processed (KEY : (msg_type, source_ip, group_ip, vif_index), VALUE : time)
+        # and token bucket of each source (KEY : source_ip, VALUE : [tokens, time of last update])
+        # (only accessed by the handler thread)
+        self.upcall_recent = {}
+        self.upcall_buckets = {}
+        self.upcall_last_purge = time.monotonic()
+        self.upcalls_received = 0
+        self.upcalls_processed = 0
+        self.upcalls_deduplicated = 0
+        self.upcalls_rate_limited = 0
+        self.upcall_batches = 0
+        self.upcall_max_batch_size = 0
 
         # receive signals from kernel with a background thread
         handler_thread = Thread(target=self.handler)
         handler_thread.daemon = True
         handler_thread.start()
 
+        # Trees of each interface whose state must be rechecked due to neighbor events (rechecks requested during
+        # RECHECK_COALESCE_INTERVAL seconds are applied together)
+        # KEY : vif_index, VALUE : set of (source_ip, group_ip)
+        self.dirty_trees = {}
+        # Interfaces in which all trees of routing must also be rechecked
+        self.dirty_trees_include_routing = set()
+        self.dirty_trees_lock = Lock()
+        self.dirty_trees_timer = None
+        self.recheck_events = 0
+        self.recheck_passes = 0
+        self.rechecked_trees = 0
+        self.rechecked_trees_max = 0
+
+        # KEY : (source_ip, group_ip), VALUE : number of packets of the MFC entry in the last poll
+        self.mfc_packet_counters = {}
+
+        # poll packet counters of MFC entries with a background thread
+        poll_thread = Thread(target=self.poll_mfc_counters)
+        poll_thread.daemon = True
+        poll_thread.start()
+
     ##############################################
     # Create/remove interfaces methods
     ##############################################
@@ -77,6 +208,9 @@ class KernelInterface(metaclass=ABCMeta):
                 ip_interface = hpim_interface.ip_interface
                 if not vif_already_exists:
                     self.create_virtual_interface(ip_interface=ip_interface, interface_name=interface_name, index=index)
+                # trees whose NonRoot interface was created before this HPIM interface
+                for (tree, rpc) in self.snapshot_multicast_routing_table(index).items():
+                    hpim_interface.upstream_trees.set(tree, rpc.metric_preference, rpc.route_metric)
                 hpim_interface.enable()
                 thread = Thread(target=self.recheck_all_trees, args=(index,))
                 thread.start()
@@ -179,39 +313,523 @@ class KernelInterface(metaclass=ABCMeta):
     #############################################
     # Manipulate multicast routing table
     #############################################
-    @abstractmethod
     def set_multicast_route(self, kernel_entry: KernelEntry):
-        raise NotImplementedError
+        """
+        Program the MFC entry of kernel_entry with its current IIF and OIL
+        """
+        self._enqueue_mfc_operation(MFC_ADD, (kernel_entry.source_ip, kernel_entry.group_ip), kernel_entry)
 
-    @abstractmethod
     def set_flood_multicast_route(self, source_ip, group_ip, inbound_interface_index):
-        raise NotImplementedError
+        """
+        Program a temporary MFC entry that floods (S,G) data packets through all interfaces
+        """
+        if inbound_interface_index is None:
+            return
+        self._enqueue_mfc_operation(MFC_FLOOD, (source_ip, group_ip), inbound_interface_index)
 
     def remove_multicast_route(self, kernel_entry: KernelEntry):
-        Thread(target=self._remove_multicast_route, args=(kernel_entry,)).start()
-        #self._remove_multicast_route(kernel_entry, struct_mfcctl)
+        """
+        Remove the MFC entry of kernel_entry and the tree from the routing table
+        """
+        self._enqueue_mfc_operation(MFC_DELETE, (kernel_entry.source_ip, kernel_entry.group_ip), kernel_entry)
+
+    def _enqueue_mfc_operation(self, operation, tree, argument):
+        """
+        Add an operation to the MFC programming queue
+        A pending Add/Flood of the same tree is superseded by the new operation. A pending Delete is never dropped
+        (the removal of the tree must happen) but absorbs later operations regarding the same KernelEntry
+        """
+        with self.mfc_queue_condition:
+            self.mfc_queue_operations += 1
+            pending_operations = self.mfc_queue.get(tree, None)
+            if pending_operations is None:
+                self.mfc_queue[tree] = [(operation, argument, time.monotonic())]
+            else:
+                (last_operation, last_argument, enqueue_time) = pending_operations[-1]
+                if last_operation != MFC_DELETE:
+                    pending_operations[-1] = (operation, argument, enqueue_time)
+                    self.mfc_queue_coalesced += 1
+                    return
+                elif operation != MFC_FLOOD and argument is last_argument:
+                    self.mfc_queue_coalesced += 1
+                    return
+                pending_operations.append((operation, argument, time.monotonic()))
+
+            self.mfc_queue_depth += 1
+            self.mfc_queue_max_depth = max(self.mfc_queue_max_depth, self.mfc_queue_depth)
+            self.mfc_queue_condition.notify()
+
+    def mfc_programming_worker(self):
+        """
+        Apply operations of the MFC programming queue in order
+        All pending operations are drained at once... consecutive removals are applied under a single acquisition of
+        the routing table lock
+        """
+        while self.running:
+            with self.mfc_queue_condition:
+                while len(self.mfc_queue) == 0:
+                    self.mfc_queue_condition.wait()
+                batch = self.mfc_queue
+                self.mfc_queue = OrderedDict()
+                self.mfc_queue_depth = 0
+                self.mfc_queue_batches += 1
+
+            pending_removals = []
+            for (tree, pending_operations) in batch.items():
+                for (operation, argument, enqueue_time) in pending_operations:
+                    self._account_mfc_queue_latency(time.monotonic() - enqueue_time)
+                    try:
+                        if operation == MFC_DELETE:
+                            pending_removals.append(argument)
+                            continue
+                        self._remove_multicast_routes(pending_removals)
+                        pending_removals = []
+                        if operation == MFC_ADD:
+                            self._program_multicast_route(argument)
+                        elif operation == MFC_FLOOD:
+                            self._program_flood_multicast_route(tree[0], tree[1], argument)
+                    except Exception:
+                        self.tree_logger.exception('Unable to program MFC entry of %s', tree)
+            try:
+                self._remove_multicast_routes(pending_removals)
+            except Exception:
+                self.tree_logger.exception('Unable to remove MFC entries')
+
+    def _program_multicast_route(self, kernel_entry):
+        """
+        Program the MFC entry of kernel_entry (if it is still in the routing table)
+        The kernel is only called if the IIF or OIL differ from what was previously programmed for this tree
+        """
+        tree = (kernel_entry.source_ip, kernel_entry.group_ip)
+        with self.get_tree_lock(tree[0], tree[1]):
+            if self.get_kernel_entry(tree[0], tree[1]) is not kernel_entry:
+                return
+            with kernel_entry.get_multicast_change_lock():
+                inbound_interface_index = kernel_entry.inbound_interface_index
+                if inbound_interface_index is None:
+                    return
+                outbound_interfaces_mask = kernel_entry.get_outbound_interfaces_mask()
+
+        with self.mfc_shadow_lock:
+            programmed_entry = self.mfc_shadow.get(tree, None)
+            if programmed_entry is not None and programmed_entry.inbound_interface_index == inbound_interface_index \
+                    and programmed_entry.outbound_interfaces_mask == outbound_interfaces_mask:
+                self.mfc_updates_suppressed += 1
+                return
+
+            start_time = time.monotonic()
+            self._set_multicast_route(tree[0], tree[1], inbound_interface_index, outbound_interfaces_mask)
+            latency = time.monotonic() - start_time
+
+            if programmed_entry is None:
+                programmed_entry = ProgrammedMFCEntry()
+                self.mfc_shadow[tree] = programmed_entry
+            programmed_entry.inbound_interface_index = inbound_interface_index
+            programmed_entry.outbound_interfaces_mask = outbound_interfaces_mask
+            programmed_entry.kernel_calls += 1
+            programmed_entry.kernel_calls_latency += latency
+            self._account_mfc_kernel_call(latency)
+
+    def _program_flood_multicast_route(self, source_ip, group_ip, inbound_interface_index):
+        with self.mfc_shadow_lock:
+            # the flood entry replaces whatever was programmed for this tree
+            self.mfc_shadow.pop((source_ip, group_ip), None)
+            start_time = time.monotonic()
+            self._set_flood_multicast_route(source_ip, group_ip, inbound_interface_index)
+            self._account_mfc_kernel_call(time.monotonic() - start_time)
 
     @abstractmethod
-    def _remove_multicast_route(self, kernel_entry):
+    def _set_multicast_route(self, source_ip, group_ip, inbound_interface_index, outbound_interfaces_mask):
         raise NotImplementedError
 
     @abstractmethod
-    def exit(self):
+    def _set_flood_multicast_route(self, source_ip, group_ip, inbound_interface_index):
         raise NotImplementedError
 
     @abstractmethod
+    def _del_multicast_route(self, source_ip, group_ip):
+        raise NotImplementedError
+
+    def _remove_multicast_routes(self, kernel_entries):
+        """
+        Remove MFC entries of kernel_entries and their trees from the routing table
+        Trees are created again if a neighbor still considers itself Upstream
+        """
+        if len(kernel_entries) == 0:
+            return
+
+        with self.rwlock.genRlock():
+            for kernel_entry in kernel_entries:
+                source_ip = kernel_entry.source_ip
+                group_ip = kernel_entry.group_ip
+                with self.get_tree_lock(source_ip, group_ip):
+                    self._remove_tree(kernel_entry)
+
+    def _remove_tree(self, kernel_entry):
+        """
+        Remove MFC entry of kernel_entry and its tree from the routing table
+        (lock of the shard of this tree must be held)
+        """
+        source_ip = kernel_entry.source_ip
+        group_ip = kernel_entry.group_ip
+        if self.get_kernel_entry(source_ip, group_ip) is not kernel_entry:
+            return
+        try:
+            start_time = time.monotonic()
+            self._del_multicast_route(source_ip, group_ip)
+            self._account_mfc_kernel_call(time.monotonic() - start_time)
+        except socket.error:
+            pass
+        self._forget_multicast_route(source_ip, group_ip)
+        with self.routing_lock:
+            self.routing[source_ip].pop(group_ip)
+            if len(self.routing[source_ip]) == 0:
+                self._remove_source(source_ip)
+        kernel_entry.delete_state()
+
+        info_about_tree_can_be_removed = True
+        for interface in list(self.hpim_interface.values()):
+            (_, upstream_state) = interface.get_tree_state((source_ip, group_ip))
+            if upstream_state is not None:
+                self.create_entry(source_ip, group_ip)
+                info_about_tree_can_be_removed = False
+                break
+
+        if info_about_tree_can_be_removed:
+            for interface in list(self.hpim_interface.values()):
+                interface.remove_tree_state(source_ip, group_ip)
+
+    def _forget_multicast_route(self, source_ip, group_ip):
+        """
+        MFC entry of (source_ip, group_ip) was removed from the kernel
+        """
+        with self.mfc_shadow_lock:
+            self.mfc_shadow.pop((source_ip, group_ip), None)
+
+    def _account_mfc_kernel_call(self, latency):
+        self.mfc_kernel_calls += 1
+        self.mfc_kernel_calls_latency += latency
+        self.mfc_kernel_calls_max_latency = max(self.mfc_kernel_calls_max_latency, latency)
+
+    def _account_mfc_queue_latency(self, latency):
+        self.mfc_queue_processed += 1
+        self.mfc_queue_latency += latency
+        self.mfc_queue_max_latency = max(self.mfc_queue_max_latency, latency)
+
+    def get_mfc_statistics(self):
+        """
+        Get counters regarding the programming of the kernel multicast routing table
+        """
+        average_latency = 0
+        if self.mfc_kernel_calls > 0:
+            average_latency = self.mfc_kernel_calls_latency / self.mfc_kernel_calls
+        average_queue_latency = 0
+        if self.mfc_queue_processed > 0:
+            average_queue_latency = self.mfc_queue_latency / self.mfc_queue_processed
+        return {"MFC entries programmed": len(self.mfc_shadow),
+                "MFC kernel calls": self.mfc_kernel_calls,
+                "MFC updates suppressed": self.mfc_updates_suppressed,
+                "MFC kernel call latency avg (ms)": round(average_latency * 1000, 3),
+                "MFC kernel call latency max (ms)": round(self.mfc_kernel_calls_max_latency * 1000, 3),
+                "MFC queue depth": self.mfc_queue_depth,
+                "MFC queue max depth": self.mfc_queue_max_depth,
+                "MFC queue operations": self.mfc_queue_operations,
+                "MFC queue operations coalesced": self.mfc_queue_coalesced,
+                "MFC queue batches": self.mfc_queue_batches,
+                "MFC queue latency avg (ms)": round(average_queue_latency * 1000, 3),
+                "MFC queue latency max (ms)": round(self.mfc_queue_max_latency * 1000, 3),
+                "Tree lock shards": TREE_LOCK_SHARDS,
+                "Tree lock contentions": sum(tree_lock.contentions for tree_lock in self.tree_locks),
+                "Tree lock max contentions per shard": max(tree_lock.contentions for tree_lock in self.tree_locks),
+                }
+
+    def get_mfc_entries_statistics(self):
+        """
+        Get what was programmed for each tree and number/latency of kernel calls
+        Returns {(source_ip, group_ip): (iif, oil_mask, kernel_calls, average_latency)}
+        """
+        with self.mfc_shadow_lock:
+            return {tree: (e.inbound_interface_index, e.outbound_interfaces_mask, e.kernel_calls,
+                           e.kernel_calls_latency / e.kernel_calls if e.kernel_calls > 0 else 0)
+                    for (tree, e) in self.mfc_shadow.items()}
+
+    @abstractmethod
+    def exit(self):
+        raise NotImplementedError
+
     def handler(self):
+        """
+        Receive upcalls from the kernel
+        Only the first read of each batch blocks... the remaining upcalls already queued in the socket are drained
+        without blocking (at most UPCALL_BATCH_SIZE upcalls per batch)
+        """
+        while self.running:
+            try:
+                batch = [self.socket.recv(self.UPCALL_LENGTH)]
+                while len(batch) < UPCALL_BATCH_SIZE:
+                    try:
+                        batch.append(self.socket.recv(self.UPCALL_LENGTH, socket.MSG_DONTWAIT))
+                    except BlockingIOError:
+                        break
+
+                upcalls = []
+                for msg in batch:
+                    upcall = self._parse_upcall(msg)
+                    if upcall is not None:
+                        upcalls.append(upcall)
+                self.process_upcalls(upcalls)
+            except Exception:
+                if self.running:
+                    self.upcall_logger.exception('Error receiving upcalls')
+                continue
+
+    def process_upcalls(self, upcalls):
+        """
+        Process a batch of upcalls [(msg_type, source_ip, group_ip, vif_index)]
+        Repeated upcalls (same type, (S,G) and interface) received during UPCALL_DEDUP_INTERVAL are discarded and the
+        upcalls of each source are limited by a token bucket
+        """
+        now = time.monotonic()
+        self.upcalls_received += len(upcalls)
+        self.upcall_batches += 1
+        self.upcall_max_batch_size = max(self.upcall_max_batch_size, len(upcalls))
+
+        dedup_interval = hpim_globals.UPCALL_DEDUP_INTERVAL
+        if now - self.upcall_last_purge >= max(dedup_interval, 1):
+            self._purge_upcall_state(now)
+
+        for upcall in upcalls:
+            last_time = self.upcall_recent.get(upcall, None)
+            if last_time is not None and now - last_time < dedup_interval:
+                self.upcalls_deduplicated += 1
+                continue
+            (msg_type, ip_src, ip_dst, vif_index) = upcall
+            if not self._consume_upcall_token(ip_src, now):
+                self.upcalls_rate_limited += 1
+                continue
+            self.upcall_recent[upcall] = now
+            self.upcalls_processed += 1
+
+            self.upcall_logger.debug('Upcall type %d regarding (%s, %s) in vif %d', msg_type, ip_src, ip_dst,
+                                     vif_index)
+            try:
+                self._handle_upcall(msg_type, ip_src, ip_dst, vif_index)
+            except Exception:
+                self.upcall_logger.exception('Error processing upcall type %d regarding (%s, %s)', msg_type, ip_src,
+                                             ip_dst)
+
+    def _consume_upcall_token(self, source_ip, now):
+        """
+        Take a token from the bucket of source_ip
+        Return False if the source exceeded its rate of upcalls
+        """
+        rate = hpim_globals.UPCALL_RATE_LIMIT
+        if rate <= 0:
+            return True
+        burst = max(hpim_globals.UPCALL_BURST, 1)
+        bucket = self.upcall_buckets.get(source_ip, None)
+        if bucket is None:
+            bucket = [burst, now]
+            self.upcall_buckets[source_ip] = bucket
+        else:
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] < 1:
+            return False
+        bucket[0] -= 1
+        return True
+
+    def _purge_upcall_state(self, now):
+        """
+        Forget upcalls older than the deduplication interval and buckets that are already full again
+        """
+        self.upcall_last_purge = now
+        dedup_interval = hpim_globals.UPCALL_DEDUP_INTERVAL
+        self.upcall_recent = {upcall: last_time for (upcall, last_time) in self.upcall_recent.items()
+                              if now - last_time < dedup_interval}
+        rate = hpim_globals.UPCALL_RATE_LIMIT
+        burst = max(hpim_globals.UPCALL_BURST, 1)
+        self.upcall_buckets = {source_ip: bucket for (source_ip, bucket) in self.upcall_buckets.items()
+                               if rate > 0 and bucket[0] + (now - bucket[1]) * rate < burst}
+
+    def get_upcall_statistics(self):
+        """
+        Get counters regarding upcalls received from the kernel
+        """
+        try:
+            rcvbuf = self.socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        except OSError:
+            rcvbuf = None
+        return {"Upcall socket receive buffer (bytes)": rcvbuf,
+                "Upcalls received": self.upcalls_received,
+                "Upcalls processed": self.upcalls_processed,
+                "Upcalls dropped (duplicated)": self.upcalls_deduplicated,
+                "Upcalls dropped (rate limited)": self.upcalls_rate_limited,
+                "Upcall batches": self.upcall_batches,
+                "Upcall max batch size": self.upcall_max_batch_size,
+                }
+
+    def get_recheck_statistics(self):
+        """
+        Get counters regarding rechecks of trees caused by neighbor and interface events
+        """
+        average_trees = 0
+        if self.recheck_events > 0:
+            average_trees = self.rechecked_trees / self.recheck_events
+        return {"Recheck events": self.recheck_events,
+                "Recheck passes": self.recheck_passes,
+                "Trees rechecked": self.rechecked_trees,
+                "Trees rechecked per event avg": round(average_trees, 3),
+                "Trees rechecked per pass max": self.rechecked_trees_max,
+                }
+
+    def get_bundle_statistics(self):
+        """
+        Get counters regarding Bundle messages transmitted by all interfaces
+        """
+        bundles_sent = 0
+        bundled_messages = 0
+        for hpim_interface in list(self.hpim_interface.values()):
+            bundles_sent += hpim_interface.bundler.bundles_sent
+            bundled_messages += hpim_interface.bundler.bundled_messages
+        average_messages = 0
+        if bundles_sent > 0:
+            average_messages = bundled_messages / bundles_sent
+        return {"Bundles sent": bundles_sent,
+                "Messages sent in bundles": bundled_messages,
+                "Messages per bundle avg": round(average_messages, 3),
+                }
+
+    def get_retransmission_statistics(self):
+        """
+        Get counters regarding retransmissions of control messages by all interfaces
+        """
+        sweeps = 0
+        retransmissions = 0
+        retransmission_rate = 0
+        scheduled_trees = 0
+        for hpim_interface in list(self.hpim_interface.values()):
+            scheduler = hpim_interface.retransmission_scheduler
+            sweeps += scheduler.sweeps
+            retransmissions += scheduler.retransmissions
+            retransmission_rate += scheduler.get_retransmission_rate()
+            scheduled_trees += scheduler.get_number_of_scheduled_trees()
+        return {"Trees awaiting retransmission": scheduled_trees,
+                "Retransmission sweeps": sweeps,
+                "Messages retransmitted": retransmissions,
+                "Retransmissions per second (last minute)": round(retransmission_rate, 3),
+                }
+
+    @abstractmethod
+    def _parse_upcall(self, msg):
+        """
+        Get (msg_type, source_ip, group_ip, vif_index) from an upcall (None if msg is not an upcall)
+        """
         raise NotImplementedError
 
+    @abstractmethod
+    def _handle_upcall(self, msg_type, ip_src, ip_dst, vif_index):
+        raise NotImplementedError
+
+    #############################################
+    # Poll packet counters of multicast routing table
+    #############################################
+    @abstractmethod
+    def get_mfc_packet_counters(self, trees):
+        """
+        Get number of packets forwarded by each tree of the kernel multicast routing table
+        Returns {(source_ip, group_ip): number_of_packets}
+        """
+        raise NotImplementedError
+
+    def poll_mfc_counters(self):
+        """
+        Periodically read the packet counters of all MFC entries of Originator trees...
+        Trees whose counters advanced since the last poll received data packets
+        (refresh their Source Active timer without receiving data packets in user space)
+        """
+        while self.running:
+            poll_interval = hpim_globals.MFC_COUNTERS_POLL_INTERVAL
+            if poll_interval <= 0:
+                self.mfc_packet_counters.clear()
+                time.sleep(1)
+                continue
+            time.sleep(poll_interval)
+
+            try:
+                originator_entries = [kernel_entry for kernel_entry in self.get_kernel_entries()
+                                      if isinstance(kernel_entry, KernelEntryOriginator)]
+
+                trees = [(kernel_entry.source_ip, kernel_entry.group_ip) for kernel_entry in originator_entries]
+                counters = self.get_mfc_packet_counters(trees)
+
+                previous_counters = self.mfc_packet_counters
+                self.mfc_packet_counters = {}
+                active_entries = []
+                for (tree, kernel_entry) in zip(trees, originator_entries):
+                    packets = counters.get(tree, None)
+                    if packets is None:
+                        continue
+                    self.mfc_packet_counters[tree] = packets
+                    if tree in previous_counters and previous_counters[tree] != packets:
+                        active_entries.append(kernel_entry)
+
+                for kernel_entry in active_entries:
+                    inbound_interface_index = kernel_entry.inbound_interface_index
+                    if inbound_interface_index is not None and inbound_interface_index in kernel_entry.interface_state:
+                        kernel_entry.recv_data_msg(inbound_interface_index)
+            except Exception:
+                self.tree_logger.exception('Unable to poll MFC packet counters')
+
     def notify_unicast_changes(self, subnet):
         # notify KernelEntries about changes at the unicast routing table
-        with self.rwlock.genWlock():
-            for source_ip in list(self.routing.keys()):
-                source_ip_obj = ipaddress.ip_address(source_ip)
-                if source_ip_obj not in subnet:
-                    continue
-                for group_ip in list(self.routing[source_ip].keys()):
-                    self.routing[source_ip][group_ip].network_update()
+        # (only entries whose source is included in the changed subnet)
+        with self.rwlock.genRlock():
+            with self.routing_lock:
+                sources = self.source_index.covered_by(int(subnet.network_address), subnet.prefixlen)
+            for source_ip in sources:
+                for kernel_entry in self.get_kernel_entries(source_ip):
+                    with self.get_tree_lock(source_ip, kernel_entry.group_ip):
+                        if self.get_kernel_entry(source_ip, kernel_entry.group_ip) is kernel_entry:
+                            kernel_entry.network_update()
+
+    def get_tree_lock(self, source_ip, group_ip):
+        """
+        Get lock of the shard of tree (source_ip, group_ip)
+        """
+        return self.tree_locks[hash((source_ip, group_ip)) % TREE_LOCK_SHARDS]
+
+    def get_kernel_entry(self, source_ip, group_ip):
+        """
+        Get KernelEntry of tree (source_ip, group_ip) (None if the tree is not in the routing table)
+        """
+        return self.routing.get(source_ip, {}).get(group_ip, None)
+
+    def get_kernel_entries(self, source_ip=None):
+        """
+        Get a copy of all KernelEntries of the routing table (or only of the ones of source_ip)
+        """
+        with self.routing_lock:
+            if source_ip is not None:
+                return list(self.routing.get(source_ip, {}).values())
+            return [kernel_entry for src_dict in self.routing.values() for kernel_entry in src_dict.values()]
+
+    def _add_source(self, source_ip):
+        """
+        Add source to routing and to the index of sources (routing_lock must be held)
+        """
+        self.routing[source_ip] = {}
+        address = int.from_bytes(socket.inet_pton(self.FAMILY, source_ip), 'big')
+        self.source_index.insert(address, self.ADDRESS_BITS, source_ip)
+
+    def _remove_source(self, source_ip):
+        """
+        Remove source from routing and from the index of sources (routing_lock must be held)
+        """
+        self.routing.pop(source_ip)
+        address = int.from_bytes(socket.inet_pton(self.FAMILY, source_ip), 'big')
+        self.source_index.remove(address, self.ADDRESS_BITS)
 
     ############################################################
     # Interact with received control packets
@@ -220,45 +838,51 @@ class KernelInterface(metaclass=ABCMeta):
         ip_src = source_group[0]
         ip_dst = source_group[1]
 
-        print("ENTER RCV_UPSTREAM")
-        with self.rwlock.genWlock():
+        with self.rwlock.genRlock(), self.get_tree_lock(ip_src, ip_dst):
             if interface not in self.hpim_interface.values():
                 return
 
             (interest_state, upstream_state) = interface.get_tree_state(source_group)
             tree_is_not_inactive = upstream_state is not None
-            print("RCV INSTALL/UNINSTALL")
-            print("INTEREST: ", interest_state)
+            self.tree_logger.debug('Upstream state of %s changed in interface %s: upstream=%s interest=%s',
+                                   source_group, interface.interface_name, upstream_state, interest_state)
 
-            if tree_is_not_inactive and (ip_src not in self.routing or ip_dst not in self.routing.get(ip_src, {})):
+            kernel_entry = self.get_kernel_entry(ip_src, ip_dst)
+            if tree_is_not_inactive and kernel_entry is None:
                 self.create_entry(ip_src, ip_dst)
-            elif ip_src in self.routing and ip_dst in self.routing[ip_src]:
-                self.routing[ip_src][ip_dst].check_interface_state(interface.vif_index, upstream_state, interest_state)
+            elif kernel_entry is not None:
+                kernel_entry.check_interface_state(interface.vif_index, upstream_state, interest_state)
             else:
                 interface.remove_tree_state(ip_src, ip_dst)
-        print("EXIT RCV_UPSTREAM")
 
     def recv_interest_msg(self, source_group, interface: "InterfaceHPIM"):
         ip_src = source_group[0]
         ip_dst = source_group[1]
 
-        print("ENTER RECV_INTEREST")
-        with self.rwlock.genRlock():
+        with self.rwlock.genRlock(), self.get_tree_lock(ip_src, ip_dst):
             if interface not in self.hpim_interface.values():
                 return
 
-            if ip_src not in self.routing or ip_dst not in self.routing[ip_src]:
+            kernel_entry = self.get_kernel_entry(ip_src, ip_dst)
+            if kernel_entry is None:
                 interface.remove_tree_state(ip_src, ip_dst)
                 return
 
             (interest_state, upstream_state) = interface.get_tree_state(source_group)
-            self.routing[ip_src][ip_dst].check_interest_state(interface.vif_index, interest_state)
-        print("EXIT RECV_INTEREST")
+            self.tree_logger.debug('Interest state of %s changed in interface %s: interest=%s',
+                                   source_group, interface.interface_name, interest_state)
+            kernel_entry.check_interest_state(interface.vif_index, interest_state)
 
     #############################################################
     # Create kernel entries (data structure representing a tree)
     #############################################################
     def create_entry(self, ip_src, ip_dst):
+        """
+        Create KernelEntry of tree (ip_src, ip_dst) if it does not exist
+        (lock of the shard of this tree must be held)
+        """
+        if self.get_kernel_entry(ip_src, ip_dst) is not None:
+            return
         (_, _, is_directly_connected, _) = UnicastRouting.get_unicast_info(ip_src)
 
         upstream_state_dict = {}
@@ -274,17 +898,17 @@ class KernelInterface(metaclass=ABCMeta):
             upstream_state_dict[vif_index] = None
             interest_state_dict[vif_index] = False
 
-        if ip_src not in self.routing:
-            self.routing[ip_src] = {}
+        if is_directly_connected:
+            kernel_entry = KernelEntryOriginator(ip_src, ip_dst, upstream_state_dict, interest_state_dict,
+                                                 self._get_kernel_entry_interface())
+        else:
+            kernel_entry = KernelEntryNonOriginator(ip_src, ip_dst, upstream_state_dict, interest_state_dict,
+                                                    self._get_kernel_entry_interface())
 
-        if ip_dst not in self.routing[ip_src] and is_directly_connected:
-            self.routing[ip_src][ip_dst] = KernelEntryOriginator(ip_src, ip_dst,
-                                                                 upstream_state_dict, interest_state_dict,
-                                                                 self._get_kernel_entry_interface())
-        elif ip_dst not in self.routing[ip_src]:
-            self.routing[ip_src][ip_dst] = KernelEntryNonOriginator(ip_src, ip_dst,
-                                                                    upstream_state_dict, interest_state_dict,
-                                                                    self._get_kernel_entry_interface())
+        with self.routing_lock:
+            if ip_src not in self.routing:
+                self._add_source(ip_src)
+            self.routing[ip_src][ip_dst] = kernel_entry
 
     @staticmethod
     @abstractmethod
@@ -292,56 +916,112 @@ class KernelInterface(metaclass=ABCMeta):
         pass
 
     def snapshot_multicast_routing_table(self, vif_index):
+        """
+        Get trees in which this router is Upstream in interface vif_index (computed from all trees of routing)
+        """
         trees_to_sync = {}
-        print("ENTER SNAPSHOT")
-        #with self.rwlock.genWlock():
-        for (ip_src, src_dict) in self.routing.items():
-            for (ip_dst, kernel_entry) in self.routing[ip_src].items():
-                tree = kernel_entry.get_interface_sync_state(vif_index)
-                if tree is not None:
-                    trees_to_sync[(ip_src, ip_dst)] = tree
-        print("EXIT SNAPSHOT")
+        for kernel_entry in self.get_kernel_entries():
+            tree = kernel_entry.get_interface_sync_state(vif_index)
+            if tree is not None:
+                trees_to_sync[(kernel_entry.source_ip, kernel_entry.group_ip)] = tree
         return trees_to_sync
 
     def recheck_all_trees(self, vif_index: int):
-        print("ENTER RECHECK")
-        with self.rwlock.genWlock():
+        """
+        Recheck all trees known by neighbors of interface vif_index and all trees of routing
+        """
+        with self.rwlock.genRlock():
             interface_name = self.vif_index_to_name_dic.get(vif_index, None)
             interface = self.hpim_interface.get(interface_name, None)
 
             known_trees = set()
             if interface is not None:
                 for n in list(interface.neighbors.values()):
-                    known_trees = known_trees.union(n.get_known_trees())
-
-            for (source, src_dict) in self.routing.items():
-                for group in src_dict.keys():
-                    known_trees.add((source, group))
+                    known_trees.update(n.get_known_trees())
+
+            for kernel_entry in self.get_kernel_entries():
+                known_trees.add((kernel_entry.source_ip, kernel_entry.group_ip))
+
+            with self.dirty_trees_lock:
+                self.recheck_events += 1
+            self._recheck_trees(vif_index, known_trees)
+
+    def recheck_trees(self, vif_index: int, trees: set, include_routing: bool = False):
+        """
+        Schedule a recheck of trees in interface vif_index (and of all trees of routing if include_routing is True)
+        Rechecks requested during RECHECK_COALESCE_INTERVAL seconds are applied together, each tree being only
+        rechecked once per interface
+        """
+        with self.dirty_trees_lock:
+            self.recheck_events += 1
+            self.dirty_trees.setdefault(vif_index, set()).update(trees)
+            if include_routing:
+                self.dirty_trees_include_routing.add(vif_index)
+            if self.dirty_trees_timer is None:
+                self.dirty_trees_timer = Timer(hpim_globals.RECHECK_COALESCE_INTERVAL, self.recheck_dirty_trees,
+                                               dedicated_thread=True)
+                self.dirty_trees_timer.start()
+
+    def recheck_neighbor_trees(self, vif_index: int, trees: set):
+        """
+        A neighbor of interface vif_index became Synced or was removed... recheck trees that it stores state about
+        (with initial flood the neighbor is also interested in all trees that it does not know, so all trees of
+        routing must be rechecked)
+        """
+        self.recheck_trees(vif_index, trees, include_routing=hpim_globals.INITIAL_FLOOD_ENABLED)
+
+    def recheck_dirty_trees(self):
+        """
+        Recheck all trees whose recheck was scheduled
+        """
+        with self.dirty_trees_lock:
+            dirty_trees = self.dirty_trees
+            include_routing = self.dirty_trees_include_routing
+            self.dirty_trees = {}
+            self.dirty_trees_include_routing = set()
+            self.dirty_trees_timer = None
 
-            print("KNOWN TREES: ", known_trees)
-            #print("INDEX:", interface.vif_index)
-
-            for tree in known_trees:
+        with self.rwlock.genRlock():
+            for (vif_index, trees) in dirty_trees.items():
+                if vif_index in include_routing:
+                    for kernel_entry in self.get_kernel_entries():
+                        trees.add((kernel_entry.source_ip, kernel_entry.group_ip))
+                self._recheck_trees(vif_index, trees)
+
+    def _recheck_trees(self, vif_index: int, trees: set):
+        """
+        Verify if the Upstream and Interest state of interface vif_index changed regarding each tree of trees
+        (rwlock must be held for reading)
+        """
+        interface_name = self.vif_index_to_name_dic.get(vif_index, None)
+        interface = self.hpim_interface.get(interface_name, None)
+        self.tree_logger.debug('Recheck %d trees of interface %s', len(trees), interface_name)
+        with self.dirty_trees_lock:
+            self.recheck_passes += 1
+            self.rechecked_trees += len(trees)
+            self.rechecked_trees_max = max(self.rechecked_trees_max, len(trees))
+
+        for tree in trees:
+            # state is read while holding the lock of the tree... a newer state, read and applied concurrently by
+            # another thread, is not overwritten by this one
+            with self.get_tree_lock(tree[0], tree[1]):
                 if interface is not None:
                     (interest_state, upstream_state) = interface.get_tree_state(tree)
                 else:
                     (interest_state, upstream_state) = (False, None)
 
-                print("UPSTREAM_STATE:", upstream_state)
-                print("INTEREST_STATE:", interest_state)
-                if upstream_state is not None and (tree[0] not in self.routing or tree[1] not in self.routing.get(tree[0], {})):
+                kernel_entry = self.get_kernel_entry(tree[0], tree[1])
+                if upstream_state is not None and kernel_entry is None:
                     self.create_entry(tree[0], tree[1])
-                elif tree[0] in self.routing and tree[1] in self.routing[tree[0]]:
-                    self.routing[tree[0]][tree[1]].check_interface_state(vif_index, upstream_state, interest_state)
-        print("EXIT RECHECK")
+                elif kernel_entry is not None:
+                    kernel_entry.check_interface_state(vif_index, upstream_state, interest_state)
 
     def recheck_membership_all_trees(self, vif_index: int):
-        print("ENTER RECHECK IGMP")
-        with self.rwlock.genWlock():
-            for src_dict in self.routing.values():
-                for entry in src_dict.values():
-                    entry.check_membership_state(vif_index)
-            print("EXIT RECHECK IGMP")
+        with self.rwlock.genRlock():
+            for entry in self.get_kernel_entries():
+                with self.get_tree_lock(entry.source_ip, entry.group_ip):
+                    if self.get_kernel_entry(entry.source_ip, entry.group_ip) is entry:
+                        entry.check_membership_state(vif_index)
 
     def recheck_all_trees_in_all_interfaces(self):
         for i in list(self.vif_index_to_name_dic.keys()):
@@ -368,6 +1048,23 @@ class Kernel4(KernelInterface):
     # Max Number of Virtual Interfaces
     MAXVIFS = 32
 
+    # Address family of multicast routing table
+    FAMILY = socket.AF_INET
+    ADDRESS_BITS = 32
+
+    # Number of bytes read per upcall (struct igmpmsg)
+    UPCALL_LENGTH = 20
+
+    # struct mfcctl
+    MFCCTL = struct.Struct("4s 4s H " + "B" * MAXVIFS + " IIIi")
+
+    # IOCTL
+    SIOCPROTOPRIVATE = 0x89E0
+    SIOCGETSGCNT = (SIOCPROTOPRIVATE + 1)
+
+    # MFC entries of the default multicast routing table
+    MFC_CACHE_FILE = "/proc/net/ip_mr_cache"
+
     # SIGNAL MSG TYPE
     IGMPMSG_NOCACHE = 1
     IGMPMSG_WRONGVIF = 2
@@ -476,76 +1173,60 @@ class Kernel4(KernelInterface):
         int mfcc_expire;
     };
     '''
-    def set_multicast_route(self, kernel_entry: KernelEntry):
-        source_ip = socket.inet_aton(kernel_entry.source_ip)
-        group_ip = socket.inet_aton(kernel_entry.group_ip)
-
-        outbound_interfaces = kernel_entry.get_outbound_interfaces_indexes()
-        if len(outbound_interfaces) != Kernel4.MAXVIFS:
-            raise Exception
-
-        #outbound_interfaces_and_other_parameters = list(kernel_entry.outbound_interfaces) + [0]*4
-        outbound_interfaces_and_other_parameters = outbound_interfaces + [0]*4
-
-        #outbound_interfaces, 0, 0, 0, 0 <- only works with python>=3.5
-        #struct_mfcctl = struct.pack("4s 4s H " + "B"*Kernel.MAXVIFS + " IIIi", source_ip, group_ip, inbound_interface_index, *outbound_interfaces, 0, 0, 0, 0)
-        struct_mfcctl = struct.pack("4s 4s H " + "B"*Kernel4.MAXVIFS + " IIIi", source_ip, group_ip, kernel_entry.inbound_interface_index, *outbound_interfaces_and_other_parameters)
+    def _set_multicast_route(self, source_ip, group_ip, inbound_interface_index, outbound_interfaces_mask):
+        outbound_interfaces = [(outbound_interfaces_mask >> i) & 1 for i in range(Kernel4.MAXVIFS)]
+        struct_mfcctl = Kernel4.MFCCTL.pack(socket.inet_aton(source_ip), socket.inet_aton(group_ip),
+                                            inbound_interface_index, *outbound_interfaces, 0, 0, 0, 0)
         self.socket.setsockopt(socket.IPPROTO_IP, Kernel4.MRT_ADD_MFC, struct_mfcctl)
 
-    def set_flood_multicast_route(self, source_ip, group_ip, inbound_interface_index):
-        if inbound_interface_index is None:
-            return
-        source_ip = socket.inet_aton(source_ip)
-        group_ip = socket.inet_aton(group_ip)
-
+    def _set_flood_multicast_route(self, source_ip, group_ip, inbound_interface_index):
         outbound_interfaces = [1] * self.MAXVIFS
         outbound_interfaces[inbound_interface_index] = 0
 
-        # outbound_interfaces_and_other_parameters = list(kernel_entry.outbound_interfaces) + [0]*4
-        outbound_interfaces_and_other_parameters = outbound_interfaces + [0] * 3 + [hpim_globals.INITIAL_FLOOD_TIME]
-
-        # outbound_interfaces, 0, 0, 0, 0 <- only works with python>=3.5
-        # struct_mfcctl = struct.pack("4s 4s H " + "B"*Kernel.MAXVIFS + " IIIi", source_ip, group_ip, inbound_interface_index, *outbound_interfaces, 0, 0, 0, 0)
-        struct_mfcctl = struct.pack("4s 4s H " + "B" * Kernel4.MAXVIFS + " IIIi", source_ip, group_ip,
-                                    inbound_interface_index, *outbound_interfaces_and_other_parameters)
+        struct_mfcctl = Kernel4.MFCCTL.pack(socket.inet_aton(source_ip), socket.inet_aton(group_ip),
+                                            inbound_interface_index, *outbound_interfaces, 0, 0, 0,
+                                            hpim_globals.INITIAL_FLOOD_TIME)
         self.socket.setsockopt(socket.IPPROTO_IP, Kernel4.MRT_ADD_MFC, struct_mfcctl)
 
-    def _remove_multicast_route(self, kernel_entry):
-        source_ip = socket.inet_aton(kernel_entry.source_ip)
-        group_ip = socket.inet_aton(kernel_entry.group_ip)
-        outbound_interfaces_and_other_parameters = [0] + [0] * Kernel4.MAXVIFS + [0] * 4
-
-        struct_mfcctl = struct.pack("4s 4s H " + "B" * Kernel4.MAXVIFS + " IIIi", source_ip, group_ip,
-                                    *outbound_interfaces_and_other_parameters)
-        with self.rwlock.genWlock():
-            source_ip = kernel_entry.source_ip
-            group_ip = kernel_entry.group_ip
-
-            if not (source_ip in self.routing and group_ip in self.routing[source_ip]):
-                return
-            try:
-                self.socket.setsockopt(socket.IPPROTO_IP, Kernel4.MRT_DEL_MFC, struct_mfcctl)
-            except socket.error:
-                pass
-            self.routing[kernel_entry.source_ip].pop(kernel_entry.group_ip)
-            kernel_entry.delete_state()
-            if len(self.routing[source_ip]) == 0:
-                self.routing.pop(source_ip)
-
-            info_about_tree_can_be_removed = True
-            for interface in self.hpim_interface.values():
-                if not info_about_tree_can_be_removed:
-                    break
-                for n in list(interface.neighbors.values()):
-                    (_, neighbor_upstream_state) = n.get_tree_state(tree=(source_ip, group_ip))
-                    if neighbor_upstream_state is not None:
-                        self.create_entry(kernel_entry.source_ip, kernel_entry.group_ip)
-                        info_about_tree_can_be_removed = False
-                        break
+    def _del_multicast_route(self, source_ip, group_ip):
+        struct_mfcctl = Kernel4.MFCCTL.pack(socket.inet_aton(source_ip), socket.inet_aton(group_ip), 0,
+                                            *([0] * Kernel4.MAXVIFS), 0, 0, 0, 0)
+        self.socket.setsockopt(socket.IPPROTO_IP, Kernel4.MRT_DEL_MFC, struct_mfcctl)
 
-            if info_about_tree_can_be_removed:
-                for interface in self.hpim_interface.values():
-                    interface.remove_tree_state(kernel_entry.source_ip, kernel_entry.group_ip)
+    '''
+    Structure used to get packet counters of a MFC entry
+    struct sioc_sg_req {
+        struct in_addr src;
+        struct in_addr grp;
+        unsigned long pktcnt;
+        unsigned long bytecnt;
+        unsigned long wrong_if;
+    };
+    '''
+    def get_mfc_packet_counters(self, trees):
+        counters = {}
+        if hpim_globals.MULTICAST_TABLE_ID == 0:
+            # read all entries of the default table in a single pass
+            # Group Origin Iif Pkts Bytes Wrong Oifs (addresses in hexadecimal, as stored in memory)
+            with open(Kernel4.MFC_CACHE_FILE) as f:
+                next(f, None)
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 4:
+                        continue
+                    group_ip = socket.inet_ntoa(struct.pack("=I", int(fields[0], 16)))
+                    source_ip = socket.inet_ntoa(struct.pack("=I", int(fields[1], 16)))
+                    counters[(source_ip, group_ip)] = int(fields[3])
+        else:
+            for (source_ip, group_ip) in trees:
+                sioc_sg_req = struct.pack("4s 4s LLL", socket.inet_aton(source_ip), socket.inet_aton(group_ip), 0, 0, 0)
+                try:
+                    sioc_sg_req = fcntl.ioctl(self.socket, Kernel4.SIOCGETSGCNT, sioc_sg_req)
+                except OSError:
+                    continue
+                (_, _, packets, _, _) = struct.unpack("4s 4s LLL", sioc_sg_req)
+                counters[(source_ip, group_ip)] = packets
+        return counters
 
     def exit(self):
         self.running = False
@@ -567,55 +1248,42 @@ class Kernel4(KernelInterface):
         struct in_addr im_src,im_dst;
     };
     '''
-    def handler(self):
-        while self.running:
-            try:
-                msg = self.socket.recv(20)
-                (_, _, im_msgtype, im_mbz, im_vif, _, im_src, im_dst) = struct.unpack("II B B B B 4s 4s", msg[:20])
-                print((im_msgtype, im_mbz, socket.inet_ntoa(im_src), socket.inet_ntoa(im_dst)))
-
-                if im_mbz != 0:
-                    continue
-
-                print(im_msgtype)
-                print(im_mbz)
-                print(im_vif)
-                print(socket.inet_ntoa(im_src))
-                print(socket.inet_ntoa(im_dst))
-                #print((im_msgtype, im_mbz, socket.inet_ntoa(im_src), socket.inet_ntoa(im_dst)))
-
-                ip_src = socket.inet_ntoa(im_src)
-                ip_dst = socket.inet_ntoa(im_dst)
-
-                if im_msgtype == Kernel4.IGMPMSG_NOCACHE:
-                    print("IGMP NO CACHE")
-                    self.igmpmsg_nocache_handler(ip_src, ip_dst, im_vif)
-                elif im_msgtype == Kernel4.IGMPMSG_WRONGVIF:
-                    print("WRONG VIF HANDLER")
-                    self.igmpmsg_wrongvif_handler(ip_src, ip_dst, im_vif)
-                #elif im_msgtype == Kernel.IGMPMSG_WHOLEPKT:
-                #    print("IGMP_WHOLEPKT")
-                #    self.igmpmsg_wholepacket_handler(ip_src, ip_dst)
-                else:
-                    raise Exception
-            except Exception:
-                traceback.print_exc()
-                continue
+    def _parse_upcall(self, msg):
+        if len(msg) < 20:
+            return None
+        (_, _, im_msgtype, im_mbz, im_vif, _, im_src, im_dst) = struct.unpack("II B B B B 4s 4s", msg[:20])
+        if im_mbz != 0:
+            return None
+        return (im_msgtype, socket.inet_ntoa(im_src), socket.inet_ntoa(im_dst), im_vif)
+
+    def _handle_upcall(self, msg_type, ip_src, ip_dst, vif_index):
+        if msg_type == Kernel4.IGMPMSG_NOCACHE:
+            self.igmpmsg_nocache_handler(ip_src, ip_dst, vif_index)
+        elif msg_type == Kernel4.IGMPMSG_WRONGVIF:
+            self.igmpmsg_wrongvif_handler(ip_src, ip_dst, vif_index)
+        #elif msg_type == Kernel.IGMPMSG_WHOLEPKT:
+        #    self.igmpmsg_wholepacket_handler(ip_src, ip_dst)
+        else:
+            raise Exception("Unknown upcall type %d" % msg_type)
 
     # receive multicast (S,G) packet and multicast routing table has no (S,G) entry
     def igmpmsg_nocache_handler(self, ip_src, ip_dst, iif):
         (_, _, is_directly_connected, rpf_if) = UnicastRouting.get_unicast_info(ip_src)
 
-        with self.rwlock.genWlock():
-            if ip_src in self.routing and ip_dst in self.routing[ip_src]:
-                self.routing[ip_src][ip_dst].recv_data_msg(iif)
+        with self.rwlock.genRlock(), self.get_tree_lock(ip_src, ip_dst):
+            kernel_entry = self.get_kernel_entry(ip_src, ip_dst)
+            if kernel_entry is not None:
+                # the kernel does not have the MFC entry of this tree... program it again
+                self._forget_multicast_route(ip_src, ip_dst)
+                kernel_entry.change()
+                kernel_entry.recv_data_msg(iif)
             elif is_directly_connected:
                 if hpim_globals.INITIAL_FLOOD_ENABLED:
                     # flood
                     self.set_flood_multicast_route(ip_src, ip_dst, rpf_if)
                 if rpf_if is not None:
                     self.create_entry(ip_src, ip_dst)
-                    self.routing[ip_src][ip_dst].recv_data_msg(iif)
+                    self.get_kernel_entry(ip_src, ip_dst).recv_data_msg(iif)
             elif not is_directly_connected and hpim_globals.INITIAL_FLOOD_ENABLED:
                 # flood
                 self.set_flood_multicast_route(ip_src, ip_dst, rpf_if)
@@ -663,6 +1331,25 @@ class Kernel6(KernelInterface):
     # Max Number of Virtual Interfaces
     MAXVIFS	 = 32
 
+    # Address family of multicast routing table
+    FAMILY = socket.AF_INET6
+    ADDRESS_BITS = 128
+
+    # Number of bytes read per upcall (struct mrt6msg)
+    UPCALL_LENGTH = 500
+
+    # struct sockaddr_in6 and struct mf6cctl (if_set with 256 bits)
+    SOCKADDR_IN6 = struct.Struct("H H I 16s I")
+    IF_SET_WORDS = 8
+    MF6CCTL = struct.Struct("28s 28s H " + "I" * IF_SET_WORDS)
+
+    # IOCTL
+    SIOCPROTOPRIVATE = 0x89E0
+    SIOCGETSGCNT_IN6 = (SIOCPROTOPRIVATE + 1)
+
+    # MFC entries of the default multicast routing table
+    MFC_CACHE_FILE = "/proc/net/ip6_mr_cache"
+
     # SIGNAL MSG TYPE
     MRT6MSG_NOCACHE  = 1
     MRT6MSG_WRONGMIF = 2
@@ -763,72 +1450,64 @@ class Kernel6(KernelInterface):
         struct if_set mf6cc_ifset;		        /* Where it is going */
     };
     '''
-    def set_multicast_route(self, kernel_entry: KernelEntry):
-        source_ip = socket.inet_pton(socket.AF_INET6, kernel_entry.source_ip)
-        sockaddr_in6_source = struct.pack("H H I 16s I", socket.AF_INET6, 0, 0, source_ip, 0)
-        group_ip = socket.inet_pton(socket.AF_INET6, kernel_entry.group_ip)
-        sockaddr_in6_group = struct.pack("H H I 16s I", socket.AF_INET6, 0, 0, group_ip, 0)
-
-        outbound_interfaces = kernel_entry.get_outbound_interfaces_indexes()
-        if len(outbound_interfaces) != 8:
-            raise Exception
-
-        struct_mf6cctl = struct.pack("28s 28s H " + "I" * 8, sockaddr_in6_source, sockaddr_in6_group,
-                                     kernel_entry.inbound_interface_index,
-                                     *outbound_interfaces)
-        self.socket.setsockopt(socket.IPPROTO_IPV6, Kernel6.MRT6_ADD_MFC, struct_mf6cctl)
+    @staticmethod
+    def _sockaddr_in6(ip):
+        return Kernel6.SOCKADDR_IN6.pack(socket.AF_INET6, 0, 0, socket.inet_pton(socket.AF_INET6, ip), 0)
 
-    def set_flood_multicast_route(self, source_ip, group_ip, inbound_interface_index):
-        source_ip = socket.inet_pton(socket.AF_INET6, source_ip)
-        sockaddr_in6_source = struct.pack("H H I 16s I", socket.AF_INET6, 0, 0, source_ip, 0)
-        group_ip = socket.inet_pton(socket.AF_INET6, group_ip)
-        sockaddr_in6_group = struct.pack("H H I 16s I", socket.AF_INET6, 0, 0, group_ip, 0)
+    def _set_multicast_route(self, source_ip, group_ip, inbound_interface_index, outbound_interfaces_mask):
+        outbound_interfaces = [(outbound_interfaces_mask >> (32 * i)) & 0xFFFFFFFF for i in range(Kernel6.IF_SET_WORDS)]
+        struct_mf6cctl = Kernel6.MF6CCTL.pack(self._sockaddr_in6(source_ip), self._sockaddr_in6(group_ip),
+                                              inbound_interface_index, *outbound_interfaces)
+        self.socket.setsockopt(socket.IPPROTO_IPV6, Kernel6.MRT6_ADD_MFC, struct_mf6cctl)
 
-        outbound_interfaces = [255] * 8
+    def _set_flood_multicast_route(self, source_ip, group_ip, inbound_interface_index):
+        outbound_interfaces = [255] * Kernel6.IF_SET_WORDS
         outbound_interfaces[inbound_interface_index // 32] = 0xFFFFFFFF & ~(1 << (inbound_interface_index % 32))
 
-        struct_mf6cctl = struct.pack("28s 28s H " + "I" * 8, sockaddr_in6_source, sockaddr_in6_group,
-                                     inbound_interface_index, *outbound_interfaces)
+        struct_mf6cctl = Kernel6.MF6CCTL.pack(self._sockaddr_in6(source_ip), self._sockaddr_in6(group_ip),
+                                              inbound_interface_index, *outbound_interfaces)
         self.socket.setsockopt(socket.IPPROTO_IPV6, Kernel6.MRT6_ADD_MFC, struct_mf6cctl)
 
-    def _remove_multicast_route(self, kernel_entry):
-        source_ip = socket.inet_pton(socket.AF_INET6, kernel_entry.source_ip)
-        sockaddr_in6_source = struct.pack("H H I 16s I", socket.AF_INET6, 0, 0, source_ip, 0)
-        group_ip = socket.inet_pton(socket.AF_INET6, kernel_entry.group_ip)
-        sockaddr_in6_group = struct.pack("H H I 16s I", socket.AF_INET6, 0, 0, group_ip, 0)
-        outbound_interfaces = [0] * 8
-
-        struct_mf6cctl = struct.pack("28s 28s H " + "I" * 8, sockaddr_in6_source, sockaddr_in6_group, 0,
-                                     *outbound_interfaces)
-        with self.rwlock.genWlock():
-            source_ip = kernel_entry.source_ip
-            group_ip = kernel_entry.group_ip
-
-            if not (source_ip in self.routing and group_ip in self.routing[source_ip]):
-                return
-            try:
-                self.socket.setsockopt(socket.IPPROTO_IPV6, Kernel6.MRT6_DEL_MFC, struct_mf6cctl)
-            except socket.error:
-                pass
-            self.routing[kernel_entry.source_ip].pop(kernel_entry.group_ip)
-            kernel_entry.delete_state()
-            if len(self.routing[source_ip]) == 0:
-                self.routing.pop(source_ip)
-
-            info_about_tree_can_be_removed = True
-            for interface in self.hpim_interface.values():
-                if not info_about_tree_can_be_removed:
-                    break
-                for n in list(interface.neighbors.values()):
-                    (_, neighbor_upstream_state) = n.get_tree_state(tree=(source_ip, group_ip))
-                    if neighbor_upstream_state is not None:
-                        self.create_entry(kernel_entry.source_ip, kernel_entry.group_ip)
-                        info_about_tree_can_be_removed = False
-                        break
+    def _del_multicast_route(self, source_ip, group_ip):
+        struct_mf6cctl = Kernel6.MF6CCTL.pack(self._sockaddr_in6(source_ip), self._sockaddr_in6(group_ip), 0,
+                                              *([0] * Kernel6.IF_SET_WORDS))
+        self.socket.setsockopt(socket.IPPROTO_IPV6, Kernel6.MRT6_DEL_MFC, struct_mf6cctl)
 
-            if info_about_tree_can_be_removed:
-                for interface in self.hpim_interface.values():
-                    interface.remove_tree_state(kernel_entry.source_ip, kernel_entry.group_ip)
+    '''
+    Structure used to get packet counters of a MFC entry
+    struct sioc_sg_req6 {
+        struct sockaddr_in6 src;
+        struct sockaddr_in6 grp;
+        unsigned long pktcnt;
+        unsigned long bytecnt;
+        unsigned long wrong_if;
+    };
+    '''
+    def get_mfc_packet_counters(self, trees):
+        counters = {}
+        if hpim_globals.MULTICAST_TABLE_ID == 0:
+            # read all entries of the default table in a single pass
+            # Group Origin Iif Pkts Bytes Wrong Oifs
+            with open(Kernel6.MFC_CACHE_FILE) as f:
+                next(f, None)
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 4:
+                        continue
+                    group_ip = socket.inet_ntop(socket.AF_INET6, socket.inet_pton(socket.AF_INET6, fields[0]))
+                    source_ip = socket.inet_ntop(socket.AF_INET6, socket.inet_pton(socket.AF_INET6, fields[1]))
+                    counters[(source_ip, group_ip)] = int(fields[3])
+        else:
+            for (source_ip, group_ip) in trees:
+                sioc_sg_req6 = struct.pack("28s 28s LLL", self._sockaddr_in6(source_ip), self._sockaddr_in6(group_ip),
+                                           0, 0, 0)
+                try:
+                    sioc_sg_req6 = fcntl.ioctl(self.socket, Kernel6.SIOCGETSGCNT_IN6, sioc_sg_req6)
+                except OSError:
+                    continue
+                (_, _, packets, _, _) = struct.unpack("28s 28s LLL", sioc_sg_req6)
+                counters[(source_ip, group_ip)] = packets
+        return counters
 
     def exit(self):
         self.running = False
@@ -865,57 +1544,43 @@ class Kernel6(KernelInterface):
         __IP6MRA_CREPORT_MAX
     };
     '''
-    def handler(self):
-        while self.running:
-            try:
-                msg = self.socket.recv(500)
-                if len(msg) < 40:
-                    continue
-                (im6_mbz, im6_msgtype, im6_mif, _, im6_src, im6_dst) = struct.unpack("B B H I 16s 16s", msg[:40])
-                # print((im_msgtype, im_mbz, socket.inet_ntoa(im_src), socket.inet_ntoa(im_dst)))
-
-                if im6_mbz != 0:
-                    continue
-
-                print(im6_mbz)
-                print(im6_msgtype)
-                print(im6_mif)
-                print(socket.inet_ntop(socket.AF_INET6, im6_src))
-                print(socket.inet_ntop(socket.AF_INET6, im6_dst))
-                # print((im_msgtype, im_mbz, socket.inet_ntoa(im_src), socket.inet_ntoa(im_dst)))
-
-                ip_src = socket.inet_ntop(socket.AF_INET6, im6_src)
-                ip_dst = socket.inet_ntop(socket.AF_INET6, im6_dst)
-
-                if im6_msgtype == Kernel6.MRT6MSG_NOCACHE:
-                    print("MRT6 NO CACHE")
-                    self.msg_nocache_handler(ip_src, ip_dst, im6_mif)
-                elif im6_msgtype == Kernel6.MRT6MSG_WRONGMIF:
-                    print("WRONG MIF HANDLER")
-                    self.msg_wrongvif_handler(ip_src, ip_dst, im6_mif)
-                # elif im_msgtype == Kernel.IGMPMSG_WHOLEPKT:
-                #    print("IGMP_WHOLEPKT")
-                #    self.igmpmsg_wholepacket_handler(ip_src, ip_dst)
-                else:
-                    raise Exception
-            except Exception:
-                traceback.print_exc()
-                continue
+    def _parse_upcall(self, msg):
+        if len(msg) < 40:
+            return None
+        (im6_mbz, im6_msgtype, im6_mif, _, im6_src, im6_dst) = struct.unpack("B B H I 16s 16s", msg[:40])
+        if im6_mbz != 0:
+            return None
+        return (im6_msgtype, socket.inet_ntop(socket.AF_INET6, im6_src), socket.inet_ntop(socket.AF_INET6, im6_dst),
+                im6_mif)
+
+    def _handle_upcall(self, msg_type, ip_src, ip_dst, vif_index):
+        if msg_type == Kernel6.MRT6MSG_NOCACHE:
+            self.msg_nocache_handler(ip_src, ip_dst, vif_index)
+        elif msg_type == Kernel6.MRT6MSG_WRONGMIF:
+            self.msg_wrongvif_handler(ip_src, ip_dst, vif_index)
+        # elif msg_type == Kernel.IGMPMSG_WHOLEPKT:
+        #    self.igmpmsg_wholepacket_handler(ip_src, ip_dst)
+        else:
+            raise Exception("Unknown upcall type %d" % msg_type)
 
     # receive multicast (S,G) packet and multicast routing table has no (S,G) entry
     def msg_nocache_handler(self, ip_src, ip_dst, iif):
         (_, _, is_directly_connected, rpf_if) = UnicastRouting.get_unicast_info(ip_src)
 
-        with self.rwlock.genWlock():
-            if ip_src in self.routing and ip_dst in self.routing[ip_src]:
-                self.routing[ip_src][ip_dst].recv_data_msg(iif)
+        with self.rwlock.genRlock(), self.get_tree_lock(ip_src, ip_dst):
+            kernel_entry = self.get_kernel_entry(ip_src, ip_dst)
+            if kernel_entry is not None:
+                # the kernel does not have the MFC entry of this tree... program it again
+                self._forget_multicast_route(ip_src, ip_dst)
+                kernel_entry.change()
+                kernel_entry.recv_data_msg(iif)
             elif is_directly_connected:
                 if hpim_globals.INITIAL_FLOOD_ENABLED:
                     # flood
                     self.set_flood_multicast_route(ip_src, ip_dst, rpf_if)
                 if rpf_if is not None:
                     self.create_entry(ip_src, ip_dst)
-                    self.routing[ip_src][ip_dst].recv_data_msg(iif)
+                    self.get_kernel_entry(ip_src, ip_dst).recv_data_msg(iif)
             elif not is_directly_connected and hpim_globals.INITIAL_FLOOD_ENABLED:
                 # flood
                 self.set_flood_multicast_route(ip_src, ip_dst, rpf_if)
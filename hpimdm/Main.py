@@ -10,6 +10,7 @@ from hpimdm.TestLogger import RootFilter
 
 from hpimdm.tree import hpim_globals
 from hpimdm import UnicastRouting
+from hpimdm.TreeIdRegistry import registry as tree_ids
 
 interfaces = {}  # interfaces with multicast routing protocol enabled
 interfaces_v6 = {}  # hpim ipv6 interfaces
@@ -87,7 +88,6 @@ def list_neighbors(ipv4=False, ipv6=False):
             t.add_row(
                 [interface.interface_name, neighbor.ip, neighbor.neighbor_state.__name__, neighbor.hello_hold_time,
                  neighbor.time_of_boot, neighbor.neighbor_snapshot_sn, time.strftime("%H:%M:%S", time.gmtime(uptime))])
-    print(t)
     return str(t)
 
 
@@ -125,7 +125,6 @@ def list_enabled_interfaces(ipv4=False, ipv6=False):
             t.add_row([interface, ip, enabled, hpim_protection, membership_state])
         except Exception:
             continue
-    print(t)
     return str(t)
 
 
@@ -161,10 +160,8 @@ def list_membership_state(ipv4=True, ipv6=False):
     for (interface_name, interface_obj) in list(membership_interfaces.items()):
         interface_state = interface_obj.interface_state
         state_txt = interface_state.print_state()
-        print(interface_state.group_state.items())
 
         for (group_addr, group_state) in list(interface_state.group_state.items()):
-            print(group_addr)
             group_state_txt = group_state.print_state()
             t.add_row([interface_name, state_txt, group_addr, group_state_txt])
     return str(t)
@@ -249,8 +246,8 @@ def list_sequence_numbers(ipv4=False, ipv6=False):
     for interface in hpim_interfaces.values():
         for neighbor in interface.get_neighbors():
             neighbor_last_sn = neighbor.last_sequence_number.copy()
-            for (tree, last_sn) in neighbor_last_sn.items():
-                t.add_row([neighbor.ip, tree, last_sn])
+            for (tree_id, last_sn) in neighbor_last_sn.items():
+                t.add_row([neighbor.ip, tree_ids.get_tree(tree_id), last_sn])
     table_txt += str(t)
     return str(table_txt)
 
@@ -270,18 +267,51 @@ def list_neighbors_state(ipv4=False, ipv6=False):
     for interface in hpim_interfaces:
         for neighbor in interface.get_neighbors():
             for (tree_id, tree_state) in neighbor.tree_metric_state.copy().items():
-                t.add_row([interface.interface_name, neighbor.ip, tree_id, tree_state])
+                t.add_row([interface.interface_name, neighbor.ip, tree_ids.get_tree(tree_id), tree_state])
     table_txt = "Upstream state:\n" + str(t)
 
     t = PrettyTable(['Interface', 'Neighbor', 'Tree', 'Interest State'])
     for interface in hpim_interfaces:
         for neighbor in interface.get_neighbors():
             for (tree_id, tree_state) in neighbor.tree_interest_state.copy().items():
-                t.add_row([interface.interface_name, neighbor.ip, tree_id, tree_state])
+                t.add_row([interface.interface_name, neighbor.ip, tree_ids.get_tree(tree_id), tree_state])
     table_txt += "\n\n\nInterest state:\n" + str(t)
     return str(table_txt)
 
 
+def list_statistics(ipv4=False, ipv6=False):
+    """
+    List counters of the daemon (caches, kernel interactions, ...)
+    """
+    if not ipv4 and not ipv6:
+        return "Unknown IP family"
+
+    k = kernel if ipv4 else kernel_v6
+    t = PrettyTable(['Statistic', 'Value'])
+    for (statistic, value) in UnicastRouting.UnicastRouting.get_rpf_cache_statistics().items():
+        t.add_row([statistic, value])
+    t.add_row(["Interned tree IDs", len(tree_ids)])
+    if k is None:
+        return str(t)
+    for (statistic, value) in k.get_mfc_statistics().items():
+        t.add_row([statistic, value])
+    for (statistic, value) in k.get_upcall_statistics().items():
+        t.add_row([statistic, value])
+    for (statistic, value) in k.get_recheck_statistics().items():
+        t.add_row([statistic, value])
+    for (statistic, value) in k.get_bundle_statistics().items():
+        t.add_row([statistic, value])
+    for (statistic, value) in k.get_retransmission_statistics().items():
+        t.add_row([statistic, value])
+
+    mfc_table = PrettyTable(['SourceIP', 'GroupIP', 'IIF', 'OIL', 'Kernel Calls', 'Avg Latency (ms)'])
+    for ((source_ip, group_ip), (iif, oil_mask, kernel_calls, latency)) in k.get_mfc_entries_statistics().items():
+        oil = [k.vif_index_to_name_dic.get(i, str(i)) for i in range(oil_mask.bit_length()) if oil_mask & (1 << i)]
+        mfc_table.add_row([source_ip, group_ip, k.vif_index_to_name_dic.get(iif, iif), ", ".join(oil), kernel_calls,
+                           round(latency * 1000, 3)])
+    return str(t) + "\n\n\nProgrammed MFC entries:\n" + str(mfc_table)
+
+
 def list_hash_algorithms():
     """
     List compatible algorithms to be used on HMAC protection
@@ -408,6 +438,15 @@ def set_config(file_path):
         traceback.print_exc()
 
 
+def set_log_levels():
+    """
+    Set log level of the daemon and of each subsystem
+    """
+    logging.getLogger('hpim').setLevel(hpim_globals.LOG_LEVEL)
+    for (subsystem, level) in hpim_globals.LOG_LEVELS.items():
+        logging.getLogger('hpim.' + subsystem).setLevel(level)
+
+
 def drop(interface_name, packet_type):
     interfaces.get(interface_name).drop_packet_type = packet_type
 
@@ -419,7 +458,7 @@ def main():
     # logging
     global logger
     logger = logging.getLogger('hpim')
-    logger.setLevel(logging.DEBUG)
+    set_log_levels()
     handler = logging.StreamHandler(sys.stdout)
     handler.addFilter(RootFilter(""))
     handler.setLevel(logging.DEBUG)
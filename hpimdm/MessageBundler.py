@@ -0,0 +1,90 @@
+from threading import Lock
+from hpimdm.TimerWheel import Timer
+from hpimdm.tree import hpim_globals
+
+
+class MessageBundler(object):
+    """
+    Bundle control messages regarding single trees (IamUpstream, IamNoLongerUpstream, Interest, NoInterest and Ack)
+    that are destined to the same IP
+    Messages are held until their bundle reaches the maximum size of a packet of the interface or MSG_BUNDLE_INTERVAL
+    seconds after the first message was held. Each message keeps its own SN, so the receiver processes each one as if
+    it was received in a separate packet
+    """
+    def __init__(self, interface):
+        self._interface = interface
+        # KEY : destination IP (None for multicast), VALUE : [BootTime, Bundle packet, size of bundle]
+        self._bundles = {}
+        self._max_size = 0
+        self._flush_timer = None
+        self._lock = Lock()
+
+        # counters
+        self.bundles_sent = 0
+        self.bundled_messages = 0
+
+    def add(self, packet, dst=None):
+        """
+        Hold packet (with a single message) in the bundle of dst
+        The bundle is transmitted if packet does not fit in it
+        """
+        msg = packet.payload.payload
+        boot_time = packet.payload.boot_time
+        record_length = self._interface.get_bundle_record_length(msg)
+        to_send = []
+        with self._lock:
+            if not self._bundles:
+                self._max_size = self._interface.get_bundle_max_size()
+                self._flush_timer = Timer(hpim_globals.MSG_BUNDLE_INTERVAL, self.flush)
+                self._flush_timer.start()
+
+            bundle = self._bundles.get(dst, None)
+            if bundle is not None and (bundle[0] != boot_time or bundle[2] + record_length > self._max_size):
+                to_send.append((dst, self._bundles.pop(dst)))
+                bundle = None
+            if bundle is None:
+                bundle = [boot_time, self._interface.create_bundle(), 0]
+                self._bundles[dst] = bundle
+            bundle[1].add_message(msg)
+            bundle[2] += record_length
+
+        self._send(to_send)
+
+    def flush(self):
+        """
+        Transmit all held messages
+        """
+        with self._lock:
+            to_send = list(self._bundles.items())
+            self._bundles.clear()
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        self._send(to_send)
+
+    def _send(self, bundles):
+        """
+        Transmit bundles... a bundle with a single message is transmitted as that message
+        """
+        for (dst, (boot_time, bundle, _)) in bundles:
+            if len(bundle.messages) == 1:
+                packet = self._interface.create_packet(bundle.messages[0], boot_time)
+            else:
+                packet = self._interface.create_packet(bundle, boot_time)
+                self.bundles_sent += 1
+                self.bundled_messages += len(bundle.messages)
+
+            if dst is None:
+                self._interface.send(packet)
+            else:
+                self._interface.send(packet, dst)
+
+    def cancel(self):
+        """
+        Discard all held messages (interface was removed)
+        """
+        with self._lock:
+            self._bundles.clear()
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
@@ -1,21 +1,19 @@
 import time
 import logging
 import ipaddress
-from threading import Timer
+from hpimdm.TimerWheel import Timer
+from hpimdm.TreeIdRegistry import registry as tree_ids
+from hpimdm.SequenceNumberTable import SequenceNumberTable
 
 from hpimdm.utils import TYPE_CHECKING
 from hpimdm.tree.metric import AssertMetric
 from hpimdm.tree import hpim_globals
 from hpimdm.tree.hpim_globals import HELLO_PERIOD
-from hpimdm.packet.Packet import Packet
 if hpim_globals.MSG_FORMAT == "BINARY":
-    from hpimdm.packet.PacketHPIMSync import PacketHPIMSync
-    from hpimdm.packet.PacketHPIMHelloOptions import PacketHPIMHelloHoldtime
-    from hpimdm.packet.PacketHPIMHeader import PacketHPIMHeader
+    from hpimdm.packet.PacketHPIMHelloOptions import PacketHPIMHelloHoldtime, PacketHPIMHelloSyncWindow
 else:
-    from hpimdm.packet.PacketHPIMSync import PacketHPIMSyncJson as PacketHPIMSync
-    from hpimdm.packet.PacketHPIMHelloOptions import PacketHPIMHelloHoldtimeJson as PacketHPIMHelloHoldtime
-    from hpimdm.packet.PacketHPIMHeader import PacketHPIMHeaderJson as PacketHPIMHeader
+    from hpimdm.packet.PacketHPIMHelloOptions import PacketHPIMHelloHoldtimeJson as PacketHPIMHelloHoldtime, \
+        PacketHPIMHelloSyncWindowJson as PacketHPIMHelloSyncWindow
 
 if TYPE_CHECKING:
     from hpimdm.InterfaceHPIM import InterfaceHPIM
@@ -32,24 +30,14 @@ class NeighborState:
         neighbor.start_snapshot()
 
         # Remove all info from neighbor (if already knew it)
-        neighbor.tree_interest_state.clear()
-        neighbor.tree_metric_state.clear()
-        neighbor.last_sequence_number.clear()
+        neighbor.clear_tree_state()
         neighbor.current_sync_sn = 0
         neighbor.neighbor_snapshot_sn = 0
         neighbor.checkpoint_sn = 0
         #
 
-        my_snapshot_mrt = neighbor.my_snapshot_multicast_routing_table[0:neighbor.sync_fragmentation]
-        my_more_bit = len(neighbor.my_snapshot_multicast_routing_table) > 0
-        my_snapshot_sn = neighbor.my_snapshot_sequencer
-
-        pkt_s = PacketHPIMSync(my_snapshot_sn, 0,
-                               sync_sn=neighbor.current_sync_sn, upstream_trees=my_snapshot_mrt,
-                               master_flag=True, more_flag=my_more_bit,
-                               neighbor_boot_time=neighbor.time_of_boot)
-        pkt = Packet(payload=PacketHPIMHeader(pkt_s, neighbor.my_snapshot_boot_time))
-        neighbor.contact_interface.send(pkt, neighbor.ip)
+        neighbor.send_sync_fragment(neighbor.current_sync_sn, master_flag=True, include_holdtime=False)
+        neighbor.sync_next_sn = 1
         neighbor.set_sync_timer()
         neighbor.set_hello_hold_time(DEFAULT_HELLO_HOLD_TIME_DURING_SYNC)
 
@@ -75,12 +63,8 @@ class Synced(NeighborState):
             return
 
         if master_bit and neighbor.my_snapshot_sequencer == my_snapshot_sn:
-            pkt_s = PacketHPIMSync(my_snapshot_sn, neighbor_snapshot_sn, sync_sn=sync_sn,
-                                   master_flag=False, more_flag=False,
-                                   neighbor_boot_time=neighbor.time_of_boot)
-            pkt_s.add_hello_option(PacketHPIMHelloHoldtime(holdtime=4 * HELLO_PERIOD))
-            pkt = Packet(payload=PacketHPIMHeader(pkt_s, neighbor.my_snapshot_boot_time))
-            neighbor.send(pkt)
+            # snapshot was already released... answer with a Sync message without entries
+            neighbor.send_sync_fragment(sync_sn, master_flag=False)
 
 
 class Master(NeighborState):
@@ -95,55 +79,46 @@ class Master(NeighborState):
             Master.new_neighbor_or_adjacency_reset(neighbor)
             return
 
-        if sync_sn != neighbor.current_sync_sn:
+        if not master_bit or not (sync_sn > 0 and neighbor.my_snapshot_sequencer == my_snapshot_sn or sync_sn == 0):
+            return
+
+        if sync_sn < neighbor.current_sync_sn:
+            # neighbor did not receive my Sync message with this SyncSN... retransmit it
+            neighbor.send_sync_fragment(sync_sn, master_flag=False, include_holdtime=False)
+            return
+        elif sync_sn >= neighbor.current_sync_sn + max(1, hpim_globals.SYNC_WINDOW):
             return
 
-        if master_bit and (sync_sn > 0 and neighbor.my_snapshot_sequencer == my_snapshot_sn or sync_sn == 0):
+        # process Sync messages of the neighbor in order
+        neighbor.sync_window_messages[sync_sn] = (tree_state, more_bit, hello_options)
+        answer_sn = sync_sn
+        while neighbor.current_sync_sn in neighbor.sync_window_messages:
+            sync_sn = neighbor.current_sync_sn
+            (tree_state, more_bit, hello_options) = neighbor.sync_window_messages.pop(sync_sn)
             neighbor.install_tree_state(tree_state)
 
-            my_snapshot_mrt = neighbor.my_snapshot_multicast_routing_table[neighbor.current_sync_sn*neighbor.sync_fragmentation:
-                                                                           (neighbor.current_sync_sn+1)*neighbor.sync_fragmentation]
-            my_more_bit = len(neighbor.my_snapshot_multicast_routing_table) > neighbor.current_sync_sn*neighbor.sync_fragmentation
-            my_snapshot_sn = neighbor.my_snapshot_sequencer
-            neighbor_sn = neighbor.neighbor_snapshot_sn
-
-            pkt_s = PacketHPIMSync(my_snapshot_sn, neighbor_sn, sync_sn=neighbor.current_sync_sn,
-                                   upstream_trees=my_snapshot_mrt, master_flag=False, more_flag=my_more_bit,
-                                   neighbor_boot_time=neighbor.time_of_boot)
-            if not my_more_bit:
-                pkt_s.add_hello_option(PacketHPIMHelloHoldtime(holdtime=4 * HELLO_PERIOD))
-            pkt = Packet(payload=PacketHPIMHeader(pkt_s, neighbor.my_snapshot_boot_time))
-            neighbor.send(pkt)
-
-            if sync_sn > 0 and not more_bit and not my_more_bit:
+            if sync_sn > 0 and not more_bit and not neighbor.has_sync_fragment(sync_sn):
                 if "HOLDTIME" in hello_options:
                     neighbor.set_hello_hold_time(hello_options["HOLDTIME"].holdtime)
-                else:
-                    neighbor.set_hello_hold_time(DEFAULT_HELLO_HOLD_TIME_AFTER_SYNC)
-                neighbor.set_sync_state(Synced)
-                neighbor.clear_sync_timer()
-                del neighbor.my_snapshot_multicast_routing_table[:]
-            else:
-                neighbor.set_hello_hold_time(DEFAULT_HELLO_HOLD_TIME_DURING_SYNC)
-                neighbor.set_sync_timer()
-                neighbor.current_sync_sn += 1
+                    neighbor.set_sync_state(Synced)
+                    neighbor.clear_sync_timer()
+                    # only the answer that finishes the synchronization includes the HelloHoldTime... the neighbor
+                    # finishes it after receiving this message (or the answer of Synced state to its retransmission)
+                    neighbor.send_sync_fragment(sync_sn, master_flag=False)
+                    neighbor.clear_snapshot()
+                    return
+                # neighbor sent this message before receiving all my previous Sync messages (pipelined)...
+                # wait for its retransmission in order to finish the synchronization
+                break
+            neighbor.current_sync_sn += 1
+
+        neighbor.send_sync_fragment(answer_sn, master_flag=False, include_holdtime=False)
+        neighbor.set_hello_hold_time(DEFAULT_HELLO_HOLD_TIME_DURING_SYNC)
+        neighbor.set_sync_timer()
 
     @staticmethod
     def sync_timer_expires(neighbor):
-        my_snapshot_mrt = neighbor.my_snapshot_multicast_routing_table[(neighbor.current_sync_sn - 1) * neighbor.sync_fragmentation:
-                                                                       neighbor.current_sync_sn * neighbor.sync_fragmentation]
-        my_more_bit = len(neighbor.my_snapshot_multicast_routing_table) > (neighbor.current_sync_sn - 1) * neighbor.sync_fragmentation
-        my_snapshot_sn = neighbor.my_snapshot_sequencer
-        neighbor_sn = neighbor.neighbor_snapshot_sn
-
-        pkt_s = PacketHPIMSync(my_snapshot_sn, neighbor_sn, sync_sn=neighbor.current_sync_sn - 1,
-                               upstream_trees=my_snapshot_mrt, master_flag=False, more_flag=my_more_bit,
-                               neighbor_boot_time=neighbor.time_of_boot)
-        if not my_more_bit:
-            pkt_s.add_hello_option(PacketHPIMHelloHoldtime(holdtime=4 * HELLO_PERIOD))
-
-        pkt = Packet(payload=PacketHPIMHeader(pkt_s, neighbor.my_snapshot_boot_time))
-        neighbor.send(pkt)
+        neighbor.send_sync_fragment(neighbor.current_sync_sn - 1, master_flag=False, include_holdtime=False)
         neighbor.set_sync_timer()
 
 
@@ -159,10 +134,7 @@ class Slave(NeighborState):
             Slave.new_neighbor_or_adjacency_reset(neighbor)
             return
 
-        if sync_sn != neighbor.current_sync_sn:
-            return
-
-        if sync_sn == 0 and master_bit:
+        if sync_sn == 0 and master_bit and neighbor.current_sync_sn == 0:
             my_ip = ipaddress.ip_address(neighbor.contact_interface.get_ip())
             neighbor_ip = ipaddress.ip_address(neighbor.ip)
             if my_ip < neighbor_ip:
@@ -173,52 +145,49 @@ class Slave(NeighborState):
             else:
                 Slave.sync_timer_expires(neighbor)
         elif not master_bit and neighbor.my_snapshot_sequencer == my_snapshot_sn:
-            my_more_bit = len(neighbor.my_snapshot_multicast_routing_table) > neighbor.current_sync_sn*neighbor.sync_fragmentation
-
-            if sync_sn > 0 and not my_more_bit and not more_bit:
-                if "HOLDTIME" in hello_options:
-                    neighbor.set_hello_hold_time(hello_options["HOLDTIME"].holdtime)
-                else:
-                    neighbor.set_hello_hold_time(DEFAULT_HELLO_HOLD_TIME_AFTER_SYNC)
-                neighbor.set_sync_state(Synced)
-                neighbor.clear_sync_timer()
-                del neighbor.my_snapshot_multicast_routing_table[:]
-            else:
-                neighbor.set_hello_hold_time(DEFAULT_HELLO_HOLD_TIME_DURING_SYNC)
+            if sync_sn < neighbor.current_sync_sn or sync_sn >= neighbor.sync_next_sn or \
+                    sync_sn in neighbor.sync_window_messages:
+                # retransmission of an answer that was already received... the synchronization did not make progress
+                # (do not postpone the retransmission of my Sync messages that were not answered)
+                return
+
+            # process answers of the neighbor in order
+            neighbor.sync_window_messages[sync_sn] = (tree_state, more_bit, hello_options)
+            while neighbor.current_sync_sn in neighbor.sync_window_messages:
+                sync_sn = neighbor.current_sync_sn
+                (tree_state, more_bit, hello_options) = neighbor.sync_window_messages.pop(sync_sn)
+
+                if sync_sn > 0 and not more_bit and not neighbor.has_sync_fragment(sync_sn):
+                    if "HOLDTIME" in hello_options:
+                        # neighbor answered my Sync message that includes the HelloHoldTime (it finished the
+                        # synchronization)
+                        neighbor.set_hello_hold_time(hello_options["HOLDTIME"].holdtime)
+                        neighbor.set_sync_state(Synced)
+                        neighbor.clear_sync_timer()
+                        neighbor.clear_snapshot()
+                        return
+                    if neighbor.sync_in_order_sn != sync_sn:
+                        # my Sync message was pipelined... retransmit it in order to let the neighbor finish the
+                        # synchronization
+                        neighbor.send_sync_request(sync_sn)
+                        neighbor.set_sync_timer()
+                    # otherwise wait for the answer to my Sync message that includes the HelloHoldTime
+                    return
                 neighbor.current_sync_sn += 1
                 neighbor.install_tree_state(tree_state)
 
-                my_snapshot_mrt = neighbor.my_snapshot_multicast_routing_table[neighbor.current_sync_sn*neighbor.sync_fragmentation:
-                                                                               (neighbor.current_sync_sn+1)*neighbor.sync_fragmentation]
-                my_more_bit = len(neighbor.my_snapshot_multicast_routing_table) > neighbor.current_sync_sn*neighbor.sync_fragmentation
-                my_snapshot_sn = neighbor.my_snapshot_sequencer
-                neighbor_sn = neighbor.neighbor_snapshot_sn
-
-                pkt_s = PacketHPIMSync(my_snapshot_sn, neighbor_sn, sync_sn=neighbor.current_sync_sn,
-                                       upstream_trees=my_snapshot_mrt, master_flag=True, more_flag=my_more_bit,
-                                       neighbor_boot_time=neighbor.time_of_boot)
-                if not my_more_bit:
-                    pkt_s.add_hello_option(PacketHPIMHelloHoldtime(holdtime=4 * HELLO_PERIOD))
-                pkt = Packet(payload=PacketHPIMHeader(pkt_s, neighbor.my_snapshot_boot_time))
-                neighbor.send(pkt)
-                neighbor.set_sync_timer()
+            neighbor.set_hello_hold_time(DEFAULT_HELLO_HOLD_TIME_DURING_SYNC)
+            window = neighbor.get_sync_window()
+            while neighbor.sync_next_sn < neighbor.current_sync_sn + window:
+                neighbor.send_sync_request(neighbor.sync_next_sn)
+            neighbor.set_sync_timer()
 
     @staticmethod
     def sync_timer_expires(neighbor):
-        my_snapshot_mrt = neighbor.my_snapshot_multicast_routing_table[neighbor.current_sync_sn * neighbor.sync_fragmentation:
-                                                                       (neighbor.current_sync_sn + 1) * neighbor.sync_fragmentation]
-        my_more_bit = len(neighbor.my_snapshot_multicast_routing_table) > neighbor.current_sync_sn * neighbor.sync_fragmentation
-        my_snapshot_sn = neighbor.my_snapshot_sequencer
-        neighbor_sn = neighbor.neighbor_snapshot_sn
-
-        pkt_s = PacketHPIMSync(my_snapshot_sn, neighbor_sn, sync_sn=neighbor.current_sync_sn,
-                               upstream_trees=my_snapshot_mrt, master_flag=True, more_flag=my_more_bit,
-                               neighbor_boot_time=neighbor.time_of_boot)
-        if not my_more_bit:
-            pkt_s.add_hello_option(PacketHPIMHelloHoldtime(holdtime=4 * HELLO_PERIOD))
-
-        pkt = Packet(payload=PacketHPIMHeader(pkt_s, neighbor.my_snapshot_boot_time))
-        neighbor.send(pkt)
+        # retransmit all Sync messages that were not answered
+        for sync_sn in range(neighbor.current_sync_sn, max(neighbor.sync_next_sn, neighbor.current_sync_sn + 1)):
+            if sync_sn not in neighbor.sync_window_messages:
+                neighbor.send_sync_request(sync_sn)
         neighbor.set_sync_timer()
 
 
@@ -232,9 +201,7 @@ class Unknown(NeighborState):
             neighbor.start_snapshot()
 
             # Remove all info from neighbor (if already knew it)
-            neighbor.tree_interest_state.clear()
-            neighbor.tree_metric_state.clear()
-            neighbor.last_sequence_number.clear()
+            neighbor.clear_tree_state()
             neighbor.current_sync_sn = 0
             neighbor.neighbor_snapshot_sn = 0
             neighbor.checkpoint_sn = 0
@@ -268,18 +235,42 @@ class Neighbor:
 
         self.current_sync_sn = 0
         self.sync_fragmentation = 0
-
-        # Tree Database storage
+        # Number of Sync messages that the neighbor node accepts before answering them (advertised in its SyncWindow
+        # option... 1 if the neighbor only supports the lock-step exchange)
+        self.sync_window = 1
+        # Neighbor node advertised the Bundle option (able to receive Bundle messages)
+        self.supports_bundles = False
+        # Neighbor node advertised the MultiAck option (able to receive MultiAck messages)
+        self.supports_multi_ack = False
+        # Sync messages of the neighbor received ahead of current_sync_sn (processed in order)
+        # KEY : SyncSN, VALUE : (tree_state, more_flag, hello_options)
+        self.sync_window_messages = {}
+        # Slave: SyncSN of the next Sync message to be transmitted and SyncSN of the last Sync message that was
+        # transmitted after receiving all previous Sync messages of the neighbor
+        self.sync_next_sn = 0
+        self.sync_in_order_sn = None
+
+        # Tree Database storage (keyed by tree_id of TreeIdRegistry)
         self.tree_interest_state = {}
         self.tree_metric_state = {}
+        # State of trees is included in the TreeStateIndex of the interface (only while the neighbor is Synced)
+        self.tree_state_indexed = False
 
         # Control if received control packets should be processed
         # Used to detect msg retransmissions and out of order reception
-        self.last_sequence_number = {}
+        # (ordered by SN in order to purge entries covered by the CheckpointSN)
+        self.last_sequence_number = SequenceNumberTable()
+
+        # Acks to be transmitted to the neighbor in a single MultiAck message when the ack timer expires
+        # KEY : (source, group), VALUE : SN
+        self.pending_acks = {}
+        # (MyBootTime, NeighborBootTime, NeighborSnapshotSN, MySnapshotSN) of all pending acks
+        self.pending_acks_snapshot = None
+        self.ack_timer = None
 
         self.sync_timer = None
         self.neighbor_state = Unknown
-        self.neighbor_logger.debug('Neighbor state of ' + self.ip + ' transitions to ' + self.neighbor_state.__name__)
+        self.neighbor_logger.debug('Neighbor state of %s transitions to %s', self.ip, self.neighbor_state.__name__)
 
         # checkpoint sn
         self.checkpoint_sn = 0
@@ -287,7 +278,12 @@ class Neighbor:
         # Information of my snapshot
         self.my_snapshot_boot_time = my_interface_boot_time
         self.my_snapshot_sequencer = 0
-        self.my_snapshot_multicast_routing_table = []
+        # My snapshot (SyncSnapshot shared with other neighbors that started a synchronization with the same SnapshotSN)
+        self.my_snapshot = None
+        self.my_snapshot_length = 0
+        # Last transmitted Sync message (retransmissions resend the same bytes)
+        # (key that identifies the content of the message, bytes)
+        self.last_sync_msg = None
 
     ######################################################################
     # Sync Timer
@@ -316,6 +312,36 @@ class Neighbor:
         """
         self.neighbor_state.sync_timer_expires(self)
 
+    ######################################################################
+    # Ack Timer
+    ######################################################################
+    def set_ack_timer(self):
+        """
+        Set Ack timer... pending acks are transmitted to the neighbor when it expires
+        """
+        self.clear_ack_timer()
+        self.ack_timer = Timer(hpim_globals.ACK_DELAY, self.ack_timeout)
+        self.ack_timer.start()
+
+    def clear_ack_timer(self):
+        """
+        Cancel Ack timer
+        """
+        if self.ack_timer is not None:
+            self.ack_timer.cancel()
+            self.ack_timer = None
+
+    ###########################################
+    # Ack Timer timeout
+    ###########################################
+    def ack_timeout(self):
+        """
+        Expiration of Ack timer (transmit all pending acks)
+        """
+        with self.contact_interface.neighbors_lock:
+            self.ack_timer = None
+            self.send_pending_acks()
+
     ######################################################################
     # Neighbor Liveness Timer
     ######################################################################
@@ -341,9 +367,11 @@ class Neighbor:
         Remove neighbor node because neighbor liveness timer expired
         """
         with self.contact_interface.neighbors_lock:
-            print('HELLO TIMER EXPIRED... remove neighbor')
+            self.neighbor_logger.debug('Neighbor liveness timer of %s expired', self.ip)
+            # state of a neighbor that is not Synced is not interpreted... its removal does not change any tree
+            known_trees = self.get_known_trees() if self.neighbor_state == Synced else None
             self.remove_neighbor_state()
-            self.contact_interface.remove_neighbor(self.ip)
+            self.contact_interface.remove_neighbor(self.ip, known_trees)
 
     ############################################
     # Sync State
@@ -356,13 +384,17 @@ class Neighbor:
             return
 
         self.neighbor_state = state
-        self.neighbor_logger.debug('Neighbor state of ' + self.ip + ' transitions to ' + state.__name__ +
-                                   ' with MyBootTime=' + str(self.my_snapshot_boot_time) +
-                                   '; MySnapshotSN=' + str(self.my_snapshot_sequencer) +
-                                   '; NeighborBootTime=' + str(self.time_of_boot) +
-                                   '; NeighborSnapshotSN=' + str(self.neighbor_snapshot_sn))
         if state == Synced:
-            self.contact_interface.get_kernel().recheck_all_trees(self.contact_interface.vif_index)
+            self.add_to_tree_state_index()
+        else:
+            self.remove_from_tree_state_index()
+        self.neighbor_logger.debug('Neighbor state of %s transitions to %s with MyBootTime=%s; MySnapshotSN=%s; '
+                                   'NeighborBootTime=%s; NeighborSnapshotSN=%s', self.ip, state.__name__,
+                                   self.my_snapshot_boot_time, self.my_snapshot_sequencer, self.time_of_boot,
+                                   self.neighbor_snapshot_sn)
+        if state == Synced:
+            self.contact_interface.get_kernel().recheck_neighbor_trees(self.contact_interface.vif_index,
+                                                                       self.get_known_trees())
 
     def install_tree_state(self, tree_state: list):
         """
@@ -371,18 +403,46 @@ class Neighbor:
         trees included in Sync message have state fresher than the one that is already stored (in a non-Sync message)
         """
         for t in tree_state:
-            tree_id = (t.source, t.group)
-            if self.last_sequence_number.get(tree_id, 0) > self.neighbor_snapshot_sn:
-                continue
+            tree_id = tree_ids.acquire(t.source, t.group)
+            if self.last_sequence_number.get(tree_id, 0) <= self.neighbor_snapshot_sn:
+                metric = AssertMetric(metric_preference=t.metric_preference, route_metric=t.metric, ip_address=self.ip)
+                self._update_tree_state_index(tree_id, metric)
+                self._set_tree_entry(self.tree_metric_state, tree_id, metric)
+            tree_ids.release(tree_id)
+
+    def set_interest_state(self, tree_id, interest_state):
+        """
+        Store Interest state of the neighbor node regarding a tree (the neighbor is no longer Upstream)
+        Return True if the neighbor node was previously considered Upstream
+        """
+        was_upstream = tree_id in self.tree_metric_state
+        self._update_tree_state_index(tree_id, interest_state)
+        self._set_tree_entry(self.tree_interest_state, tree_id, interest_state)
+        self._pop_tree_entry(self.tree_metric_state, tree_id)
+        return was_upstream
+
+    def set_upstream_state(self, tree_id, metric):
+        """
+        Store Upstream state (RPC) of the neighbor node regarding a tree
+        """
+        self._update_tree_state_index(tree_id, metric)
+        self._pop_tree_entry(self.tree_interest_state, tree_id)
+        self._set_tree_entry(self.tree_metric_state, tree_id, metric)
 
-            self.tree_metric_state[tree_id] = AssertMetric(metric_preference=t.metric_preference,
-                                                           route_metric=t.metric, ip_address=self.ip)
+    def remove_upstream_state(self, tree_id):
+        """
+        Neighbor node is no longer Upstream regarding a tree
+        """
+        self._update_tree_state_index(tree_id, None)
+        self._pop_tree_entry(self.tree_interest_state, tree_id)
+        self._pop_tree_entry(self.tree_metric_state, tree_id)
 
-    def remove_tree_state(self, source, group):
+    def remove_tree_state(self, tree_id):
         """
         Remove all stored state of the neighbor node regarding trees in Unknown state
         """
-        self.tree_interest_state.pop((source, group), None)
+        self._update_tree_state_index(tree_id, self.tree_metric_state.get(tree_id, None))
+        self._pop_tree_entry(self.tree_interest_state, tree_id)
 
     def get_known_trees(self):
         """
@@ -390,7 +450,82 @@ class Neighbor:
         """
         a = set(self.tree_metric_state.keys())
         b = set(self.tree_interest_state.keys())
-        return a.union(b)
+        return {tree_ids.get_tree(tree_id) for tree_id in a.union(b)}
+
+    def clear_tree_state(self):
+        """
+        Remove all stored state regarding trees
+        """
+        if self.tree_state_indexed:
+            for (tree_id, state) in self._get_tree_entries_state():
+                self.contact_interface.tree_state_index.update(tree_id, self.ip, state, None)
+        for table in (self.tree_interest_state, self.tree_metric_state, self.last_sequence_number):
+            for tree_id in table:
+                tree_ids.release(tree_id)
+            table.clear()
+
+    def _get_tree_entry_state(self, tree_id):
+        """
+        Get stored state regarding tree_id: AssertMetric if the neighbor node is Upstream, otherwise its Interest state
+        (None if no state is stored)
+        """
+        metric = self.tree_metric_state.get(tree_id, None)
+        if metric is not None:
+            return metric
+        return self.tree_interest_state.get(tree_id, None)
+
+    def _get_tree_entries_state(self):
+        """
+        Get (tree_id, state) of all trees with stored state
+        """
+        tree_states = list(self.tree_metric_state.items())
+        tree_states.extend((tree_id, interest_state) for (tree_id, interest_state) in self.tree_interest_state.items()
+                           if tree_id not in self.tree_metric_state)
+        return tree_states
+
+    def _update_tree_state_index(self, tree_id, new_state):
+        """
+        Stored state regarding tree_id will change to new_state... update aggregated state of the interface (if Synced)
+        Must be called before changing per-tree tables (while tree_id is still referenced by them)
+        """
+        if self.tree_state_indexed:
+            self.contact_interface.tree_state_index.update(tree_id, self.ip, self._get_tree_entry_state(tree_id),
+                                                           new_state)
+
+    def add_to_tree_state_index(self):
+        """
+        Neighbor node became Synced... include all its stored state in the aggregated state of the interface
+        """
+        if not self.tree_state_indexed:
+            self.contact_interface.tree_state_index.add_neighbor(self.ip, self._get_tree_entries_state())
+            self.tree_state_indexed = True
+
+    def remove_from_tree_state_index(self):
+        """
+        Neighbor node is no longer Synced (or was removed)... exclude all its stored state from the aggregated state of
+        the interface
+        """
+        if self.tree_state_indexed:
+            self.contact_interface.tree_state_index.remove_neighbor(self.ip, self._get_tree_entries_state())
+            self.tree_state_indexed = False
+
+    @staticmethod
+    def _set_tree_entry(table, tree_id, value):
+        """
+        Store value of tree_id in a per-tree table (each entry holds a reference to tree_id)
+        """
+        if tree_id not in table:
+            tree_ids.hold(tree_id)
+        table[tree_id] = value
+
+    @staticmethod
+    def _pop_tree_entry(table, tree_id):
+        """
+        Remove tree_id from a per-tree table (and release the reference held by its entry)
+        """
+        if tree_id in table:
+            del table[tree_id]
+            tree_ids.release(tree_id)
 
     ######################################################################
     # Send Messages
@@ -404,10 +539,14 @@ class Neighbor:
     ######################################################################
     # Receive Messages
     ######################################################################
-    def recv_hello(self, boot_time, holdtime, checkpoint_sn):
+    def recv_hello(self, boot_time, holdtime, checkpoint_sn, sync_window=1, supports_bundles=False,
+                   supports_multi_ack=False):
         """
         Process a received Hello message from this neighbor node
         """
+        self.sync_window = sync_window
+        self.supports_bundles = supports_bundles
+        self.supports_multi_ack = supports_multi_ack
         if boot_time < self.time_of_boot:
             return
         elif boot_time > self.time_of_boot:
@@ -435,9 +574,11 @@ class Neighbor:
             self.neighbor_state.new_neighbor_or_adjacency_reset(self)
             return
 
+        if "SYNC_WINDOW" in hello_options:
+            self.sync_window = hello_options["SYNC_WINDOW"].sync_window
         self.neighbor_state.recv_sync(self, upstream_trees, my_sn, neighbor_sn, sync_sn, master_flag, more_flag, hello_options)
 
-    def recv_reliable_packet(self, sn, tree, boot_time):
+    def recv_reliable_packet(self, sn, tree_id, boot_time):
         """
         Decide if a packet received from this neighbor should be processed
         """
@@ -454,33 +595,79 @@ class Neighbor:
             # correct <NeighborBootTime; NeighborSnapshotSN> pair
             return False
 
-        last_received_sn = self.last_sequence_number.get(tree, 0)
+        last_received_sn = self.last_sequence_number.get(tree_id, 0)
+        tree = tree_ids.get_tree(tree_id)
 
         if sn <= self.neighbor_snapshot_sn or sn <= self.checkpoint_sn:
             # dont deliver to application
-            print("RCVD ", sn)
-            print("NSSN ", self.neighbor_snapshot_sn)
+            self.neighbor_logger.debug('Ignored SN %d of %s (NeighborSnapshotSN=%d; CheckpointSN=%d)', sn, tree,
+                                       self.neighbor_snapshot_sn, self.checkpoint_sn)
             return False
         elif sn >= last_received_sn:
-            (source, group) = tree
-            packet = self.contact_interface.create_ack_msg(my_boot_time=self.contact_interface.time_of_boot, sn=sn,
-                                                           source=source, group=group,
-                                                           neighbor_boot_time=boot_time,
-                                                           neighbor_snapshot_sn=self.neighbor_snapshot_sn,
-                                                           my_snapshot_sn=self.my_snapshot_sequencer)
-            self.contact_interface.send(packet, self.ip)
+            if hpim_globals.ACK_DELAY > 0 and self.supports_multi_ack:
+                self.add_pending_ack(tree, sn, boot_time)
+            else:
+                (source, group) = tree
+                packet = self.contact_interface.create_ack_msg(my_boot_time=self.contact_interface.time_of_boot,
+                                                               sn=sn, source=source, group=group,
+                                                               neighbor_boot_time=boot_time,
+                                                               neighbor_snapshot_sn=self.neighbor_snapshot_sn,
+                                                               my_snapshot_sn=self.my_snapshot_sequencer)
+                self.contact_interface.send_tree_msg(packet, self.ip)
 
             if sn > last_received_sn:
                 # update most recent sn received from this neighbor
-                self.last_sequence_number[tree] = sn
+                self._set_tree_entry(self.last_sequence_number, tree_id, sn)
 
                 # deliver to application
                 return True
         # dont deliver to application
-        print("RCVD ", sn)
-        print("LAST TREE SN ", last_received_sn)
+        self.neighbor_logger.debug('Ignored SN %d of %s (last SN of tree=%d)', sn, tree, last_received_sn)
         return False
 
+    def add_pending_ack(self, tree, sn, boot_time):
+        """
+        Acknowledge SN of tree in the next MultiAck message transmitted to this neighbor
+        Pending acks are transmitted if they regard a different snapshot or if the MultiAck message is full
+        """
+        snapshot = (self.contact_interface.time_of_boot, boot_time, self.neighbor_snapshot_sn,
+                    self.my_snapshot_sequencer)
+        if self.pending_acks and (self.pending_acks_snapshot != snapshot or tree not in self.pending_acks and
+                                  len(self.pending_acks) >= self.contact_interface.get_multi_ack_max_entries()):
+            self.send_pending_acks()
+
+        self.pending_acks_snapshot = snapshot
+        self.pending_acks[tree] = sn
+        if self.ack_timer is None:
+            self.set_ack_timer()
+
+    def send_pending_acks(self):
+        """
+        Transmit all pending acks to this neighbor... in a single MultiAck message or in an Ack message if there is
+        only one pending ack
+        """
+        self.clear_ack_timer()
+        if not self.pending_acks:
+            return
+
+        (my_boot_time, neighbor_boot_time, neighbor_snapshot_sn, my_snapshot_sn) = self.pending_acks_snapshot
+        if len(self.pending_acks) == 1:
+            ((source, group), sn) = self.pending_acks.popitem()
+            packet = self.contact_interface.create_ack_msg(my_boot_time=my_boot_time, sn=sn, source=source,
+                                                           group=group, neighbor_boot_time=neighbor_boot_time,
+                                                           neighbor_snapshot_sn=neighbor_snapshot_sn,
+                                                           my_snapshot_sn=my_snapshot_sn)
+            self.contact_interface.send_tree_msg(packet, self.ip)
+            return
+
+        entries = [(source, group, sn) for ((source, group), sn) in self.pending_acks.items()]
+        self.pending_acks.clear()
+        packet = self.contact_interface.create_multi_ack_msg(my_boot_time=my_boot_time,
+                                                             neighbor_boot_time=neighbor_boot_time,
+                                                             neighbor_snapshot_sn=neighbor_snapshot_sn,
+                                                             my_snapshot_sn=my_snapshot_sn, entries=entries)
+        self.contact_interface.send(packet, self.ip)
+
     def recv_ack(self, my_boot_time, neighbor_boot_time, my_snapshot_sn, neighbor_snapshot):
         """
         Decide if a received Ack should be processed... this decision is based on the SNs obtained during the Sync
@@ -509,9 +696,8 @@ class Neighbor:
         if checkpoint_sn > self.checkpoint_sn:
             self.checkpoint_sn = checkpoint_sn
 
-            to_remove = {k for k, v in self.last_sequence_number.items() if v <= checkpoint_sn}
-            for k in to_remove:
-                self.last_sequence_number.pop(k)
+            for tree_id in self.last_sequence_number.pop_lower_or_equal(checkpoint_sn):
+                tree_ids.release(tree_id)
 
     #######################################################
     # Synchronization methods for starting it
@@ -526,35 +712,99 @@ class Neighbor:
         """
         Create my own snapshot and set my SNs (my BootTime and MySnapshotSN)
         """
-        (my_snapshot_bt, my_snapshot_sn, my_snapshot_mrt) = self.contact_interface.snapshot_multicast_routing_table()
-        self.my_snapshot_boot_time = my_snapshot_bt
-        self.my_snapshot_sequencer = my_snapshot_sn
-        self.my_snapshot_multicast_routing_table = list(my_snapshot_mrt.values())
-        self.sync_fragmentation = hpim_globals.SYNC_FRAGMENTATION_MSG
-        if self.sync_fragmentation == 0:
-            sync_entry_len = len(self.contact_interface.create_sync_entry_hdr("", "", 0, 0))
-            self.sync_fragmentation = (self.contact_interface.get_mtu() - self.contact_interface.get_ip_header_length()
-                                       - 8 - self.contact_interface.security_len - 16) // sync_entry_len
-        self.contact_interface.neighbor_start_synchronization(self.ip, my_snapshot_bt, my_snapshot_sn)
+        snapshot = self.contact_interface.get_sync_snapshot()
+        self.my_snapshot = snapshot
+        self.my_snapshot_boot_time = snapshot.boot_time
+        self.my_snapshot_sequencer = snapshot.snapshot_sn
+        self.my_snapshot_length = snapshot.length
+        self.sync_fragmentation = snapshot.fragmentation
+        self.last_sync_msg = None
+        self.sync_window_messages = {}
+        self.sync_next_sn = 0
+        self.sync_in_order_sn = None
+        self.contact_interface.neighbor_start_synchronization(self.ip, snapshot.boot_time, snapshot.snapshot_sn)
+
+    def clear_snapshot(self):
+        """
+        Synchronization finished... release my snapshot (possibly shared with other neighbors)
+        """
+        self.my_snapshot = None
+        self.my_snapshot_length = 0
+        self.last_sync_msg = None
+        self.sync_window_messages = {}
+
+    def get_sync_window(self):
+        """
+        Number of Sync messages that can be transmitted to this neighbor without being answered
+        (1 if one of the nodes does not advertise a window... lock-step exchange)
+        """
+        return max(1, min(hpim_globals.SYNC_WINDOW, self.sync_window))
+
+    def has_sync_fragment(self, sync_sn):
+        """
+        Verify if my Sync message with SyncSN sync_sn carries entries of my snapshot (More flag)
+        """
+        return self.my_snapshot_length > sync_sn * self.sync_fragmentation
+
+    def send_sync_fragment(self, sync_sn, master_flag, include_holdtime=True):
+        """
+        Send Sync message with SyncSN sync_sn, carrying the corresponding fragment of my snapshot
+        The fragment is a slice of the already encoded entries and a retransmission of the same message resends
+        the bytes that were previously transmitted
+        Return True if the message has the More flag set
+        """
+        start = sync_sn * self.sync_fragmentation
+        more_flag = self.has_sync_fragment(sync_sn)
+        interface = self.contact_interface
+        key = (self.my_snapshot_boot_time, self.my_snapshot_sequencer, self.neighbor_snapshot_sn, self.time_of_boot,
+               sync_sn, master_flag, include_holdtime, interface.security_id, interface.get_security_key())
+        if self.last_sync_msg is None or self.last_sync_msg[0] != key:
+            upstream_trees = []
+            if more_flag:
+                upstream_trees = interface.get_sync_entries_fragment(self.my_snapshot.entries, start,
+                                                                     start + self.sync_fragmentation)
+            pkt = interface.create_sync_msg(self.my_snapshot_boot_time, self.my_snapshot_sequencer,
+                                            self.neighbor_snapshot_sn, sync_sn, upstream_trees,
+                                            master_flag=master_flag, more_flag=more_flag,
+                                            neighbor_boot_time=self.time_of_boot)
+            if not more_flag and include_holdtime:
+                pkt.payload.payload.add_hello_option(PacketHPIMHelloHoldtime(holdtime=4 * HELLO_PERIOD))
+            if not more_flag and hpim_globals.SYNC_WINDOW > 1:
+                pkt.payload.payload.add_hello_option(PacketHPIMHelloSyncWindow(hpim_globals.SYNC_WINDOW))
+            self.last_sync_msg = (key, interface.encode(pkt, self.ip))
+        interface.send_bytes(self.last_sync_msg[1], self.ip)
+        return more_flag
+
+    def send_sync_request(self, sync_sn):
+        """
+        Slave: send Sync message with SyncSN sync_sn (Master flag set)
+        A Sync message without entries only includes the HelloHoldTime if all previous Sync messages of the neighbor
+        were received... only this message allows the neighbor to finish the synchronization. Sync messages
+        pipelined ahead of the answers of the neighbor never include it
+        """
+        in_order = sync_sn == self.current_sync_sn
+        if in_order:
+            self.sync_in_order_sn = sync_sn
+        self.send_sync_fragment(sync_sn, master_flag=True, include_holdtime=in_order)
+        self.sync_next_sn = max(self.sync_next_sn, sync_sn + 1)
 
     #################################################################
     # Obtain Upstream and Interest information regarding a neighbor
     #################################################################
-    def get_tree_state(self, tree):
+    def get_tree_state(self, tree_id):
         """
         Obtain Upstream and Interest state regarding neighbor node... This information is obtained based on previous
         messages received from this neighbor node that were stored in the neighbor structure
+        (tree_id is None if no table references the tree)
         """
         if self.neighbor_state != Synced:
             # do not interpret stored state if not Synced
             return (False, None)
         else:
-            upstream_state = self.tree_metric_state.get(tree, None)
+            upstream_state = self.tree_metric_state.get(tree_id, None)
             interest_state = False
             if upstream_state is None:
-                interest_state = self.tree_interest_state.get(tree, hpim_globals.INITIAL_FLOOD_ENABLED)
-            print("INTEREST NEIGHBOR ", self.ip, ":", interest_state)
-            print("UPSTREAM NEIGHBOR ", self.ip, ":", upstream_state)
+                interest_state = self.tree_interest_state.get(tree_id, hpim_globals.INITIAL_FLOOD_ENABLED)
             return (interest_state, upstream_state)
 
     #######################################
@@ -564,13 +814,14 @@ class Neighbor:
         """
         Clear all information regarding neighbor node
         """
-        self.neighbor_logger.debug('Removing neighbor ' + self.ip)
+        self.neighbor_logger.debug('Removing neighbor %s', self.ip)
         if self.neighbor_liveness_timer is not None:
             self.neighbor_liveness_timer.cancel()
 
         self.clear_sync_timer()
+        self.clear_ack_timer()
+        self.pending_acks.clear()
 
-        self.tree_interest_state.clear()
-        self.tree_metric_state.clear()
-        self.last_sequence_number.clear()
-        del self.my_snapshot_multicast_routing_table[:]
+        self.remove_from_tree_state_index()
+        self.clear_tree_state()
+        self.clear_snapshot()
@@ -0,0 +1,56 @@
+import heapq
+from threading import Lock
+
+
+class OutstandingSequenceNumbers(object):
+    """
+    (BootTime, SN) of all control messages of an interface that are being reliably transmitted (not acknowledged by
+    all neighbors yet)
+    Kept in a min-heap with lazy deletion... messages are added when they are transmitted and removed when they stop
+    being monitored (acknowledged, cancelled or replaced by a newer message of the same tree). The oldest outstanding
+    message, used to calculate the CheckpointSN, is obtained without iterating over all trees
+    """
+    def __init__(self):
+        self._heap = []
+        # (BootTime, SN) of messages that are still outstanding (heap entries not in this set were removed)
+        self._outstanding = set()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._outstanding)
+
+    def add(self, boot_time, sn):
+        """
+        Message with (boot_time, sn) started being reliably transmitted
+        """
+        entry = (boot_time, sn)
+        with self._lock:
+            if entry not in self._outstanding:
+                self._outstanding.add(entry)
+                heapq.heappush(self._heap, entry)
+
+    def remove(self, boot_time, sn):
+        """
+        Message with (boot_time, sn) stopped being reliably transmitted
+        """
+        with self._lock:
+            self._outstanding.discard((boot_time, sn))
+            if len(self._heap) > 2 * len(self._outstanding) + 64:
+                # too many removed entries
+                self._heap = list(self._outstanding)
+                heapq.heapify(self._heap)
+
+    def get_oldest(self):
+        """
+        Get (BootTime, SN) of the oldest outstanding message (None if there are no outstanding messages)
+        """
+        with self._lock:
+            heap = self._heap
+            while heap and heap[0] not in self._outstanding:
+                heapq.heappop(heap)
+            return heap[0] if heap else None
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+            self._outstanding.clear()
@@ -0,0 +1,158 @@
+class PrefixTrieNode(object):
+    __slots__ = ('prefix', 'length', 'value', 'has_value', 'children')
+
+    def __init__(self, prefix, length):
+        self.prefix = prefix
+        self.length = length
+        self.value = None
+        self.has_value = False
+        self.children = [None, None]
+
+
+class PrefixTrie(object):
+    """
+    Path-compressed binary (Patricia) trie of IP prefixes
+    Prefixes and addresses are integers with width bits (32 for IPv4 and 128 for IPv6)
+    Insertion, removal and longest prefix match walk at most width bits
+    """
+    def __init__(self, width):
+        self._width = width
+        self._root = PrefixTrieNode(0, 0)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _mask(self, prefix, length):
+        """
+        Clear all bits of prefix after the first length bits
+        """
+        if length == 0:
+            return 0
+        shift = self._width - length
+        return (prefix >> shift) << shift
+
+    def _bit(self, prefix, position):
+        """
+        Get bit of prefix at position (position 0 is the most significant bit)
+        """
+        return (prefix >> (self._width - 1 - position)) & 1
+
+    def _common_length(self, prefix_a, prefix_b, max_length):
+        """
+        Number of leading bits shared by both prefixes (limited by max_length)
+        """
+        diff = prefix_a ^ prefix_b
+        if diff == 0:
+            return max_length
+        return min(self._width - diff.bit_length(), max_length)
+
+    def insert(self, prefix, length, value):
+        """
+        Add prefix/length to the trie (or replace its value if already present)
+        """
+        prefix = self._mask(prefix, length)
+        node = self._root
+        while node.length != length:
+            bit = self._bit(prefix, node.length)
+            child = node.children[bit]
+            if child is None:
+                child = PrefixTrieNode(prefix, length)
+                node.children[bit] = child
+                node = child
+                break
+
+            common = self._common_length(child.prefix, prefix, min(child.length, length))
+            if common == child.length:
+                node = child
+                continue
+
+            # split edge between node and child
+            intermediate = PrefixTrieNode(self._mask(prefix, common), common)
+            intermediate.children[self._bit(child.prefix, common)] = child
+            node.children[bit] = intermediate
+            node = intermediate
+            if common != length:
+                new_node = PrefixTrieNode(prefix, length)
+                intermediate.children[self._bit(prefix, common)] = new_node
+                node = new_node
+            break
+
+        if not node.has_value:
+            self._size += 1
+        node.value = value
+        node.has_value = True
+
+    def remove(self, prefix, length):
+        """
+        Remove prefix/length from the trie
+        Return the value that was associated with it (None if the prefix was not present)
+        """
+        prefix = self._mask(prefix, length)
+        path = []
+        node = self._root
+        while node is not None and node.length < length:
+            path.append(node)
+            node = node.children[self._bit(prefix, node.length)]
+        if node is None or node.length != length or node.prefix != prefix or not node.has_value:
+            return None
+
+        value = node.value
+        node.value = None
+        node.has_value = False
+        self._size -= 1
+
+        # remove nodes that are no longer necessary (without value and with less than two children)
+        while path and not node.has_value:
+            parent = path.pop()
+            children = [c for c in node.children if c is not None]
+            if len(children) == 2:
+                break
+            parent.children[self._bit(node.prefix, parent.length)] = children[0] if children else None
+            node = parent
+        return value
+
+    def longest_prefix_match(self, address):
+        """
+        Get value of the most specific prefix that includes address (None if no prefix includes it)
+        """
+        node = self._root
+        best = node.value
+        width = self._width
+        while True:
+            if node.length == width:
+                break
+            child = node.children[(address >> (width - 1 - node.length)) & 1]
+            if child is None:
+                break
+            shift = width - child.length
+            if (address >> shift) != (child.prefix >> shift):
+                break
+            node = child
+            if node.has_value:
+                best = node.value
+        return best
+
+    def covered_by(self, prefix, length):
+        """
+        Get values of all prefixes of the trie that are included in prefix/length
+        """
+        prefix = self._mask(prefix, length)
+        node = self._root
+        while node.length < length:
+            child = node.children[self._bit(prefix, node.length)]
+            if child is None:
+                return []
+            common = self._common_length(child.prefix, prefix, min(child.length, length))
+            if common < min(child.length, length):
+                return []
+            node = child
+
+        values = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.has_value:
+                values.append(node.value)
+            stack.extend(c for c in node.children if c is not None)
+        return values
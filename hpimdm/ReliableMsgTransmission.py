@@ -1,5 +1,5 @@
-from threading import Timer, RLock
-from hpimdm.tree.hpim_globals import MESSAGE_RETRANSMISSION_TIME, ACK_FAILURE_THRESHOLD
+from threading import RLock
+from hpimdm.tree.hpim_globals import ACK_FAILURE_THRESHOLD
 
 
 class ReliableMessageTransmission(object):
@@ -9,7 +9,6 @@ class ReliableMessageTransmission(object):
         self._msg_unicast = {}
         self._neighbors_that_acked = set()
         self._number_of_failed_acks = {}
-        self._retransmission_timer = None
         self._lock = RLock()
 
     def send_i_am_upstream(self, source, group, rpc):
@@ -28,9 +27,10 @@ class ReliableMessageTransmission(object):
                                                                            source=source, group=group,
                                                                            metric_preference=metric_preference,
                                                                            metric=metric)
+            self.track_message(self._msg_multicast)
 
             self.set_retransmission_timer()
-            self._interface.send(self._msg_multicast)
+            self._interface.send_tree_msg(self._msg_multicast)
 
     def send_i_am_no_longer_upstream(self, source, group):
         """
@@ -43,9 +43,10 @@ class ReliableMessageTransmission(object):
 
             self._msg_multicast = self._interface.create_i_am_no_longer_upstream_msg(my_boot_time=bt, sn=sn,
                                                                                      source=source, group=group)
+            self.track_message(self._msg_multicast)
 
             self.set_retransmission_timer()
-            self._interface.send(self._msg_multicast)
+            self._interface.send_tree_msg(self._msg_multicast)
 
     def send_interest(self, source, group, dst):
         """
@@ -58,9 +59,10 @@ class ReliableMessageTransmission(object):
 
             packet = self._interface.create_interest_msg(my_boot_time=bt, sn=sn, source=source, group=group)
             self._msg_unicast[dst] = packet
+            self.track_message(packet)
 
             self.set_retransmission_timer()
-            self._interface.send(packet, dst)
+            self._interface.send_tree_msg(packet, dst)
 
             # msg multicast doesnt require to be reliably protected to dst (because unicast msgs can only be transmitted
             # in concurrency with IamNoLongerUpstream - interest msg implies that neighbor is not Upstream... so dont
@@ -79,9 +81,10 @@ class ReliableMessageTransmission(object):
 
             packet = self._interface.create_no_interest_msg(my_boot_time=bt, sn=sn, source=source, group=group)
             self._msg_unicast[dst] = packet
+            self.track_message(packet)
 
             self.set_retransmission_timer()
-            self._interface.send(packet, dst)
+            self._interface.send_tree_msg(packet, dst)
 
             # msg multicast doesnt require to be reliably protected to dst (because unicast msgs can only be transmitted
             # in concurrency with IamNoLongerUpstream - interest msg implies that neighbor is not Upstream... so dont
@@ -89,16 +92,21 @@ class ReliableMessageTransmission(object):
             if self._msg_multicast is not None:
                 self._neighbors_that_acked.add(dst)
 
-    def receive_ack(self, neighbor_ip, bt, sn):
+    def receive_ack(self, neighbor_ip, bt, sn, neighbors=None):
         """
         Received Ack regarding this tree
+        neighbors is the set of IPs of all neighbors of the interface (obtained from the interface if None)
         """
         with self._lock:
             msg = self._msg_multicast
             if msg is not None and (bt > msg.payload.boot_time or
                                     bt == msg.payload.boot_time and sn >= msg.payload.payload.sequence_number):
                 self._neighbors_that_acked.add(neighbor_ip)
-                if self.did_all_neighbors_acked():
+                if neighbors is None:
+                    all_acked = self.did_all_neighbors_acked()
+                else:
+                    all_acked = self._neighbors_that_acked >= neighbors
+                if all_acked:
                     self.cancel_messsage_multicast()
 
             if neighbor_ip in self._msg_unicast:
@@ -107,6 +115,16 @@ class ReliableMessageTransmission(object):
                                                   sn >= msg.payload.payload.sequence_number):
                     self.cancel_message_unicast(neighbor_ip)
 
+    @staticmethod
+    def receive_acks(acks, neighbor_ip, bt, neighbors):
+        """
+        Received a MultiAck from neighbor_ip... apply in one pass the Ack regarding each tree
+        acks is a list of (ReliableMessageTransmission, SN) and neighbors is the set of IPs of all neighbors of the
+        interface (obtained once for the whole batch)
+        """
+        for (reliable_transmission, sn) in acks:
+            reliable_transmission.receive_ack(neighbor_ip, bt, sn, neighbors)
+
     def did_all_neighbors_acked(self):
         """
         Verify if all known neighbors have acked a multicast message
@@ -120,6 +138,7 @@ class ReliableMessageTransmission(object):
         """
         with self._lock:
             self._neighbors_that_acked.clear()
+            self.untrack_message(self._msg_multicast)
             self._msg_multicast = None
             if len(self._msg_unicast) == 0:
                 # there are no multicast nor unicast messages being transmitted
@@ -136,7 +155,7 @@ class ReliableMessageTransmission(object):
         Stop reliably monitoring an Interest/NoInterest message
         """
         with self._lock:
-            self._msg_unicast.pop(ip, None)
+            self.untrack_message(self._msg_unicast.pop(ip, None))
             self._number_of_failed_acks.pop(ip, None)
             if self._msg_multicast is None and len(self._msg_unicast) == 0:
                 self.clear_retransmission_timer()
@@ -150,27 +169,27 @@ class ReliableMessageTransmission(object):
             self.clear_retransmission_timer()
             self._neighbors_that_acked.clear()
             self._number_of_failed_acks.clear()
+            self.untrack_message(self._msg_multicast)
             self._msg_multicast = None
+            for msg in self._msg_unicast.values():
+                self.untrack_message(msg)
             self._msg_unicast.clear()
 
     ##########################################
     # Set timers
     ##########################################
-    # Reliable timer
+    # Reliable timer (scheduled by the retransmission scheduler of the interface)
     def set_retransmission_timer(self):
         """
         Set retransmission timer used to control retransmission of control messages
         """
-        self.clear_retransmission_timer()
-        self._retransmission_timer = Timer(MESSAGE_RETRANSMISSION_TIME, self.retransmission_timeout)
-        self._retransmission_timer.start()
+        self._interface.retransmission_scheduler.schedule(self)
 
     def clear_retransmission_timer(self):
         """
         Stop retransmission timer
         """
-        if self._retransmission_timer is not None:
-            self._retransmission_timer.cancel()
+        self._interface.retransmission_scheduler.unschedule(self)
 
     ###########################################
     # Timer timeout
@@ -178,8 +197,10 @@ class ReliableMessageTransmission(object):
     def retransmission_timeout(self):
         """
         Retransmission timer has expired
+        Called by the retransmission scheduler during a sweep... return the number of retransmitted messages
         """
         neighbors_not_acked = set()
+        retransmissions = 0
         with self._interface.neighbors_lock:
             with self._lock:
                 # recheck if all neighbors acked
@@ -192,11 +213,13 @@ class ReliableMessageTransmission(object):
                 # didnt received acks from every neighbor... so lets resend msg and reschedule timer
                 msg = self._msg_multicast
                 if msg is not None:
-                    self._interface.send(msg)
+                    self._interface.send_tree_msg(msg)
+                    retransmissions += 1
 
                 for (dst, msg) in self._msg_unicast.copy().items():
                     if self._interface.is_neighbor(dst):
-                        self._interface.send(msg, dst)
+                        self._interface.send_tree_msg(msg, dst)
+                        retransmissions += 1
                         neighbors_not_acked.add(dst)  # take note of all neighbors that have not acked unicast messages
                     else:
                         self.cancel_message_unicast(dst)
@@ -208,27 +231,25 @@ class ReliableMessageTransmission(object):
                 for neighbor_ip in neighbors_not_acked:
                     self._number_of_failed_acks[neighbor_ip] = self._number_of_failed_acks.get(neighbor_ip, 0) + 1
                 self.check_neighbor_failures()
+        return retransmissions
 
     #############################################
-    # Get Sequence Number for CheckpointSN
+    # Track Sequence Number for CheckpointSN
     #############################################
-    def get_sequence_number(self):
+    def track_message(self, msg):
         """
-        Get the lowest sequence number of a control message that is being currently reliably transmitted...
-        This method will be used to determine the CheckpointSN to be transmitted in Hello messages
+        Register msg as being reliably transmitted in the outstanding messages of the interface...
+        These will be used to determine the CheckpointSN to be transmitted in Hello messages
         """
-        bt_sn = (None, None)
-        with self._lock:
-            msg = self._msg_multicast
-            if msg is not None:
-                bt_sn = (msg.payload.boot_time, msg.payload.payload.sequence_number - 1)
+        self._interface.outstanding_sequence_numbers.add(msg.payload.boot_time, msg.payload.payload.sequence_number)
 
-            for (_, msg) in self._msg_unicast.items():
-                if bt_sn[0] is None or bt_sn[0] is not None and \
-                        (bt_sn[0] < msg.payload.boot_time or
-                         bt_sn[0] == msg.payload.boot_time and bt_sn[1] > (msg.payload.payload.sequence_number - 1)):
-                    bt_sn = (msg.payload.boot_time, msg.payload.payload.sequence_number - 1)
-        return bt_sn
+    def untrack_message(self, msg):
+        """
+        Remove msg from the outstanding messages of the interface (if msg is not None)
+        """
+        if msg is not None:
+            self._interface.outstanding_sequence_numbers.remove(msg.payload.boot_time,
+                                                                msg.payload.payload.sequence_number)
 
     #############################################
     # Check neighbor failures
@@ -238,7 +259,7 @@ class ReliableMessageTransmission(object):
         with self._lock:
             for (neighbor_ip, ack_failures) in self._number_of_failed_acks.copy().items():
                 if ack_failures > ACK_FAILURE_THRESHOLD:
-                    print("NEIGHBOR FAILED DUE TO ACK LACK: " + neighbor_ip)
+                    self._interface.interface_logger.debug('Neighbor %s failed due to lack of Acks', neighbor_ip)
                     self.force_neighbor_failure(neighbor_ip)
 
     def force_neighbor_failure(self, neighbor_ip):
@@ -0,0 +1,120 @@
+import time
+import heapq
+from collections import deque
+from threading import Lock
+from hpimdm.TimerWheel import Timer
+from hpimdm.tree import hpim_globals
+
+
+class RetransmissionScheduler(object):
+    """
+    Schedule retransmissions of all trees of an interface (IamUpstream, IamNoLongerUpstream, Interest and NoInterest
+    messages that have not been acknowledged)
+    Trees are kept in a queue ordered by their retransmission deadline and a single timer is armed for the earliest
+    one. When it expires, all trees whose deadline has passed are retransmitted in one sweep while holding the
+    neighbors lock of the interface... their messages are bundled and transmitted at the end of the sweep
+    """
+    # Interval (in seconds) used to calculate the rate of retransmissions
+    RATE_INTERVAL = 60
+
+    def __init__(self, interface):
+        self._interface = interface
+        # heap of (deadline, order, ReliableMessageTransmission)... entries whose deadline no longer matches the
+        # one of _deadlines were cancelled or rescheduled and are ignored
+        self._queue = []
+        # KEY : ReliableMessageTransmission, VALUE : deadline of its next retransmission
+        self._deadlines = {}
+        self._order = 0
+        self._timer = None
+        self._lock = Lock()
+
+        # counters
+        self.sweeps = 0
+        self.retransmissions = 0
+        # (time of sweep, number of retransmitted messages) of sweeps during the last RATE_INTERVAL seconds
+        self._recent_sweeps = deque()
+
+    def schedule(self, reliable_transmission):
+        """
+        Retransmit the messages of reliable_transmission after MESSAGE_RETRANSMISSION_TIME seconds
+        """
+        with self._lock:
+            deadline = time.monotonic() + hpim_globals.MESSAGE_RETRANSMISSION_TIME
+            self._deadlines[reliable_transmission] = deadline
+            self._order += 1
+            heapq.heappush(self._queue, (deadline, self._order, reliable_transmission))
+            if len(self._queue) > 2 * len(self._deadlines) + 64:
+                # too many cancelled entries
+                self._queue = [e for e in self._queue if self._deadlines.get(e[2], None) == e[0]]
+                heapq.heapify(self._queue)
+            if self._timer is None:
+                self._set_timer()
+
+    def unschedule(self, reliable_transmission):
+        """
+        Cancel the retransmission of reliable_transmission
+        """
+        with self._lock:
+            self._deadlines.pop(reliable_transmission, None)
+
+    def _set_timer(self):
+        """
+        Arm timer for the earliest deadline of the queue
+        """
+        while self._queue and self._deadlines.get(self._queue[0][2], None) != self._queue[0][0]:
+            heapq.heappop(self._queue)
+        if self._queue:
+            self._timer = Timer(max(0, self._queue[0][0] - time.monotonic()), self.sweep, dedicated_thread=True)
+            self._timer.start()
+
+    def sweep(self):
+        """
+        Retransmit messages of all trees whose deadline has passed
+        """
+        with self._interface.neighbors_lock:
+            with self._lock:
+                self._timer = None
+                now = time.monotonic()
+                due = []
+                while self._queue and self._queue[0][0] <= now:
+                    (deadline, _, reliable_transmission) = heapq.heappop(self._queue)
+                    if self._deadlines.get(reliable_transmission, None) == deadline:
+                        del self._deadlines[reliable_transmission]
+                        due.append(reliable_transmission)
+
+            retransmissions = 0
+            for reliable_transmission in due:
+                retransmissions += reliable_transmission.retransmission_timeout()
+            self._interface.bundler.flush()
+
+            with self._lock:
+                if due:
+                    self.sweeps += 1
+                    self.retransmissions += retransmissions
+                    self._recent_sweeps.append((now, retransmissions))
+                if self._timer is None:
+                    self._set_timer()
+
+    def get_retransmission_rate(self):
+        """
+        Number of retransmitted messages per second during the last RATE_INTERVAL seconds
+        """
+        with self._lock:
+            oldest = time.monotonic() - self.RATE_INTERVAL
+            while self._recent_sweeps and self._recent_sweeps[0][0] < oldest:
+                self._recent_sweeps.popleft()
+            return sum(r for (_, r) in self._recent_sweeps) / self.RATE_INTERVAL
+
+    def get_number_of_scheduled_trees(self):
+        return len(self._deadlines)
+
+    def cancel(self):
+        """
+        Cancel all retransmissions (interface was removed)
+        """
+        with self._lock:
+            self._queue.clear()
+            self._deadlines.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
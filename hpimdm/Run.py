@@ -88,6 +88,8 @@ class MyDaemon(Daemon):
                     connection.sendall(pickle.dumps(Main.list_neighbors_state(ipv4=args.ipv4, ipv6=args.ipv6)))
                 elif 'list_sequence_numbers' in args and args.list_sequence_numbers:
                     connection.sendall(pickle.dumps(Main.list_sequence_numbers(ipv4=args.ipv4, ipv6=args.ipv6)))
+                elif 'list_statistics' in args and args.list_statistics:
+                    connection.sendall(pickle.dumps(Main.list_statistics(ipv4=args.ipv4, ipv6=args.ipv6)))
                 elif 'list_instances' in args and args.list_instances:
                     connection.sendall(pickle.dumps(Main.list_instances()))
                 elif 'add_interface' in args and args.add_interface:
@@ -173,6 +175,9 @@ def main():
                             "Use -4 or -6 to specify IPv4 or IPv6 HPIM neighbor state.")
     group.add_argument("-lsn", "--list_sequence_numbers", action="store_true", default=False,
                        help="List Sequence Numbers. Use -4 or -6 to list stored IPv4 or IPv6 HPIM sequence numbers.")
+    group.add_argument("-stats", "--list_statistics", action="store_true", default=False,
+                       help="List statistics of the daemon (RPF cache, ...). "
+                            "Use -4 or -6 to specify IPv4 or IPv6 statistics.")
     group.add_argument("-instances", "--list_instances", action="store_true", default=False,
                        help="List running HPIM-DM daemon processes.")
     group.add_argument("-mr", "--multicast_routes", action="store_true", default=False,
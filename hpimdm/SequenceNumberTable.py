@@ -0,0 +1,41 @@
+import heapq
+
+
+class SequenceNumberTable(dict):
+    """
+    Per-tree table of the last SN received from a neighbor (KEY : tree_id, VALUE : SN)
+    Besides the dictionary, entries are kept in a min-heap ordered by SN (with lazy deletion... heap entries whose SN
+    no longer matches the one of the dictionary were overwritten or removed). Purging all entries with a SN lower or
+    equal to a CheckpointSN only visits the purged entries, instead of the whole table
+    Entries must be stored with table[tree_id] = sn
+    """
+    def __init__(self):
+        super().__init__()
+        # (SN, tree_id)
+        self._heap = []
+
+    def __setitem__(self, tree_id, sn):
+        super().__setitem__(tree_id, sn)
+        heapq.heappush(self._heap, (sn, tree_id))
+        if len(self._heap) > 2 * len(self) + 64:
+            # too many overwritten/removed entries
+            self._heap = [(v, k) for (k, v) in self.items()]
+            heapq.heapify(self._heap)
+
+    def pop_lower_or_equal(self, sn):
+        """
+        Remove all entries with a SN lower or equal to sn
+        Return the tree_id of the removed entries
+        """
+        removed = []
+        heap = self._heap
+        while heap and heap[0][0] <= sn:
+            (entry_sn, tree_id) = heapq.heappop(heap)
+            if self.get(tree_id, None) == entry_sn:
+                super().__delitem__(tree_id)
+                removed.append(tree_id)
+        return removed
+
+    def clear(self):
+        super().clear()
+        self._heap.clear()
@@ -0,0 +1,19 @@
+class SyncSnapshot(object):
+    """
+    Snapshot of the trees in which this router is Upstream in an interface, transmitted in Sync messages
+    Its entries are encoded once and shared by all neighbors that start a synchronization while the Upstream trees of
+    the interface do not change (all of them use the same SnapshotSN). Interfaces only hold a weak reference to it...
+    the snapshot is released after the last of these neighbors finishes its synchronization
+    """
+    __slots__ = ('boot_time', 'snapshot_sn', 'version', 'entries', 'length', 'fragmentation', '__weakref__')
+
+    def __init__(self, boot_time, snapshot_sn, version, entries, length, fragmentation):
+        self.boot_time = boot_time
+        self.snapshot_sn = snapshot_sn
+        # version of the Upstream trees of the interface included in this snapshot
+        self.version = version
+        # encoded entries of all trees (Sync messages carry fragments of them)
+        self.entries = entries
+        self.length = length
+        # number of entries per Sync message
+        self.fragmentation = fragmentation
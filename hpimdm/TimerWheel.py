@@ -0,0 +1,212 @@
+import time
+import math
+import logging
+from queue import Queue
+from threading import Thread, Lock, Condition, get_ident
+
+# Granularity of the wheel (in seconds)... all protocol timers are expressed in seconds, so expiring them with a
+# precision of 50ms is more than enough
+TICK = 0.05
+# Number of slots of the wheel... timers that expire further than NUMBER_OF_SLOTS*TICK seconds in the future stay
+# in their slot during multiple rotations of the wheel
+NUMBER_OF_SLOTS = 1024
+# Number of threads used to run the callbacks of expired timers
+NUMBER_OF_DISPATCHERS = 4
+# Callbacks run by the dispatcher threads that take longer than this (in seconds) are reported... they delay the
+# expiration of all other timers
+SLOW_CALLBACK_TIME = 0.5
+
+
+class TimerWheel(object):
+    """
+    Hashed timer wheel shared by all timers of the daemon
+    A single thread advances the wheel one tick at a time and hands expired timers to a small pool of dispatcher
+    threads that run their callbacks. Arming and cancelling a timer is O(1)
+    Callbacks run by the dispatcher threads must not block... timers whose callbacks may take long (iterate over all
+    trees or wait for locks held during long operations) must be created with dedicated_thread=True, so that their
+    callbacks run in a thread of their own
+    """
+    LOGGER = logging.getLogger('hpim.TimerWheel')
+
+    def __init__(self, tick=TICK, number_of_slots=NUMBER_OF_SLOTS, number_of_dispatchers=NUMBER_OF_DISPATCHERS):
+        self._tick = tick
+        self._slots = [set() for _ in range(number_of_slots)]
+        self._number_of_armed_timers = 0
+        self._start_time = time.monotonic()
+        self._current_tick = 0
+        self._condition = Condition(Lock())
+        self._expired_timers = Queue()
+        self._number_of_dispatchers = number_of_dispatchers
+        self._running = False
+
+    def _start(self):
+        """
+        Start the thread that advances the wheel and the dispatcher threads
+        """
+        self._running = True
+        wheel_thread = Thread(target=self._advance)
+        wheel_thread.daemon = True
+        wheel_thread.start()
+        for _ in range(self._number_of_dispatchers):
+            dispatcher_thread = Thread(target=self._dispatch)
+            dispatcher_thread.daemon = True
+            dispatcher_thread.start()
+
+    def _now_tick(self):
+        return int((time.monotonic() - self._start_time) / self._tick)
+
+    def arm(self, timer, interval):
+        """
+        Schedule timer to expire after interval seconds
+        """
+        with self._condition:
+            if not self._running:
+                self._start()
+            if self._number_of_armed_timers == 0:
+                # wheel was idle... there are no timers in the slots between the current tick and now
+                self._current_tick = max(self._current_tick, self._now_tick())
+            expiration_tick = math.ceil((time.monotonic() - self._start_time + interval) / self._tick)
+            expiration_tick = max(expiration_tick, self._current_tick + 1)
+            slot = self._slots[expiration_tick % len(self._slots)]
+            timer._expiration_tick = expiration_tick
+            timer._slot = slot
+            slot.add(timer)
+            self._number_of_armed_timers += 1
+            if self._number_of_armed_timers == 1:
+                self._condition.notify()
+
+    def disarm(self, timer):
+        """
+        Remove timer from the wheel (if it was still waiting to expire)
+        Return True if the timer was removed and False otherwise
+        """
+        with self._condition:
+            slot = timer._slot
+            if slot is None:
+                return False
+            slot.discard(timer)
+            timer._slot = None
+            self._number_of_armed_timers -= 1
+            return True
+
+    def get_number_of_armed_timers(self):
+        return self._number_of_armed_timers
+
+    def _advance(self):
+        """
+        Advance the wheel tick by tick and collect expired timers
+        """
+        number_of_slots = len(self._slots)
+        while True:
+            with self._condition:
+                while self._number_of_armed_timers == 0:
+                    self._condition.wait()
+
+                now_tick = self._now_tick()
+                while self._current_tick < now_tick:
+                    self._current_tick += 1
+                    slot = self._slots[self._current_tick % number_of_slots]
+                    expired = [t for t in slot if t._expiration_tick <= self._current_tick]
+                    for timer in expired:
+                        slot.discard(timer)
+                        timer._slot = None
+                        self._number_of_armed_timers -= 1
+                        self._expired_timers.put(timer)
+
+            time.sleep(max(0.0, (self._current_tick + 1) * self._tick - (time.monotonic() - self._start_time)))
+
+    def _dispatch(self):
+        """
+        Run callbacks of expired timers
+        """
+        while True:
+            timer = self._expired_timers.get()
+            if timer.dedicated_thread:
+                callback_thread = Thread(target=self._run_callback, args=(timer,))
+                callback_thread.daemon = True
+                callback_thread.start()
+                continue
+
+            start_time = time.monotonic()
+            self._run_callback(timer)
+            duration = time.monotonic() - start_time
+            if duration > SLOW_CALLBACK_TIME:
+                TimerWheel.LOGGER.warning("Callback %s of timer blocked a dispatcher thread during %.3f seconds",
+                                          getattr(timer.function, '__qualname__', timer.function), duration)
+
+    @staticmethod
+    def _run_callback(timer):
+        try:
+            timer._run()
+        except Exception:
+            TimerWheel.LOGGER.exception("Exception raised by timer callback")
+
+
+wheel = TimerWheel()
+
+
+class Timer(object):
+    """
+    Timer scheduled in the shared timer wheel
+    Exposes the same interface as threading.Timer (start/cancel/is_alive/ident) without creating a thread per timer
+    Set dedicated_thread if the callback may block (it runs in a new thread instead of a dispatcher thread)
+    """
+    WAITING = 0
+    RUNNING = 1
+    FINISHED = 2
+
+    def __init__(self, interval, function, args=None, kwargs=None, dedicated_thread=False):
+        self.interval = interval
+        self.function = function
+        self.args = args if args is not None else []
+        self.kwargs = kwargs if kwargs is not None else {}
+        self.dedicated_thread = dedicated_thread
+        self._started = False
+        self._state = Timer.WAITING
+        self._state_lock = Lock()
+        self._ident = None
+        self._expiration_tick = None
+        self._slot = None
+
+    def start(self):
+        """
+        Arm this timer
+        """
+        if self._started:
+            raise RuntimeError("timers can only be started once")
+        self._started = True
+        wheel.arm(self, self.interval)
+
+    def cancel(self):
+        """
+        Stop this timer if it has not expired yet
+        """
+        with self._state_lock:
+            if self._state == Timer.WAITING:
+                self._state = Timer.FINISHED
+        wheel.disarm(self)
+
+    def is_alive(self):
+        """
+        Check if this timer is waiting to expire or is running its callback
+        """
+        return self._started and self._state != Timer.FINISHED
+
+    @property
+    def ident(self):
+        """
+        Identifier of the thread that is running the callback of this timer (None if it is not running)
+        """
+        return self._ident
+
+    def _run(self):
+        with self._state_lock:
+            if self._state == Timer.FINISHED:
+                return
+            self._state = Timer.RUNNING
+            self._ident = get_ident()
+        try:
+            self.function(*self.args, **self.kwargs)
+        finally:
+            self._ident = None
+            self._state = Timer.FINISHED
@@ -0,0 +1,75 @@
+from threading import Lock
+
+
+class TreeIdRegistry(object):
+    """
+    Intern (source, group) trees as small integers
+    Per-tree tables of neighbors and interfaces are keyed by these identifiers instead of tuples of strings (hashing an
+    integer is cheaper than hashing a tuple and each tree is only stored once). Each entry of a table that is keyed by
+    an identifier holds a reference to it... the identifier is freed (and reused) after its last reference is released
+    """
+    def __init__(self):
+        # KEY : (source, group), VALUE : tree_id
+        self._ids = {}
+        # KEY : tree_id, VALUE : [(source, group), number of references]
+        self._trees = {}
+        self._free_ids = []
+        self._next_id = 0
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._trees)
+
+    def acquire(self, source, group):
+        """
+        Get identifier of tree (source, group) and hold a reference to it
+        """
+        tree = (source, group)
+        with self._lock:
+            tree_id = self._ids.get(tree, None)
+            if tree_id is None:
+                if self._free_ids:
+                    tree_id = self._free_ids.pop()
+                else:
+                    tree_id = self._next_id
+                    self._next_id += 1
+                self._ids[tree] = tree_id
+                self._trees[tree_id] = [tree, 1]
+            else:
+                self._trees[tree_id][1] += 1
+            return tree_id
+
+    def hold(self, tree_id):
+        """
+        Hold an additional reference to an identifier that is already referenced
+        """
+        with self._lock:
+            self._trees[tree_id][1] += 1
+
+    def release(self, tree_id):
+        """
+        Release a reference to tree_id (the identifier is freed after its last reference is released)
+        """
+        with self._lock:
+            entry = self._trees[tree_id]
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._trees.pop(tree_id)
+                self._ids.pop(entry[0])
+                self._free_ids.append(tree_id)
+
+    def find(self, source, group):
+        """
+        Get identifier of tree (source, group) without creating it (None if the tree is not referenced)
+        """
+        return self._ids.get((source, group), None)
+
+    def get_tree(self, tree_id):
+        """
+        Get (source, group) of a referenced identifier (None if tree_id is no longer referenced)
+        """
+        entry = self._trees.get(tree_id, None)
+        return entry[0] if entry is not None else None
+
+
+registry = TreeIdRegistry()
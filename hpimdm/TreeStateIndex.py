@@ -0,0 +1,123 @@
+from threading import Lock
+from hpimdm.tree import hpim_globals
+
+
+class TreeAggregate(object):
+    """
+    Aggregated state of all Synced neighbors of an interface regarding a tree
+    """
+    __slots__ = ('upstream', 'best_upstream', 'interested', 'not_interested')
+
+    def __init__(self):
+        # KEY : neighbor IP, VALUE : AssertMetric of Upstream neighbors
+        self.upstream = {}
+        # AssertMetric of the Upstream neighbor that offers the best RPC
+        self.best_upstream = None
+        # number of neighbors that stored Interest state (Interested/NotInterested)
+        self.interested = 0
+        self.not_interested = 0
+
+    def is_empty(self):
+        return not self.upstream and self.interested == 0 and self.not_interested == 0
+
+
+class TreeStateIndex(object):
+    """
+    Upstream and Interest state of all Synced neighbors of an interface, aggregated per tree
+    Neighbors update the aggregate of a tree whenever their stored state regarding it changes (and add/remove all their
+    trees when they become/stop being Synced)... obtaining the state of a tree does not iterate over all neighbors
+    The state of a neighbor regarding a tree is the AssertMetric of the neighbor (Upstream), True/False (Interest) or
+    None if no state is stored (neighbor is considered interested if INITIAL_FLOOD_ENABLED)
+    """
+    def __init__(self):
+        # KEY : tree_id, VALUE : TreeAggregate
+        self._trees = {}
+        # number of Synced neighbors
+        self._neighbors = 0
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._trees)
+
+    def add_neighbor(self, neighbor_ip, tree_states):
+        """
+        Neighbor became Synced... tree_states is a list of (tree_id, state) of all trees stored by the neighbor
+        """
+        with self._lock:
+            self._neighbors += 1
+            for (tree_id, state) in tree_states:
+                self._add(tree_id, neighbor_ip, state)
+
+    def remove_neighbor(self, neighbor_ip, tree_states):
+        """
+        Neighbor is no longer Synced... tree_states is a list of (tree_id, state) of all trees stored by the neighbor
+        """
+        with self._lock:
+            self._neighbors -= 1
+            for (tree_id, state) in tree_states:
+                self._remove(tree_id, neighbor_ip, state)
+
+    def update(self, tree_id, neighbor_ip, old_state, new_state):
+        """
+        State of a Synced neighbor regarding tree_id changed from old_state to new_state
+        """
+        with self._lock:
+            self._remove(tree_id, neighbor_ip, old_state)
+            self._add(tree_id, neighbor_ip, new_state)
+
+    def _add(self, tree_id, neighbor_ip, state):
+        if state is None:
+            return
+        aggregate = self._trees.get(tree_id, None)
+        if aggregate is None:
+            aggregate = TreeAggregate()
+            self._trees[tree_id] = aggregate
+
+        if state is True:
+            aggregate.interested += 1
+        elif state is False:
+            aggregate.not_interested += 1
+        else:
+            aggregate.upstream[neighbor_ip] = state
+            if aggregate.best_upstream is None or state.is_better_than(aggregate.best_upstream):
+                aggregate.best_upstream = state
+
+    def _remove(self, tree_id, neighbor_ip, state):
+        if state is None:
+            return
+        aggregate = self._trees.get(tree_id, None)
+        if aggregate is None:
+            return
+
+        if state is True:
+            aggregate.interested -= 1
+        elif state is False:
+            aggregate.not_interested -= 1
+        else:
+            aggregate.upstream.pop(neighbor_ip, None)
+            if aggregate.best_upstream is state:
+                # best Upstream neighbor changed... choose among the remaining Upstream neighbors
+                aggregate.best_upstream = None
+                for metric in aggregate.upstream.values():
+                    if aggregate.best_upstream is None or metric.is_better_than(aggregate.best_upstream):
+                        aggregate.best_upstream = metric
+
+        if aggregate.is_empty():
+            del self._trees[tree_id]
+
+    def get_tree_state(self, tree_id):
+        """
+        Get (interest_state, upstream_state) of tree_id
+        Interest state is True if at least one neighbor is interested and upstream state is the AssertMetric of the
+        Upstream neighbor that offers the best RPC (None if there are no Upstream neighbors)
+        """
+        with self._lock:
+            aggregate = self._trees.get(tree_id, None) if tree_id is not None else None
+            if aggregate is None:
+                return (hpim_globals.INITIAL_FLOOD_ENABLED and self._neighbors > 0, None)
+
+            neighbors_without_state = \
+                self._neighbors - len(aggregate.upstream) - aggregate.interested - aggregate.not_interested
+            interest_state = aggregate.interested > 0 or \
+                (hpim_globals.INITIAL_FLOOD_ENABLED and neighbors_without_state > 0)
+            return (interest_state, aggregate.best_upstream)
@@ -1,8 +1,10 @@
 import socket
+import logging
 import ipaddress
 from threading import RLock
 from socket import if_indextoname
 from pyroute2 import IPDB, IPRoute
+from .PrefixTrie import PrefixTrie
 from .tree import hpim_globals
 
 
@@ -11,56 +13,144 @@ def get_unicast_info(ip_dst):
 
 
 class UnicastRouting(object):
+    LOGGER = logging.getLogger('hpim.UnicastRouting')
     ipdb = None
     lock = RLock()
 
+    # Longest prefix match of the unicast routing table used for RPF checks
+    # KEY : family, VALUE : PrefixTrie of destinations ("default" or "network/mask_len")
+    prefix_tries = {}
+
+    # Cache of RPF information of sources
+    # KEY : source_ip, VALUE : (metric_administrative_distance, metric_cost, is_directly_connected, interface_name)
+    rpf_cache = {}
+    # KEY : family, VALUE : PrefixTrie of cached sources (find cached sources included in a changed prefix)
+    rpf_cache_sources = {}
+    rpf_cache_hits = 0
+    rpf_cache_misses = 0
+    rpf_cache_invalidations = 0
+
     def __init__(self):
         UnicastRouting.ipdb = IPDB()
         self._ipdb = UnicastRouting.ipdb
+        UnicastRouting.load_prefix_tries()
         self._ipdb.register_callback(UnicastRouting.unicast_changes, mode="post")
 
+    @staticmethod
+    def load_prefix_tries():
+        """
+        Build the prefix tries from the routes currently stored in the unicast routing table
+        """
+        with UnicastRouting.lock:
+            UnicastRouting.prefix_tries = {socket.AF_INET: PrefixTrie(32), socket.AF_INET6: PrefixTrie(128)}
+            UnicastRouting.rpf_cache = {}
+            UnicastRouting.rpf_cache_sources = {socket.AF_INET: PrefixTrie(32), socket.AF_INET6: PrefixTrie(128)}
+            for route in UnicastRouting.ipdb.routes.tables[hpim_globals.UNICAST_TABLE_ID]:
+                try:
+                    dst = route['dst']
+                    family = route['family']
+                    if dst == 'default':
+                        UnicastRouting.add_prefix(family, None, 0)
+                    else:
+                        network = ipaddress.ip_network(dst, strict=False)
+                        UnicastRouting.add_prefix(family, str(network.network_address), network.prefixlen)
+                except Exception:
+                    continue
+
+    @staticmethod
+    def add_prefix(family, network_address, mask_len):
+        """
+        Add destination network_address/mask_len to the prefix trie of family
+        """
+        (prefix, key) = UnicastRouting._get_prefix_key(family, network_address, mask_len)
+        UnicastRouting.prefix_tries[family].insert(prefix, mask_len, key)
+
+    @staticmethod
+    def remove_prefix(family, network_address, mask_len):
+        """
+        Remove destination network_address/mask_len from the prefix trie of family
+        """
+        (prefix, _) = UnicastRouting._get_prefix_key(family, network_address, mask_len)
+        UnicastRouting.prefix_tries[family].remove(prefix, mask_len)
+
+    @staticmethod
+    def _get_prefix_key(family, network_address, mask_len):
+        """
+        Get integer prefix and the key used by IPDB to identify the destination network_address/mask_len
+        """
+        if mask_len == 0:
+            return (0, 'default')
+        prefix = int.from_bytes(socket.inet_pton(family, network_address), 'big')
+        key = str(ipaddress.ip_interface(network_address + "/" + str(mask_len)).network)
+        return (prefix, key)
+
     @staticmethod
     def get_route(ip_dst: str):
         """
         Get route from the unicast routing table regarding the entry of IP ip_dst
         """
-        ip_version = ipaddress.ip_address(ip_dst).version
-        if ip_version == 4:
-            family = socket.AF_INET
-            full_mask = 32
-        elif ip_version == 6:
-            family = socket.AF_INET6
-            full_mask = 128
-        else:
-            raise Exception("Unknown IP version")
+        family = socket.AF_INET6 if ':' in ip_dst else socket.AF_INET
+        address = int.from_bytes(socket.inet_pton(family, ip_dst), 'big')
         info = None
         with UnicastRouting.lock:
             ipdb = UnicastRouting.ipdb  # type:IPDB
+            table = ipdb.routes.tables[hpim_globals.UNICAST_TABLE_ID]
+            prefix_trie = UnicastRouting.prefix_tries[family]
 
-            for mask_len in range(full_mask, 0, -1):
-                dst_network = str(ipaddress.ip_interface(ip_dst + "/" + str(mask_len)).network)
-
-                print(dst_network)
-                if dst_network in ipdb.routes.tables[hpim_globals.UNICAST_TABLE_ID]:
-                    print(info)
-                    if ipdb.routes[{'dst': dst_network, 'family': family,
-                                    'table': hpim_globals.UNICAST_TABLE_ID}]['ipdb_scope'] != 'gc':
-                        info = ipdb.routes[{'dst': dst_network, 'family': family,
-                                            'table': hpim_globals.UNICAST_TABLE_ID}]
+            while True:
+                dst_network = prefix_trie.longest_prefix_match(address)
+                if dst_network is None or dst_network == 'default':
                     break
-                else:
+                elif dst_network not in table:
+                    # stale entry... remove it and search for a less specific prefix
+                    (network_address, mask_len) = dst_network.split("/")
+                    UnicastRouting.remove_prefix(family, network_address, int(mask_len))
                     continue
+
+                if ipdb.routes[{'dst': dst_network, 'family': family,
+                                'table': hpim_globals.UNICAST_TABLE_ID}]['ipdb_scope'] != 'gc':
+                    info = ipdb.routes[{'dst': dst_network, 'family': family,
+                                        'table': hpim_globals.UNICAST_TABLE_ID}]
+                break
+
             if not info:
-                print("0.0.0.0/0 or ::/0")
-                if "default" in ipdb.routes.tables[hpim_globals.UNICAST_TABLE_ID]:
+                if "default" in table:
                     info = ipdb.routes[{'dst': 'default', 'family': family, 'table': hpim_globals.UNICAST_TABLE_ID}]
-            print(info)
             return info
 
     @staticmethod
     def get_unicast_info(ip_dst):
         """
         Obtain unicast info regarding IP ip_dst, such as RPC, if it is directly connected and root interface index
+        This information is cached until a change to the unicast routing table affects ip_dst
+        """
+        with UnicastRouting.lock:
+            unicast_info = UnicastRouting.rpf_cache.get(ip_dst, None)
+            if unicast_info is not None:
+                UnicastRouting.rpf_cache_hits += 1
+            else:
+                UnicastRouting.rpf_cache_misses += 1
+                unicast_info = UnicastRouting._get_unicast_info(ip_dst)
+                family = socket.AF_INET6 if ':' in ip_dst else socket.AF_INET
+                address = int.from_bytes(socket.inet_pton(family, ip_dst), 'big')
+                UnicastRouting.rpf_cache[ip_dst] = unicast_info
+                UnicastRouting.rpf_cache_sources[family].insert(address, 32 if family == socket.AF_INET else 128,
+                                                                ip_dst)
+
+        (metric_administrative_distance, metric_cost, is_directly_connected, interface_name) = unicast_info
+        # VIF index is obtained on each call (VIF mapping may change without changes to the unicast routing table)
+        from hpimdm import Main
+        if ':' not in ip_dst:
+            rpf_if = Main.kernel.vif_name_to_index_dic.get(interface_name)
+        else:
+            rpf_if = Main.kernel_v6.vif_name_to_index_dic.get(interface_name)
+        return (metric_administrative_distance, metric_cost, is_directly_connected, rpf_if)
+
+    @staticmethod
+    def _get_unicast_info(ip_dst):
+        """
+        Obtain unicast info regarding IP ip_dst from the unicast routing table, such as RPC, if it is directly connected
+        and the name of the root interface
         """
         metric_administrative_distance = 0xFFFFFFFF
         metric_cost = 0xFFFFFFFF
@@ -96,12 +186,36 @@ class UnicastRouting(object):
                 is_directly_connected = rpf_node == ip_dst
 
         interface_name = None if oif is None else if_indextoname(int(oif))
-        from hpimdm import Main
-        if ipaddress.ip_address(ip_dst).version == 4:
-            rpf_if = Main.kernel.vif_name_to_index_dic.get(interface_name)
-        else:
-            rpf_if = Main.kernel_v6.vif_name_to_index_dic.get(interface_name)
-        return (metric_administrative_distance, metric_cost, is_directly_connected, rpf_if)
+        return (metric_administrative_distance, metric_cost, is_directly_connected, interface_name)
+
+    @staticmethod
+    def invalidate_rpf_cache(subnet):
+        """
+        Remove from the RPF cache all sources included in subnet
+        """
+        family = socket.AF_INET if subnet.version == 4 else socket.AF_INET6
+        with UnicastRouting.lock:
+            rpf_cache_sources = UnicastRouting.rpf_cache_sources.get(family, None)
+            if rpf_cache_sources is None:
+                return
+            width = 32 if family == socket.AF_INET else 128
+            for source_ip in rpf_cache_sources.covered_by(int(subnet.network_address), subnet.prefixlen):
+                address = int.from_bytes(socket.inet_pton(family, source_ip), 'big')
+                rpf_cache_sources.remove(address, width)
+                UnicastRouting.rpf_cache.pop(source_ip, None)
+                UnicastRouting.rpf_cache_invalidations += 1
+
+    @staticmethod
+    def get_rpf_cache_statistics():
+        """
+        Get counters of the RPF cache
+        """
+        with UnicastRouting.lock:
+            return {"RPF cache entries": len(UnicastRouting.rpf_cache),
+                    "RPF cache hits": UnicastRouting.rpf_cache_hits,
+                    "RPF cache misses": UnicastRouting.rpf_cache_misses,
+                    "RPF cache invalidations": UnicastRouting.rpf_cache_invalidations,
+                    }
 
     @staticmethod
     def unicast_changes(ipdb, msg, action):
@@ -109,31 +223,33 @@ class UnicastRouting(object):
         Kernel notified about a change
         Verify the type of change and recheck all trees if necessary
         """
-        print("unicast change?")
-        print(action)
-        UnicastRouting.lock.acquire()
         family = msg['family']
         if action == "RTM_NEWROUTE" or action == "RTM_DELROUTE":
-            print(ipdb.routes)
             mask_len = msg["dst_len"]
             network_address = None
             attrs = msg["attrs"]
-            print(attrs)
+            table = msg.get("table")
             for (key, value) in attrs:
-                print((key, value))
                 if key == "RTA_DST":
                     network_address = value
-                    break
+                elif key == "RTA_TABLE":
+                    table = value
             if network_address is None and family == socket.AF_INET:
                 network_address = "0.0.0.0"
             elif network_address is None and family == socket.AF_INET6:
                 network_address = "::"
-            print(network_address)
-            print(mask_len)
-            print(network_address + "/" + str(mask_len))
             subnet = ipaddress.ip_network(network_address + "/" + str(mask_len))
-            print(str(subnet))
-            UnicastRouting.lock.release()
+            UnicastRouting.LOGGER.debug('%s regarding %s in table %s', action, subnet, table)
+
+            with UnicastRouting.lock:
+                # keep prefix trie synchronized with the unicast routing table
+                if table == hpim_globals.UNICAST_TABLE_ID and family in UnicastRouting.prefix_tries:
+                    if action == "RTM_NEWROUTE":
+                        UnicastRouting.add_prefix(family, network_address, mask_len)
+                    elif str(subnet) not in ipdb.routes.tables[hpim_globals.UNICAST_TABLE_ID] and \
+                            not (mask_len == 0 and "default" in ipdb.routes.tables[hpim_globals.UNICAST_TABLE_ID]):
+                        UnicastRouting.remove_prefix(family, network_address, mask_len)
+                UnicastRouting.invalidate_rpf_cache(subnet)
             from hpimdm import Main
             if family == socket.AF_INET:
                 Main.kernel.notify_unicast_changes(subnet)
@@ -179,8 +295,6 @@ class UnicastRouting(object):
             subnet = ipaddress.ip_network("0.0.0.0/0")
             Main.kernel.notify_unicast_changes(subnet)
             '''
-        else:
-            UnicastRouting.lock.release()
 
     def stop(self):
         """
@@ -0,0 +1,59 @@
+from threading import Lock
+
+
+class UpstreamTrees(object):
+    """
+    Trees in which this router is Upstream in an interface (trees that must be included in a new snapshot)
+    This set is maintained incrementally by the NonRoot interfaces of each tree. Taking a snapshot is O(1)... the
+    current version is frozen and shared with the snapshot and the next change copies it before modifying it
+    (copy-on-write)
+    """
+    def __init__(self):
+        # KEY : (source_ip, group_ip), VALUE : (metric_preference, route_metric)
+        self._trees = {}
+        self._frozen = False
+        # incremented on each change
+        self.version = 0
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._trees)
+
+    def _prepare_change(self):
+        """
+        Copy the current version if it is shared with a snapshot (lock must be held)
+        """
+        if self._frozen:
+            self._trees = dict(self._trees)
+            self._frozen = False
+        self.version += 1
+
+    def set(self, tree, metric_preference, route_metric):
+        """
+        Router is Upstream regarding tree (or changed its RPC)
+        """
+        value = (metric_preference, route_metric)
+        with self._lock:
+            if self._trees.get(tree, None) == value:
+                return
+            self._prepare_change()
+            self._trees[tree] = value
+
+    def remove(self, tree):
+        """
+        Router is no longer Upstream regarding tree
+        """
+        with self._lock:
+            if tree not in self._trees:
+                return
+            self._prepare_change()
+            del self._trees[tree]
+
+    def snapshot(self):
+        """
+        Get (version, trees) of the current version... trees is a dictionary that must not be modified
+        KEY : (source_ip, group_ip), VALUE : (metric_preference, route_metric)
+        """
+        with self._lock:
+            self._frozen = True
+            return (self.version, self._trees)
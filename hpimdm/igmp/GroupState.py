@@ -1,6 +1,6 @@
 import logging
 from threading import Lock
-from threading import Timer
+from hpimdm.TimerWheel import Timer
 
 from hpimdm.utils import TYPE_CHECKING
 from .wrapper import NoMembersPresent
@@ -44,7 +44,7 @@ class GroupState(object):
         Set membership state regarding this Group
         """
         self.state = state
-        self.group_state_logger.debug("change membership state to: " + state.print_state())
+        self.group_state_logger.debug("change membership state to: %s", state.print_state())
 
     ###########################################
     # Set timers
@@ -174,7 +174,7 @@ class GroupState(object):
         Notify all tree entries that IGMP considers to have hosts interested in this group
         """
         with self.multicast_interface_state_lock:
-            print("notify+", self.multicast_interface_state)
+            self.group_state_logger.debug("notify %d tree interfaces about members", len(self.multicast_interface_state))
             for interface_state in self.multicast_interface_state:
                 interface_state.notify_membership(has_members=True)
 
@@ -183,7 +183,7 @@ class GroupState(object):
         Notify all tree entries that IGMP considers to have not hosts interested in this group
         """
         with self.multicast_interface_state_lock:
-            print("notify-", self.multicast_interface_state)
+            self.group_state_logger.debug("notify %d tree interfaces about no members", len(self.multicast_interface_state))
             for interface_state in self.multicast_interface_state:
                 interface_state.notify_membership(has_members=False)
 
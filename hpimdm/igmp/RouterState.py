@@ -1,4 +1,4 @@
-from threading import Timer
+from hpimdm.TimerWheel import Timer
 import logging
 
 from hpimdm.packet.PacketIGMPHeader import PacketIGMPHeader
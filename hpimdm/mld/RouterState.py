@@ -1,5 +1,5 @@
 import logging
-from threading import Timer
+from hpimdm.TimerWheel import Timer
 
 from hpimdm.utils import TYPE_CHECKING
 from hpimdm.rwlock.RWLock import RWLockWrite
@@ -3,6 +3,8 @@ from .PacketPayload import PacketPayload
 
 
 class Packet(object):
+    __slots__ = ('ip_header', 'payload')
+
     def __init__(self, ip_header: PacketIpHeader = None, payload: PacketPayload = None):
         self.ip_header = ip_header
         self.payload = payload
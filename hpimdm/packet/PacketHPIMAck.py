@@ -1,3 +1,4 @@
+import json
 import struct
 import socket
 
@@ -67,6 +68,9 @@ class PacketHPIMAckJson:
 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
 '''
 class PacketHPIMAck:
+    __slots__ = ('source', 'group', 'neighbor_boot_time', 'sequence_number', 'neighbor_snapshot_sn',
+                 'my_snapshot_sn')
+
     PIM_TYPE = 6
 
     PIM_HDR_ACK = "! 4s 4s L L L L"
@@ -112,9 +116,151 @@ class PacketHPIMAck:
 
 
 class PacketHPIMAck_v6(PacketHPIMAck):
+    __slots__ = ()
+
     PIM_HDR_ACK = "! 16s 16s L L L L"
     PIM_HDR_ACK_LEN = struct.calcsize(PIM_HDR_ACK)
     FAMILY = socket.AF_INET6
 
     def __init__(self, source_ip, group_ip, sequence_number, neighbor_boot_time=0, neighbor_snapshot_sn=0, my_snapshot_sn=0):
         super().__init__(source_ip, group_ip, sequence_number, neighbor_boot_time, neighbor_snapshot_sn, my_snapshot_sn)
+
+
+###########################################################################################################
+# JSON FORMAT
+###########################################################################################################
+class PacketHPIMMultiAckJson:
+    PIM_TYPE = "MULTI_ACK"
+
+    # upper bound of the length of each acknowledged tree (IPv6 addresses with the highest SN)
+    ENTRY_MAX_LEN = 140
+
+    def __init__(self, neighbor_boot_time=0, neighbor_snapshot_sn=0, my_snapshot_sn=0, entries=None):
+        self.neighbor_boot_time = neighbor_boot_time
+        self.neighbor_snapshot_sn = neighbor_snapshot_sn
+        self.my_snapshot_sn = my_snapshot_sn
+        # list of (source, group, sequence_number)
+        self.entries = entries if entries is not None else []
+
+    def add_entry(self, source, group, sequence_number):
+        self.entries.append((source, group, sequence_number))
+
+    @classmethod
+    def max_entries(cls, max_size):
+        """
+        Number of acknowledged trees that fit in max_size bytes (JSON)
+        """
+        return max(1, (max_size - len(json.dumps(cls().bytes()))) // cls.ENTRY_MAX_LEN)
+
+    def bytes(self) -> dict:
+        """
+        Obtain Packet MultiAck in a format to be transmitted (JSON)
+        """
+        msg = {"NEIGHBOR_BOOT_TIME": self.neighbor_boot_time,
+               "NEIGHBOR_SNAPSHOT_SN": self.neighbor_snapshot_sn,
+               "MY_SNAPSHOT_SN": self.my_snapshot_sn,
+               "ACKS": [{"SOURCE": source, "GROUP": group, "SN": sn} for (source, group, sn) in self.entries]
+              }
+
+        return msg
+
+    def __len__(self):
+        return len(self.bytes())
+
+    @classmethod
+    def parse_bytes(cls, data: dict):
+        """
+        Parse received Packet from JSON and create ProtocolMultiAck object
+        """
+        nbt = data["NEIGHBOR_BOOT_TIME"]
+        nssn = data["NEIGHBOR_SNAPSHOT_SN"]
+        mssn = data["MY_SNAPSHOT_SN"]
+        entries = [(entry["SOURCE"], entry["GROUP"], entry["SN"]) for entry in data["ACKS"]]
+        return cls(nbt, nssn, mssn, entries)
+
+
+###########################################################################################################
+# BINARY FORMAT
+###########################################################################################################
+'''
+ 0                   1                   2                   3
+ 0 1 2 3 4 5 6 7 8 9 0 1 2 3 4 5 6 7 8 9 0 1 2 3 4 5 6 7 8 9 0 1
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|                       Neighbor BootTime                       |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|                       NeighborSnapshotSN                      |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|                          MySnapshotSN                         |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|                        Tree Source IP                         |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|                         Tree Group IP                         |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|                     Neighbor Sequence Number                  |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|                              ...                              |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+'''
+class PacketHPIMMultiAck:
+    __slots__ = ('neighbor_boot_time', 'neighbor_snapshot_sn', 'my_snapshot_sn', 'entries')
+
+    PIM_TYPE = 8
+
+    PIM_HDR_MULTI_ACK = "! L L L"
+    PIM_HDR_MULTI_ACK_LEN = struct.calcsize(PIM_HDR_MULTI_ACK)
+    PIM_HDR_MULTI_ACK_ENTRY = "! 4s 4s L"
+    PIM_HDR_MULTI_ACK_ENTRY_LEN = struct.calcsize(PIM_HDR_MULTI_ACK_ENTRY)
+    FAMILY = socket.AF_INET
+
+    def __init__(self, neighbor_boot_time=0, neighbor_snapshot_sn=0, my_snapshot_sn=0, entries=None):
+        self.neighbor_boot_time = neighbor_boot_time
+        self.neighbor_snapshot_sn = neighbor_snapshot_sn
+        self.my_snapshot_sn = my_snapshot_sn
+        # list of (source, group, sequence_number)
+        self.entries = entries if entries is not None else []
+
+    def add_entry(self, source, group, sequence_number):
+        self.entries.append((source, group, sequence_number))
+
+    @classmethod
+    def max_entries(cls, max_size):
+        """
+        Number of acknowledged trees that fit in max_size bytes (binary)
+        """
+        return max(1, (max_size - cls.PIM_HDR_MULTI_ACK_LEN) // cls.PIM_HDR_MULTI_ACK_ENTRY_LEN)
+
+    def bytes(self) -> bytes:
+        """
+        Obtain Packet MultiAck in a format to be transmitted (binary)
+        """
+        msg = [struct.pack(self.PIM_HDR_MULTI_ACK, self.neighbor_boot_time, self.neighbor_snapshot_sn,
+                           self.my_snapshot_sn)]
+        for (source, group, sn) in self.entries:
+            msg.append(struct.pack(self.PIM_HDR_MULTI_ACK_ENTRY, socket.inet_pton(self.FAMILY, source),
+                                   socket.inet_pton(self.FAMILY, group), sn))
+
+        return b''.join(msg)
+
+    def __len__(self):
+        return self.PIM_HDR_MULTI_ACK_LEN + len(self.entries) * self.PIM_HDR_MULTI_ACK_ENTRY_LEN
+
+    @classmethod
+    def parse_bytes(cls, data: bytes):
+        """
+        Parse received Packet from bits/bytes and convert them into ProtocolMultiAck object
+        """
+        (neighbor_boot_time, neighbor_snapshot_sn, my_snapshot_sn) = \
+            struct.unpack(cls.PIM_HDR_MULTI_ACK, data[:cls.PIM_HDR_MULTI_ACK_LEN])
+        entries = []
+        for (tree_source, tree_group, sn) in struct.iter_unpack(cls.PIM_HDR_MULTI_ACK_ENTRY,
+                                                                 data[cls.PIM_HDR_MULTI_ACK_LEN:]):
+            entries.append((socket.inet_ntop(cls.FAMILY, tree_source), socket.inet_ntop(cls.FAMILY, tree_group), sn))
+        return cls(neighbor_boot_time, neighbor_snapshot_sn, my_snapshot_sn, entries)
+
+
+class PacketHPIMMultiAck_v6(PacketHPIMMultiAck):
+    __slots__ = ()
+
+    PIM_HDR_MULTI_ACK_ENTRY = "! 16s 16s L"
+    PIM_HDR_MULTI_ACK_ENTRY_LEN = struct.calcsize(PIM_HDR_MULTI_ACK_ENTRY)
+    FAMILY = socket.AF_INET6
@@ -0,0 +1,141 @@
+import json
+import struct
+from .PacketHPIMIamUpstream import PacketHPIMUpstreamJson, PacketHPIMUpstream, PacketHPIMUpstream_v6
+from .PacketHPIMNotUpstream import PacketHPIMNoLongerUpstreamJson, PacketHPIMNoLongerUpstream,\
+    PacketHPIMNoLongerUpstream_v6
+from .PacketHPIMInterest import PacketHPIMInterestJson, PacketHPIMNoInterestJson, PacketHPIMInterest,\
+    PacketHPIMNoInterest, PacketHPIMInterest_v6, PacketHPIMNoInterest_v6
+from .PacketHPIMAck import PacketHPIMAckJson, PacketHPIMAck, PacketHPIMAck_v6
+
+
+###########################################################################################################
+# JSON FORMAT
+###########################################################################################################
+class PacketHPIMBundleJson:
+    PIM_TYPE = "BUNDLE"
+
+    MSG_TYPES = {"I_AM_UPSTREAM": PacketHPIMUpstreamJson,
+                 "I_AM_NO_LONGER_UPSTREAM": PacketHPIMNoLongerUpstreamJson,
+                 "INTEREST": PacketHPIMInterestJson,
+                 "NO_INTEREST": PacketHPIMNoInterestJson,
+                 "ACK": PacketHPIMAckJson,
+                 }
+
+    def __init__(self, messages=None):
+        self.messages = messages if messages is not None else []
+
+    def add_message(self, msg):
+        self.messages.append(msg)
+
+    @staticmethod
+    def record_length(msg):
+        """
+        Number of bytes that msg occupies in a bundle (JSON)
+        """
+        return len(json.dumps({"TYPE": msg.PIM_TYPE, "DATA": msg.bytes()})) + 2
+
+    def bytes(self) -> list:
+        """
+        Obtain Protocol Bundle Packet in a format to be transmitted (JSON)
+        """
+        return [{"TYPE": msg.PIM_TYPE, "DATA": msg.bytes()} for msg in self.messages]
+
+    @classmethod
+    def parse_bytes(cls, data: list):
+        """
+        Parse received Protocol Bundle Packet from JSON format and convert it into ProtocolBundle object
+        (messages of unknown types are ignored)
+        """
+        bundle = cls()
+        for record in data:
+            msg_class = cls.MSG_TYPES.get(record["TYPE"], None)
+            if msg_class is not None:
+                bundle.add_message(msg_class.parse_bytes(record["DATA"]))
+        return bundle
+
+
+###########################################################################################################
+# BINARY FORMAT
+###########################################################################################################
+'''
+ 0                   1                   2                   3
+ 0 1 2 3 4 5 6 7 8 9 0 1 2 3 4 5 6 7 8 9 0 1 2 3 4 5 6 7 8 9 0 1
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|     Type      |   Reserved    |            Length             |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|          Message (IamUpstream/IamNoLongerUpstream/...)        |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|     Type      |   Reserved    |            Length             |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+|                              ...                              |
++-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+'''
+class PacketHPIMBundle:
+    __slots__ = ('messages',)
+
+    PIM_TYPE = 7
+
+    PIM_HDR_RECORD = "! B B H"
+    PIM_HDR_RECORD_LEN = struct.calcsize(PIM_HDR_RECORD)
+
+    MSG_TYPES = {PacketHPIMUpstream.PIM_TYPE: PacketHPIMUpstream,
+                 PacketHPIMNoLongerUpstream.PIM_TYPE: PacketHPIMNoLongerUpstream,
+                 PacketHPIMInterest.PIM_TYPE: PacketHPIMInterest,
+                 PacketHPIMNoInterest.PIM_TYPE: PacketHPIMNoInterest,
+                 PacketHPIMAck.PIM_TYPE: PacketHPIMAck,
+                 }
+
+    def __init__(self, messages=None):
+        self.messages = messages if messages is not None else []
+
+    def add_message(self, msg):
+        self.messages.append(msg)
+
+    @classmethod
+    def record_length(cls, msg):
+        """
+        Number of bytes that msg occupies in a bundle (binary)
+        """
+        return cls.PIM_HDR_RECORD_LEN + len(msg)
+
+    def bytes(self) -> bytes:
+        """
+        Obtain Protocol Bundle Packet in a format to be transmitted (binary)
+        """
+        records = []
+        for msg in self.messages:
+            data = msg.bytes()
+            records.append(struct.pack(self.PIM_HDR_RECORD, msg.PIM_TYPE, 0, len(data)))
+            records.append(data)
+        return b''.join(records)
+
+    def __len__(self):
+        return len(self.bytes())
+
+    @classmethod
+    def parse_bytes(cls, data: bytes):
+        """
+        Parse received Protocol Bundle Packet from binary format and convert it into ProtocolBundle object
+        (messages of unknown types are ignored)
+        """
+        bundle = cls()
+        offset = 0
+        while offset + cls.PIM_HDR_RECORD_LEN <= len(data):
+            (msg_type, _, length) = struct.unpack(cls.PIM_HDR_RECORD, data[offset:offset + cls.PIM_HDR_RECORD_LEN])
+            offset += cls.PIM_HDR_RECORD_LEN
+            msg_class = cls.MSG_TYPES.get(msg_type, None)
+            if msg_class is not None:
+                bundle.add_message(msg_class.parse_bytes(data[offset:offset + length]))
+            offset += length
+        return bundle
+
+
+class PacketHPIMBundle_v6(PacketHPIMBundle):
+    __slots__ = ()
+
+    MSG_TYPES = {PacketHPIMUpstream_v6.PIM_TYPE: PacketHPIMUpstream_v6,
+                 PacketHPIMNoLongerUpstream_v6.PIM_TYPE: PacketHPIMNoLongerUpstream_v6,
+                 PacketHPIMInterest_v6.PIM_TYPE: PacketHPIMInterest_v6,
+                 PacketHPIMNoInterest_v6.PIM_TYPE: PacketHPIMNoInterest_v6,
+                 PacketHPIMAck_v6.PIM_TYPE: PacketHPIMAck_v6,
+                 }
@@ -6,8 +6,10 @@ from .PacketHPIMNotUpstream import PacketHPIMNoLongerUpstreamJson, PacketHPIMNoL
     PacketHPIMNoLongerUpstream_v6
 from .PacketHPIMInterest import PacketHPIMInterestJson, PacketHPIMNoInterestJson, PacketHPIMInterest,\
     PacketHPIMNoInterest, PacketHPIMInterest_v6, PacketHPIMNoInterest_v6
-from .PacketHPIMAck import PacketHPIMAckJson, PacketHPIMAck, PacketHPIMAck_v6
+from .PacketHPIMAck import PacketHPIMAckJson, PacketHPIMAck, PacketHPIMAck_v6, PacketHPIMMultiAckJson,\
+    PacketHPIMMultiAck, PacketHPIMMultiAck_v6
 from .PacketHPIMSync import PacketHPIMSyncJson, PacketHPIMSync, PacketHPIMSync_v6
+from .PacketHPIMBundle import PacketHPIMBundleJson, PacketHPIMBundle, PacketHPIMBundle_v6
 
 from .PacketPayload import PacketPayload
 '''
@@ -24,6 +26,8 @@ class PacketHPIMHeaderJson(PacketPayload):
                      "I_AM_NO_LONGER_UPSTREAM": PacketHPIMNoLongerUpstreamJson,
                      "ACK": PacketHPIMAckJson,
                      "SYNC": PacketHPIMSyncJson,
+                     "BUNDLE": PacketHPIMBundleJson,
+                     "MULTI_ACK": PacketHPIMMultiAckJson,
                     }
 
     def __init__(self, payload, boot_time=0):
@@ -56,12 +60,10 @@ class PacketHPIMHeaderJson(PacketPayload):
         msg = json.loads(data.decode())
 
         pkt_type = msg["TYPE"]
-        print("TYPE", pkt_type)
 
         id_reliable = msg["BOOT_TIME"]
 
         pim_payload = msg["DATA"]
-        print("DATA", pim_payload)
         pim_payload = PacketHPIMHeaderJson.PIM_MSG_TYPES[pkt_type].parse_bytes(pim_payload)
         return PacketHPIMHeaderJson(pim_payload, id_reliable)
 
@@ -93,6 +95,8 @@ class PacketHPIMHeader(PacketPayload):
                      PacketHPIMInterest.PIM_TYPE: PacketHPIMInterest,
                      PacketHPIMNoInterest.PIM_TYPE: PacketHPIMNoInterest,
                      PacketHPIMAck.PIM_TYPE: PacketHPIMAck,
+                     PacketHPIMBundle.PIM_TYPE: PacketHPIMBundle,
+                     PacketHPIMMultiAck.PIM_TYPE: PacketHPIMMultiAck,
                      }
 
     def __init__(self, payload, boot_time=0, security_id=0, security_length=0, security_value=b''):
@@ -136,22 +140,17 @@ class PacketHPIMHeader(PacketPayload):
         """
         Parse received Packet from bits/bytes and convert them into Header object... also parse Header's payload
         """
-        print("parsePimHdr: ", data)
-
         pim_hdr = data[0:cls.PIM_HDR_LEN]
         (boot_time, pim_ver_type, security_id, security_len) = struct.unpack(cls.PIM_HDR, pim_hdr)
 
-        print(pim_ver_type)
         pim_version = (pim_ver_type & 0xF0) >> 4
         pim_type = pim_ver_type & 0x0F
 
         if pim_version != cls.PIM_VERSION:
-            print("Version of PROTOCOL packet received not known (!=0)")
-            raise Exception
+            raise Exception("Version of PROTOCOL packet received not known (!=0)")
 
         security_and_pim_payload = data[cls.PIM_HDR_LEN:]
         security_value = security_and_pim_payload[:security_len]
-        print("Received hmac value: ", security_value)
         pim_payload = security_and_pim_payload[security_len:]
         pim_payload = cls.PIM_MSG_TYPES[pim_type].parse_bytes(pim_payload)
         return PacketHPIMHeader(pim_payload, boot_time, security_id, security_len, security_value)
@@ -165,6 +164,8 @@ class PacketHPIMHeader_v6(PacketHPIMHeader):
                      PacketHPIMInterest.PIM_TYPE: PacketHPIMInterest_v6,
                      PacketHPIMNoInterest.PIM_TYPE: PacketHPIMNoInterest_v6,
                      PacketHPIMAck.PIM_TYPE: PacketHPIMAck_v6,
+                     PacketHPIMBundle.PIM_TYPE: PacketHPIMBundle_v6,
+                     PacketHPIMMultiAck.PIM_TYPE: PacketHPIMMultiAck_v6,
                      }
 
     def __init__(self, payload, boot_time=0, security_id=0, security_length=0, security_value=b''):
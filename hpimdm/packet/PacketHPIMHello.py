@@ -114,7 +114,6 @@ class PacketHPIMHello:
         """
         protocol_payload = PacketHPIMHello()
         while data != b'':
-            print("DATA", data)
             option = PacketHPIMHelloOptions.parse_bytes(data)
             option_length = len(option)
             data = data[option_length:]
@@ -100,6 +100,84 @@ class PacketHPIMHelloCheckpointSNJson(PacketHPIMHelloOptionsJson):
         return PacketHPIMHelloCheckpointSNJson(checkpoint_sn=checkpoint_sn)
 
 
+class PacketHPIMHelloSyncWindowJson(PacketHPIMHelloOptionsJson):
+    '''
+     0                   1                   2                   3
+     0 1 2 3 4 5 6 7 8 9 0 1 2 3 4 5 6 7 8 9 0 1 2 3 4 5 6 7 8 9 0 1
+    +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+    |          Sync Window          |
+    +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+    '''
+    def __init__(self, sync_window: int):
+        super().__init__(hello_type="SYNC_WINDOW")
+        self.sync_window = sync_window
+
+    def bytes(self) -> dict:
+        """
+        Obtain Protocol Hello Option SyncWindow in a format to be transmitted (JSON)
+        This method will return the Hello Option in JSON format
+        """
+        return {"SYNC_WINDOW": self.sync_window}
+
+    @staticmethod
+    def parse_bytes(data, hello_type: int = None):
+        """
+        Parse received Hello Option SyncWindow from JSON and convert it into Hello object
+        """
+        if hello_type is None:
+            raise Exception
+        sync_window = data
+        return PacketHPIMHelloSyncWindowJson(sync_window=sync_window)
+
+
+class PacketHPIMHelloBundleJson(PacketHPIMHelloOptionsJson):
+    '''
+    Option without value... the neighbor is able to receive Bundle messages
+    '''
+    def __init__(self):
+        super().__init__(hello_type="BUNDLE")
+
+    def bytes(self) -> dict:
+        """
+        Obtain Protocol Hello Option Bundle in a format to be transmitted (JSON)
+        This method will return the Hello Option in JSON format
+        """
+        return {"BUNDLE": True}
+
+    @staticmethod
+    def parse_bytes(data, hello_type: int = None):
+        """
+        Parse received Hello Option Bundle from JSON and convert it into Hello object
+        """
+        if hello_type is None:
+            raise Exception
+        return PacketHPIMHelloBundleJson()
+
+
+class PacketHPIMHelloMultiAckJson(PacketHPIMHelloOptionsJson):
+    '''
+    Option without value... the neighbor is able to receive MultiAck messages
+    '''
+    def __init__(self):
+        super().__init__(hello_type="MULTI_ACK")
+
+    def bytes(self) -> dict:
+        """
+        Obtain Protocol Hello Option MultiAck in a format to be transmitted (JSON)
+        This method will return the Hello Option in JSON format
+        """
+        return {"MULTI_ACK": True}
+
+    @staticmethod
+    def parse_bytes(data, hello_type: int = None):
+        """
+        Parse received Hello Option MultiAck from JSON and convert it into Hello object
+        """
+        if hello_type is None:
+            raise Exception
+        return PacketHPIMHelloMultiAckJson()
+
+
 class PacketHPIMHelloUnknownJson(PacketHPIMHelloOptionsJson):
     '''
      0                   1                   2                   3
@@ -130,6 +208,9 @@ class PacketHPIMHelloUnknownJson(PacketHPIMHelloOptionsJson):
 
 JSON_MSG_TYPES = {"HOLDTIME": PacketHPIMHelloHoldtimeJson,
                   "CHECKPOINT_SN": PacketHPIMHelloCheckpointSNJson,
+                  "SYNC_WINDOW": PacketHPIMHelloSyncWindowJson,
+                  "BUNDLE": PacketHPIMHelloBundleJson,
+                  "MULTI_ACK": PacketHPIMHelloMultiAckJson,
                  }
 
 
@@ -203,7 +284,6 @@ class PacketHPIMHelloHoldtime(PacketHPIMHelloOptions):
         if hello_type is None or length is None:
             raise Exception
         (holdtime, ) = struct.unpack(PacketHPIMHelloHoldtime.PIM_HDR_OPT, data[:length])
-        print("HOLDTIME:", holdtime)
         return PacketHPIMHelloHoldtime(holdtime=holdtime)
 
 
@@ -237,10 +317,78 @@ class PacketHPIMHelloCheckpointSN(PacketHPIMHelloOptions):
         if hello_type is None or length is None:
             raise Exception
         (checkpoint_sn, ) = struct.unpack(PacketHPIMHelloCheckpointSN.PIM_HDR_OPT, data[:length])
-        print("CheckpointSN:", checkpoint_sn)
         return PacketHPIMHelloCheckpointSN(checkpoint_sn=checkpoint_sn)
 
 
+class PacketHPIMHelloSyncWindow(PacketHPIMHelloOptions):
+    TYPE = "SYNC_WINDOW"
+    PIM_HDR_OPT = "! H"
+    PIM_HDR_OPT_LEN = struct.calcsize(PIM_HDR_OPT)
+    '''
+     0                   1                   2                   3
+     0 1 2 3 4 5 6 7 8 9 0 1 2 3 4 5 6 7 8 9 0 1 2 3 4 5 6 7 8 9 0 1
+    +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+    |          Sync Window          |
+    +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+    '''
+    def __init__(self, sync_window: int):
+        super().__init__(hello_type=3, length=2)
+        self.sync_window = sync_window
+
+    def bytes(self) -> bytes:
+        """
+        Obtain Protocol Hello SyncWindow Option in a format to be transmitted (binary)
+        This method will return the Hello Option in binary format
+        """
+        return super().bytes() + struct.pack(self.PIM_HDR_OPT, self.sync_window)
+
+    @staticmethod
+    def parse_bytes(data: bytes, hello_type: int = None, length: int = None):
+        """
+        Parse received Hello Option SyncWindow from binary and convert it into Hello object
+        """
+        if hello_type is None or length is None:
+            raise Exception
+        (sync_window, ) = struct.unpack(PacketHPIMHelloSyncWindow.PIM_HDR_OPT, data[:length])
+        return PacketHPIMHelloSyncWindow(sync_window=sync_window)
+
+
+class PacketHPIMHelloBundle(PacketHPIMHelloOptions):
+    TYPE = "BUNDLE"
+    '''
+    Option without value (Length 0)... the neighbor is able to receive Bundle messages
+    '''
+    def __init__(self):
+        super().__init__(hello_type=4, length=0)
+
+    @staticmethod
+    def parse_bytes(data: bytes, hello_type: int = None, length: int = None):
+        """
+        Parse received Hello Option Bundle from binary and convert it into Hello object
+        """
+        if hello_type is None or length is None:
+            raise Exception
+        return PacketHPIMHelloBundle()
+
+
+class PacketHPIMHelloMultiAck(PacketHPIMHelloOptions):
+    TYPE = "MULTI_ACK"
+    '''
+    Option without value (Length 0)... the neighbor is able to receive MultiAck messages
+    '''
+    def __init__(self):
+        super().__init__(hello_type=5, length=0)
+
+    @staticmethod
+    def parse_bytes(data: bytes, hello_type: int = None, length: int = None):
+        """
+        Parse received Hello Option MultiAck from binary and convert it into Hello object
+        """
+        if hello_type is None or length is None:
+            raise Exception
+        return PacketHPIMHelloMultiAck()
+
+
 class PacketHPIMHelloUnknown(PacketHPIMHelloOptions):
     TYPE = "UNKNOWN"
     PIM_HDR_OPT = "! L"
@@ -275,4 +423,7 @@ class PacketHPIMHelloUnknown(PacketHPIMHelloOptions):
 
 NEW_PROTOCOL_MSG_TYPES = {1: PacketHPIMHelloHoldtime,
                           2: PacketHPIMHelloCheckpointSN,
+                          3: PacketHPIMHelloSyncWindow,
+                          4: PacketHPIMHelloBundle,
+                          5: PacketHPIMHelloMultiAck,
                          }
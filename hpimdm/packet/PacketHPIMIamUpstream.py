@@ -60,6 +60,8 @@ class PacketHPIMUpstreamJson():
 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
 '''
 class PacketHPIMUpstream:
+    __slots__ = ('source', 'group', 'metric', 'metric_preference', 'sequence_number')
+
     PIM_TYPE = 2
 
     PIM_HDR_INSTALL = "! 4s 4s L L L"
@@ -104,6 +106,8 @@ class PacketHPIMUpstream:
 
 
 class PacketHPIMUpstream_v6(PacketHPIMUpstream):
+    __slots__ = ()
+
     PIM_HDR_INSTALL = "! 16s 16s L L L"
     PIM_HDR_INSTALL_LEN = struct.calcsize(PIM_HDR_INSTALL)
     FAMILY = socket.AF_INET6
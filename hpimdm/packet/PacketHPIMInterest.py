@@ -58,6 +58,8 @@ class PacketHPIMNoInterestJson(PacketHPIMInterestJson):
 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
 '''
 class PacketHPIMInterest:
+    __slots__ = ('source', 'group', 'sequence_number')
+
     PIM_TYPE = 4
 
     PIM_HDR_INTEREST = "! 4s 4s L"
@@ -98,6 +100,8 @@ class PacketHPIMInterest:
 
 
 class PacketHPIMNoInterest(PacketHPIMInterest):
+    __slots__ = ()
+
     PIM_TYPE = 5
 
     def __init__(self, source_ip, group_ip, sequence_number):
@@ -105,6 +109,8 @@ class PacketHPIMNoInterest(PacketHPIMInterest):
 
 
 class PacketHPIMInterest_v6(PacketHPIMInterest):
+    __slots__ = ()
+
     PIM_HDR_INTEREST = "! 16s 16s L"
     PIM_HDR_INTEREST_LEN = struct.calcsize(PIM_HDR_INTEREST)
     FAMILY = socket.AF_INET6
@@ -114,6 +120,8 @@ class PacketHPIMInterest_v6(PacketHPIMInterest):
 
 
 class PacketHPIMNoInterest_v6(PacketHPIMNoInterest):
+    __slots__ = ()
+
     PIM_HDR_INTEREST = "! 16s 16s L"
     PIM_HDR_INTEREST_LEN = struct.calcsize(PIM_HDR_INTEREST)
     FAMILY = socket.AF_INET6
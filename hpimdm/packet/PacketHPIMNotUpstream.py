@@ -27,6 +27,8 @@ class PacketHPIMNoLongerUpstreamJson(PacketHPIMInterestJson):
 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
 '''
 class PacketHPIMNoLongerUpstream(PacketHPIMInterest):
+    __slots__ = ()
+
     PIM_TYPE = 3
 
     def __init__(self, source_ip, group_ip, sequence_number):
@@ -34,6 +36,8 @@ class PacketHPIMNoLongerUpstream(PacketHPIMInterest):
 
 
 class PacketHPIMNoLongerUpstream_v6(PacketHPIMNoLongerUpstream):
+    __slots__ = ()
+
     PIM_HDR_INTEREST = "! 16s 16s L"
     PIM_HDR_INTEREST_LEN = struct.calcsize(PIM_HDR_INTEREST)
     FAMILY = socket.AF_INET6
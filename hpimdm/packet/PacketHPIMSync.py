@@ -39,6 +39,22 @@ class PacketHPIMSyncEntryJson():
     def __len__(self):
         return len(json.dumps(self.bytes()).encode())
 
+    @classmethod
+    def encode_entries(cls, trees):
+        """
+        Create entries of all trees of a snapshot
+        trees is a list of ((source, group), (metric_preference, metric))
+        """
+        return [cls(source, group, metric_preference, metric)
+                for ((source, group), (metric_preference, metric)) in trees]
+
+    @staticmethod
+    def get_entries_fragment(encoded_entries, start, end):
+        """
+        Get entries of trees with index between start and end (not included) of encoded_entries
+        """
+        return encoded_entries[start:end]
+
 
 class PacketHPIMSyncJson():
     PIM_TYPE = "SYNC"
@@ -124,6 +140,8 @@ class PacketHPIMSyncJson():
 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
 '''
 class PacketHPIMSyncEntry:
+    __slots__ = ('source', 'group', 'metric', 'metric_preference')
+
     PIM_HDR_SYNC_ENTRY = "! 4s 4s L L"
     PIM_HDR_SYNC_ENTRY_LEN = struct.calcsize(PIM_HDR_SYNC_ENTRY)
     FAMILY = socket.AF_INET
@@ -162,8 +180,39 @@ class PacketHPIMSyncEntry:
                                                                    data[:cls.PIM_HDR_SYNC_ENTRY_LEN])
         return cls(source, group, metric_preference, metric)
 
+    @classmethod
+    def encode_entries(cls, trees):
+        """
+        Encode all trees of a snapshot in a single buffer (entries are stored contiguously in binary format)
+        trees is a list of ((source, group), (metric_preference, metric))
+        """
+        entry_struct = struct.Struct(cls.PIM_HDR_SYNC_ENTRY)
+        buffer = bytearray(entry_struct.size * len(trees))
+        # addresses of sources are shared by multiple trees
+        addresses = {}
+        offset = 0
+        for ((source, group), (metric_preference, metric)) in trees:
+            source_bytes = addresses.get(source, None)
+            if source_bytes is None:
+                source_bytes = socket.inet_pton(cls.FAMILY, source)
+                addresses[source] = source_bytes
+            entry_struct.pack_into(buffer, offset, source_bytes, socket.inet_pton(cls.FAMILY, group),
+                                   metric_preference, metric)
+            offset += entry_struct.size
+        return memoryview(bytes(buffer))
+
+    @classmethod
+    def get_entries_fragment(cls, encoded_entries, start, end):
+        """
+        Get entries of trees with index between start and end (not included) of encoded_entries
+        (slice of the buffer, without copying it)
+        """
+        return encoded_entries[start * cls.PIM_HDR_SYNC_ENTRY_LEN:end * cls.PIM_HDR_SYNC_ENTRY_LEN]
+
 
 class PacketHPIMSyncEntry_v6(PacketHPIMSyncEntry):
+    __slots__ = ()
+
     PIM_HDR_SYNC_ENTRY = "! 16s 16s L L"
     PIM_HDR_SYNC_ENTRY_LEN = struct.calcsize(PIM_HDR_SYNC_ENTRY)
     FAMILY = socket.AF_INET6
@@ -186,6 +235,7 @@ class PacketHPIMSyncEntry_v6(PacketHPIMSyncEntry):
 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
 |     Trees (equivalent to multiple IamUpstream messages)       |
 +-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+-+
+upstream_trees can be a list of PacketHPIMSyncEntry objects or already encoded entries (bytes/memoryview)
 '''
 class PacketHPIMSync:
     PIM_TYPE = 1
@@ -222,8 +272,10 @@ class PacketHPIMSync:
         msg = struct.pack(self.PIM_HDR_INSTALL_WITHOUT_TREES, self.my_snapshot_sn,
                           self.neighbor_snapshot_sn, self.neighbor_boot_time, flags_and_sync_sn)
         if self.more_flag:
-            for t in self.upstream_trees:
-                msg += t.bytes()
+            if isinstance(self.upstream_trees, (bytes, bytearray, memoryview)):
+                msg += self.upstream_trees
+            else:
+                msg += b''.join(t.bytes() for t in self.upstream_trees)
         else:
             for option in self.options.values():
                 msg += option.bytes()
@@ -24,7 +24,6 @@ class PacketIpHeader:
     def parse_bytes(data: bytes):
         (verhlen, ) = struct.unpack(PacketIpHeader.IP_HDR, data[:PacketIpHeader.IP_HDR_LEN])
         ver = (verhlen & 0xF0) >> 4
-        print("ver:", ver)
         return PACKET_HEADER.get(ver).parse_bytes(data)
 
 
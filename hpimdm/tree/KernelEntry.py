@@ -13,11 +13,12 @@ from .tree_if_root_originator import TreeInterfaceRootOriginator
 
 class KernelEntry:
     KERNEL_LOGGER = logging.getLogger('hpim.KernelEntry')
+    __slots__ = ('source_ip', 'group_ip', '_tree_state', '_interest_interface_state', '_upstream_interface_state',
+                 '_kernel_entry_interface', '_rpc', '_multicast_change', 'CHANGE_STATE_LOCK',
+                 'inbound_interface_index', 'interface_state', '_kernel_entry_logger')
 
     def __init__(self, source_ip: str, group_ip: str, upstream_state_dic, interest_state_dic, kernel_entry_interface):
-        self.kernel_entry_logger = logging.LoggerAdapter(self.KERNEL_LOGGER, {'tree': '(' + source_ip + ',' + group_ip + ')'})
-        self.kernel_entry_logger.debug('Create KernelEntry')
-
+        self._kernel_entry_logger = None
         self.source_ip = source_ip
         self.group_ip = group_ip
         self._tree_state = TreeState.Inactive
@@ -26,6 +27,8 @@ class KernelEntry:
         self._upstream_interface_state = upstream_state_dic
 
         self._kernel_entry_interface = kernel_entry_interface
+        if self.KERNEL_LOGGER.isEnabledFor(logging.DEBUG):
+            self.kernel_entry_logger.debug('Create KernelEntry')
 
         ###### UNICAST INFO#################################################################
         (metric_administrative_distance, metric_cost, is_directly_connected, root_if) = \
@@ -35,24 +38,38 @@ class KernelEntry:
         #######################################################################################
         # Locks
         self._multicast_change = Lock()
-        self._lock_test2 = RLock()
         self.CHANGE_STATE_LOCK = RLock()
 
         # select root interface based on rpf check
         self.inbound_interface_index = root_if
         self.interface_state = {}  # type: dict(int, TreeInterface)
 
+    @property
+    def kernel_entry_logger(self):
+        """
+        Logger of this tree (only created when it is used for the first time)
+        """
+        if self._kernel_entry_logger is None:
+            self._kernel_entry_logger = logging.LoggerAdapter(self.KERNEL_LOGGER, self.get_logger_extra())
+        return self._kernel_entry_logger
+
+    def get_logger_extra(self):
+        """
+        Get a new dict with the information of this tree to be included in log messages
+        """
+        return {'tree': '(' + self.source_ip + ',' + self.group_ip + ')'}
+
     def get_inbound_interface_index(self):
         """
         Get VIF of root interface of this tree
         """
         return self.inbound_interface_index
 
-    def get_outbound_interfaces_indexes(self):
+    def get_outbound_interfaces_mask(self):
         """
-        Get OIL of this tree
+        Get OIL of this tree as a bitmask of VIF indexes
         """
-        return self._kernel_entry_interface.get_outbound_interfaces_indexes(self)
+        return self._kernel_entry_interface.get_outbound_interfaces_mask(self)
 
     @abstractmethod
     def check_tree_state(self):
@@ -68,7 +85,6 @@ class KernelEntry:
         """
         Receive data packet regarding this tree in interface with VIF index
         """
-        print("recv data")
         self.interface_state[index].recv_data_msg()
 
     ###############################################################
@@ -81,14 +97,12 @@ class KernelEntry:
         """
         if index not in self.interface_state or self.is_tree_inactive():
             return
-        print("ENTER CHECK INTERFACE STATE")
         self._upstream_interface_state[index] = upstream_state
 
         self.interface_state[index].change_best_upstream_neighbor_state(upstream_state)
         self.check_interest_state(index, interest_state)
 
         self.check_tree_state()
-        print("EXIT CHECK INTERFACE STATE")
 
     def check_interest_state(self, index, interest_state):
         """
@@ -109,12 +123,10 @@ class KernelEntry:
         Reverify IGMP/MLD state of this tree in interface with VIF index...
         This is invoked whenever interface index enables or disables IGMP/MLD
         """
-        print("ENTER CHECK IGMP STATE")
         if index not in self.interface_state:
             return
 
         self.interface_state[index].check_membership_state()
-        print("EXIT CHECK IGMP STATE")
 
     def get_interface_sync_state(self, vif_index):
         """
@@ -149,7 +161,8 @@ class KernelEntry:
         Set tree state (Active/Unsure/Inactive)
         """
         with self.CHANGE_STATE_LOCK:
-            self.kernel_entry_logger.debug('Tree transitions to ' + str(tree_state))
+            if self.KERNEL_LOGGER.isEnabledFor(logging.DEBUG):
+                self.kernel_entry_logger.debug('Tree transitions to %s', tree_state)
             self._tree_state = tree_state
 
     ###############################################################
@@ -198,6 +211,12 @@ class KernelEntry:
             if self.inbound_interface_index is not None and not self.is_tree_inactive():
                 self.get_kernel().set_multicast_route(self)
 
+    def get_multicast_change_lock(self):
+        """
+        Get lock that protects the IIF/OIL of this tree while the multicast routing table is programmed
+        """
+        return self._multicast_change
+
     def remove_entry(self):
         """
         Remove entry from the multicast routing table
@@ -269,6 +288,8 @@ class KernelEntry:
 
 
 class KernelEntryNonOriginator(KernelEntry):
+    __slots__ = ('_was_in_tree',)
+
     def __init__(self, source_ip: str, group_ip: str, upstream_state_dic, interest_state_dic, kernel_entry_interface):
         super().__init__(source_ip, group_ip, upstream_state_dic, interest_state_dic, kernel_entry_interface)
 
@@ -293,8 +314,7 @@ class KernelEntryNonOriginator(KernelEntry):
                                                                        current_tree_state=self._tree_state)
 
                 except:
-                    import traceback
-                    print(traceback.print_exc())
+                    self.kernel_entry_logger.exception('Unable to create tree interface in vif %d', i)
                     continue
             self._was_in_tree = self.is_in_tree()
             upstream_state = self._upstream_interface_state.get(self.inbound_interface_index, None)
@@ -305,7 +325,8 @@ class KernelEntryNonOriginator(KernelEntry):
 
         self.change()
         self.evaluate_in_tree_change()
-        print('Tree NonOriginator created')
+        if self.KERNEL_LOGGER.isEnabledFor(logging.DEBUG):
+            self.kernel_entry_logger.debug('Tree NonOriginator created')
 
     def check_tree_state(self):
         """
@@ -318,14 +339,11 @@ class KernelEntryNonOriginator(KernelEntry):
                     (not self._rpc.is_better_than(self._upstream_interface_state.get(self.inbound_interface_index))
                      and self._rpc != self._upstream_interface_state.get(self.inbound_interface_index)):
                 # tree is Active
-                print("PARA ACTIVE")
                 self._tree_state.transition_to_active(self)
             elif len(self.interface_state) > 0 and \
                     not all(value is None for value in self._upstream_interface_state.values()):
-                print("PARA UNSURE")
                 self._tree_state.transition_to_unsure(self)
             else:
-                print("PARA INACTIVE")
                 self._tree_state.transition_to_inactive(self)
 
     def first_check_tree_state(self):
@@ -337,14 +355,11 @@ class KernelEntryNonOriginator(KernelEntry):
                 (not self._rpc.is_better_than(self._upstream_interface_state.get(self.inbound_interface_index))
                  and self._rpc != self._upstream_interface_state.get(self.inbound_interface_index)):
             # tree is Active
-            print("PARA ACTIVE")
             self.set_tree_state(TreeState.Active)
         elif not all(value is None for value in self._upstream_interface_state.values()):
-            print("PARA UNSURE")
             # tree is Unsure
             self.set_tree_state(TreeState.Unsure)
         else:
-            print("PARA INACTIVE")
             # tree is Inactive
             self.set_tree_state(TreeState.Inactive)
 
@@ -425,7 +440,7 @@ class KernelEntryNonOriginator(KernelEntry):
         """
         Evaluate if there is a change of interest from this router
         """
-        with self._lock_test2:
+        with self.CHANGE_STATE_LOCK:
             is_in_tree = self.is_in_tree()
             was_in_tree = self._was_in_tree
             self._was_in_tree = is_in_tree
@@ -442,9 +457,7 @@ class KernelEntryNonOriginator(KernelEntry):
         """
         New interface with VIF index added
         """
-        print("NEW_INTERFACE ANTES")
         with self.CHANGE_STATE_LOCK:
-            print("NEW_INTERFACE DEPOIS")
             if index in self.interface_state:
                 return
 
@@ -510,6 +523,7 @@ class KernelEntryNonOriginator(KernelEntry):
 
 class KernelEntryOriginator(KernelEntry):
     KERNEL_LOGGER = logging.getLogger('hpim.KernelEntryOriginator')
+    __slots__ = ('_was_in_tree', 'sat_is_running')
 
     def __init__(self, source_ip: str, group_ip: str, upstream_state_dic, interest_state_dic, kernel_entry_interface):
         super().__init__(source_ip, group_ip, upstream_state_dic, interest_state_dic, kernel_entry_interface)
@@ -534,8 +548,7 @@ class KernelEntryOriginator(KernelEntry):
                                                                        previous_tree_state=TreeState.Inactive,
                                                                        current_tree_state=self._tree_state)
                 except:
-                    import traceback
-                    print(traceback.print_exc())
+                    self.kernel_entry_logger.exception('Unable to create tree interface in vif %d', i)
                     continue
 
             if self.inbound_interface_index is not None:
@@ -544,23 +557,21 @@ class KernelEntryOriginator(KernelEntry):
 
         self.change()
         self.check_tree_state()
-        print('Tree Originator created')
+        if self.KERNEL_LOGGER.isEnabledFor(logging.DEBUG):
+            self.kernel_entry_logger.debug('Tree Originator created')
 
     def check_tree_state(self):
         """
         Verify if tree changes state (Active/Unsure/Inactive)
         """
         if self.inbound_interface_index is not None and self.sat_is_running and len(self.interface_state) > 0:
-            print("PARA ACTIVE")
             # tree is active
             self._tree_state.transition_to_active(self)
         elif len(self.interface_state) == 0 or\
                 (not self.sat_is_running and all(v is None for v in self._upstream_interface_state.values())):
             # tree is Inactive
-            print("PARA INACTIVE")
             self._tree_state.transition_to_inactive(self)
         elif self.inbound_interface_index is None or not self.sat_is_running:
-            print("PARA UNSURE")
             # tree is Unsure
             self._tree_state.transition_to_unsure(self)
 
@@ -652,9 +663,7 @@ class KernelEntryOriginator(KernelEntry):
         """
         New interface with VIF index added
         """
-        print("NEW_INTERFACE ANTES")
         with self.CHANGE_STATE_LOCK:
-            print("NEW_INTERFACE DEPOIS")
             if index in self.interface_state:
                 return
 
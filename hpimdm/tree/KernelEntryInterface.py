@@ -4,12 +4,15 @@ from abc import abstractmethod, ABCMeta
 
 class KernelEntryInterface(metaclass=ABCMeta):
     @staticmethod
-    @abstractmethod
-    def get_outbound_interfaces_indexes(kernel_tree):
+    def get_outbound_interfaces_mask(kernel_tree):
         """
-        Get OIL of this tree
+        Get OIL of this tree as a bitmask (bit i is set if the interface with VIF index i is forwarding)
         """
-        pass
+        outbound_mask = 0
+        for (index, state) in kernel_tree.interface_state.items():
+            if state.is_forwarding():
+                outbound_mask |= 1 << index
+        return outbound_mask
 
     @staticmethod
     @abstractmethod
@@ -45,16 +48,6 @@ class KernelEntryInterface(metaclass=ABCMeta):
 
 
 class KernelEntry4Interface(KernelEntryInterface):
-    @staticmethod
-    def get_outbound_interfaces_indexes(kernel_tree):
-        """
-        Get OIL of this tree
-        """
-        outbound_indexes = [0] * Main.kernel.MAXVIFS
-        for (index, state) in kernel_tree.interface_state.items():
-            outbound_indexes[index] = state.is_forwarding()
-        return outbound_indexes
-
     @staticmethod
     def get_interface_name(interface_id):
         """
@@ -87,16 +80,6 @@ class KernelEntry4Interface(KernelEntryInterface):
 
 
 class KernelEntry6Interface(KernelEntryInterface):
-    @staticmethod
-    def get_outbound_interfaces_indexes(kernel_tree):
-        """
-        Get OIL of this tree
-        """
-        outbound_indexes = [0] * 8
-        for (index, state) in kernel_tree.interface_state.items():
-            outbound_indexes[index // 32] |= state.is_forwarding() << (index % 32)
-        return outbound_indexes
-
     @staticmethod
     def get_interface_name(interface_id):
         """
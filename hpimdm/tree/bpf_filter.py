@@ -0,0 +1,93 @@
+import struct
+
+# Classic BPF instruction classes/modes (defined in linux/filter.h)
+BPF_LD = 0x00
+BPF_JMP = 0x05
+BPF_RET = 0x06
+BPF_H = 0x08
+BPF_B = 0x10
+BPF_ABS = 0x20
+BPF_JEQ = 0x10
+BPF_JGE = 0x30
+BPF_K = 0x00
+
+LD_H = BPF_LD | BPF_H | BPF_ABS
+LD_B = BPF_LD | BPF_B | BPF_ABS
+JEQ = BPF_JMP | BPF_JEQ | BPF_K
+JGE = BPF_JMP | BPF_JGE | BPF_K
+RET = BPF_RET | BPF_K
+
+# struct sock_filter {u16 code; u8 jt; u8 jf; u32 k;}
+SOCK_FILTER = struct.Struct("HBBI")
+
+ETH_P_IP = 0x0800
+ETH_P_IPV6 = 0x86DD
+IGMP_PROTOCOL = 2
+ICMPV6_PROTOCOL = 58
+IPV6_FRAGMENT_HEADER = 44
+SNAPLEN = 262144
+
+# Offsets in Ethernet frames
+ETHERTYPE_OFFSET = 12
+IPV4_PROTOCOL_OFFSET = 14 + 9
+IPV4_DST_OFFSET = 14 + 16
+IPV6_NEXT_HEADER_OFFSET = 14 + 6
+IPV6_DST_OFFSET = 14 + 24
+IPV6_FRAGMENT_NEXT_HEADER_OFFSET = 14 + 40
+
+
+class BPFProgram(object):
+    """
+    BPF program assembled in-process (equivalent to the one compiled by "tcpdump -ddd")
+    """
+    def __init__(self, instructions):
+        """
+        instructions: list of (label, code, k, jt, jf)
+        jt/jf are labels of the instruction to jump to (None means the next instruction)
+        """
+        labels = {label: i for (i, (label, _, _, _, _)) in enumerate(instructions) if label is not None}
+        self.number_of_instructions = len(instructions)
+        code = bytearray()
+        for (i, (_, op, k, jt, jf)) in enumerate(instructions):
+            jt = labels[jt] - i - 1 if jt is not None else 0
+            jf = labels[jf] - i - 1 if jf is not None else 0
+            code += SOCK_FILTER.pack(op, jt, jf, k)
+        self.code = bytes(code)
+
+
+# (ip proto not 2) and ip multicast
+IPV4_MULTICAST_PROGRAM = BPFProgram([
+    (None, LD_H, ETHERTYPE_OFFSET, None, None),
+    (None, JEQ, ETH_P_IP, None, "reject"),
+    (None, LD_B, IPV4_PROTOCOL_OFFSET, None, None),
+    (None, JEQ, IGMP_PROTOCOL, "reject", None),
+    (None, LD_B, IPV4_DST_OFFSET, None, None),
+    (None, JGE, 0xe0, "accept", "reject"),
+    ("accept", RET, SNAPLEN, None, None),
+    ("reject", RET, 0, None, None),
+])
+
+# (ip6 proto not 58) and ip6 multicast
+# (ICMPv6 packets are also recognized after a Fragment header)
+IPV6_MULTICAST_PROGRAM = BPFProgram([
+    (None, LD_H, ETHERTYPE_OFFSET, None, None),
+    (None, JEQ, ETH_P_IPV6, None, "reject"),
+    (None, LD_B, IPV6_NEXT_HEADER_OFFSET, None, None),
+    (None, JEQ, ICMPV6_PROTOCOL, "reject", None),
+    (None, JEQ, IPV6_FRAGMENT_HEADER, None, "dst"),
+    (None, LD_B, IPV6_FRAGMENT_NEXT_HEADER_OFFSET, None, None),
+    (None, JEQ, ICMPV6_PROTOCOL, "reject", "dst"),
+    ("dst", LD_B, IPV6_DST_OFFSET, None, None),
+    (None, JEQ, 0xff, "accept", "reject"),
+    ("accept", RET, SNAPLEN, None, None),
+    ("reject", RET, 0, None, None),
+])
+
+
+def get_multicast_filter(ip_version):
+    """
+    Get BPF program that accepts all multicast data packets
+    Returns (number of instructions, packed sock_filter array)
+    """
+    program = IPV4_MULTICAST_PROGRAM if ip_version == 4 else IPV6_MULTICAST_PROGRAM
+    return (program.number_of_instructions, program.code)
@@ -0,0 +1,142 @@
+import time
+import socket
+import logging
+from threading import Thread, Lock
+
+from . import hpim_globals
+from . import data_packets_socket
+
+# Offsets of source and destination addresses in Ethernet frames
+IPV4_SRC_OFFSET = 14 + 12
+IPV4_DST_OFFSET = 14 + 16
+IPV6_SRC_OFFSET = 14 + 8
+IPV6_DST_OFFSET = 14 + 24
+# Number of bytes of each frame that must be read in order to get the (S,G) of the data packet
+IPV4_HEADER_LEN = IPV4_DST_OFFSET + 4
+IPV6_HEADER_LEN = IPV6_DST_OFFSET + 16
+
+
+class DataPacketsListener(object):
+    """
+    Receive all multicast data packets of an interface and notify the Root interface of the corresponding tree
+    A single socket and thread is used per interface, regardless of the number of trees rooted at that interface
+    """
+    LOGGER = logging.getLogger('hpim.DataPacketsListener')
+
+    def __init__(self, interface_name, ip_version):
+        self.interface_name = interface_name
+        if ip_version == 4:
+            self._family = socket.AF_INET
+            self._src_offset = IPV4_SRC_OFFSET
+            self._dst_offset = IPV4_DST_OFFSET
+            self._address_len = 4
+            self._header_len = IPV4_HEADER_LEN
+        else:
+            self._family = socket.AF_INET6
+            self._src_offset = IPV6_SRC_OFFSET
+            self._dst_offset = IPV6_DST_OFFSET
+            self._address_len = 16
+            self._header_len = IPV6_HEADER_LEN
+
+        # Key: (SourceIP, GroupIP), Value: [TreeInterface, time of last notification]
+        self._trees = {}
+        self._trees_lock = Lock()
+
+        self.socket_is_enabled = True
+        self.socket_pkt = data_packets_socket.get_multicast_bpf_filter_code(ip_version, interface_name)
+
+        # run receive method in background
+        receive_thread = Thread(target=self.socket_recv)
+        receive_thread.daemon = True
+        receive_thread.start()
+
+    def add_tree(self, source, group, tree_interface):
+        """
+        Notify tree_interface regarding data packets of (source, group)
+        """
+        with self._trees_lock:
+            self._trees[(source, group)] = [tree_interface, None]
+
+    def remove_tree(self, source, group, tree_interface):
+        """
+        Stop notifying tree_interface regarding data packets of (source, group)
+        Return True if there are no more trees using this listener
+        """
+        with self._trees_lock:
+            entry = self._trees.get((source, group))
+            if entry is not None and entry[0] is tree_interface:
+                self._trees.pop((source, group))
+            return len(self._trees) == 0
+
+    def socket_recv(self):
+        """
+        Demultiplex data packets received by the interface to the Root interface of the corresponding tree
+        Each tree is notified at most once every DATA_PACKETS_NOTIFICATION_INTERVAL seconds
+        """
+        src_offset = self._src_offset
+        dst_offset = self._dst_offset
+        address_len = self._address_len
+        while self.socket_is_enabled:
+            try:
+                frame = self.socket_pkt.recv(self._header_len)
+                if len(frame) < self._header_len:
+                    continue
+                source = socket.inet_ntop(self._family, frame[src_offset:src_offset + address_len])
+                group = socket.inet_ntop(self._family, frame[dst_offset:dst_offset + address_len])
+
+                now = time.monotonic()
+                with self._trees_lock:
+                    entry = self._trees.get((source, group))
+                    if entry is None or (entry[1] is not None and
+                                         now - entry[1] < hpim_globals.DATA_PACKETS_NOTIFICATION_INTERVAL):
+                        continue
+                    entry[1] = now
+                    tree_interface = entry[0]
+
+                tree_interface.recv_data_msg()
+            except:
+                if self.socket_is_enabled:
+                    DataPacketsListener.LOGGER.exception('Error receiving data packets in %s', self.interface_name)
+                continue
+
+    def close(self):
+        """
+        Stop receiving data packets from this interface
+        """
+        self.socket_is_enabled = False
+        try:
+            self.socket_pkt.shutdown(socket.SHUT_RDWR)
+        except:
+            pass
+        self.socket_pkt.close()
+
+
+# Key: (InterfaceName, IPVersion), Value: DataPacketsListener
+listeners = {}
+listeners_lock = Lock()
+
+
+def add_tree(interface_name, source, group, tree_interface):
+    """
+    Start notifying tree_interface regarding data packets of (source, group) received by interface_name
+    """
+    ip_version = 6 if ':' in source else 4
+    with listeners_lock:
+        listener = listeners.get((interface_name, ip_version))
+        if listener is None:
+            listener = DataPacketsListener(interface_name, ip_version)
+            listeners[(interface_name, ip_version)] = listener
+        listener.add_tree(source, group, tree_interface)
+
+
+def remove_tree(interface_name, source, group, tree_interface):
+    """
+    Stop notifying tree_interface regarding data packets of (source, group) received by interface_name
+    The listener of the interface is closed after the removal of its last tree
+    """
+    ip_version = 6 if ':' in source else 4
+    with listeners_lock:
+        listener = listeners.get((interface_name, ip_version))
+        if listener is not None and listener.remove_tree(source, group, tree_interface):
+            listeners.pop((interface_name, ip_version))
+            listener.close()
@@ -9,6 +9,13 @@ DAEMON_LOG_STDOUT_FILE = DAEMON_LOG_FOLDER + 'stdout{}'
 INITIAL_FLOOD_ENABLED = True
 INITIAL_FLOOD_TIME = 15
 
+# Log level of the daemon and of each subsystem
+# LOG_LEVELS maps the name of a subsystem logger (relative to "hpim", e.g. "Interface.Neighbor" or "KernelEntry") to
+# its level. Levels are checked before any message is formatted, so a subsystem set above DEBUG does not pay for its
+# debug messages. Subsystems that are not listed inherit LOG_LEVEL
+LOG_LEVEL = "DEBUG"
+LOG_LEVELS = {}
+
 # Define control packets format. Two formats are available: JSON and BINARY
 MSG_FORMAT = "BINARY"
 
@@ -19,6 +26,38 @@ HELLO_PERIOD = 10
 # from the source after SOURCE_LIFETIME SECONDS
 SOURCE_LIFETIME = 210
 
+# Originator detects data packets of its trees by polling the packet counters of the kernel multicast routing
+# table every MFC_COUNTERS_POLL_INTERVAL seconds (trees whose counters advanced refresh their Source Active timer)
+# If zero, data packets are instead received through a socket per Root interface
+MFC_COUNTERS_POLL_INTERVAL = 5
+
+# Data packets of a tree received by the Root interface socket are only notified to the tree once every
+# DATA_PACKETS_NOTIFICATION_INTERVAL seconds (all trees of an interface share the same socket)
+DATA_PACKETS_NOTIFICATION_INTERVAL = 1
+
+# Upcalls of the kernel regarding the same (S,G) and interface are only processed once every
+# UPCALL_DEDUP_INTERVAL seconds (the kernel may send an upcall per data packet until the MFC entry is programmed)
+UPCALL_DEDUP_INTERVAL = 0.5
+# Upcalls of each source are limited by a token bucket that allows bursts of UPCALL_BURST upcalls and
+# UPCALL_RATE_LIMIT upcalls per second afterwards. If UPCALL_RATE_LIMIT is zero upcalls are not rate limited
+UPCALL_RATE_LIMIT = 50
+UPCALL_BURST = 100
+
+# Rechecks of trees caused by neighbors that become Synced or are removed are coalesced during
+# RECHECK_COALESCE_INTERVAL seconds (each tree is rechecked once per interface, regardless of the number of events)
+RECHECK_COALESCE_INTERVAL = 0.2
+
+# Control messages regarding single trees (IamUpstream, IamNoLongerUpstream, Interest, NoInterest and Ack) destined to
+# the same IP are bundled in a single packet (up to the MTU of the interface), if the destination advertises the
+# Bundle option. Bundles are transmitted MSG_BUNDLE_INTERVAL seconds after their first message was held
+# If zero messages are not bundled
+MSG_BUNDLE_INTERVAL = 0.02
+
+# Acks transmitted to a neighbor that advertises the MultiAck option are delayed ACK_DELAY seconds, in order to
+# acknowledge all trees whose messages were received in the meantime in a single MultiAck message
+# If zero each message is acknowledged by its own Ack message. Must be much lower than MESSAGE_RETRANSMISSION_TIME
+ACK_DELAY = 0.05
+
 # Periodicity for message retransmission
 MESSAGE_RETRANSMISSION_TIME = 3
 
@@ -31,6 +70,11 @@ HELLO_HOLD_TIME_TIMEOUT = 0
 # If zero use information from MTU of interface, otherwise only include a positive given number of trees per Sync message
 SYNC_FRAGMENTATION_MSG = 0
 
+# Number of Sync messages that can be outstanding during the synchronization with a neighbor (advertised in the
+# SyncWindow option of Hello messages). Both neighbors must advertise a window in order to pipeline Sync messages,
+# otherwise a single Sync message is exchanged per round trip (lock-step). If 1 the option is not advertised
+SYNC_WINDOW = 8
+
 
 # Number of ACKs that must be missed in order to declare a neighbor to have failed
 # Use a number HIGHER than 1!!
@@ -2,6 +2,8 @@ import ipaddress
 
 
 class Metric(object):
+    __slots__ = ('_metric_preference', '_route_metric')
+
     def __init__(self, metric_preference: int = 0x7FFFFFFF, route_metric: int = 0xFFFFFFFF):
         self._metric_preference = metric_preference
         self._route_metric = route_metric
@@ -48,6 +50,8 @@ class Metric(object):
 
 
 class AssertMetric(Metric):
+    __slots__ = ('_ip_address',)
+
     def __init__(self, metric_preference: int = 0x7FFFFFFF, route_metric: int = 0xFFFFFFFF, ip_address: str = "0.0.0.0"):
         super().__init__(metric_preference, route_metric)
 
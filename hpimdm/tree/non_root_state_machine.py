@@ -1,3 +1,4 @@
+import logging
 from hpimdm.utils import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -12,7 +13,8 @@ class SFMRNonRootState:
         interface not directly connected to the source AND
         interface roles dont change
         """
-        interface.logger.debug('interfaces_roles_dont_change_and_tree_transitions_to_active_state')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('interfaces_roles_dont_change_and_tree_transitions_to_active_state')
         interface.send_i_am_upstream()
 
     @staticmethod
@@ -22,7 +24,8 @@ class SFMRNonRootState:
         interface not directly connected to the source AND
         interface roles change (Root->Non-Root)
         """
-        interface.logger.debug('interfaces_roles_change_and_tree_remains_or_transitions_to_active_state')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('interfaces_roles_change_and_tree_remains_or_transitions_to_active_state')
         interface.send_i_am_upstream()
 
     @staticmethod
@@ -31,7 +34,8 @@ class SFMRNonRootState:
         Tree transitions from Active to Unsure state AND
         BestUpstream neighbor is null
         """
-        interface.logger.debug('tree_transitions_from_active_to_unsure_and_best_upstream_neighbor_is_null')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('tree_transitions_from_active_to_unsure_and_best_upstream_neighbor_is_null')
         interface.send_i_am_no_longer_upstream()
 
     @staticmethod
@@ -39,7 +43,8 @@ class SFMRNonRootState:
         """
         Tree transitions from Active to Inactive state
         """
-        interface.logger.debug('tree_transitions_from_active_to_inactive')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('tree_transitions_from_active_to_inactive')
         interface.send_i_am_no_longer_upstream()
 
     @staticmethod
@@ -48,7 +53,8 @@ class SFMRNonRootState:
         Tree transitions from Active to Unsure state AND
         BestUpstream neighbor is not null
         """
-        interface.logger.debug('interface_roles_dont_change_and_tree_transitions_from_active_to_unsure_and_best_upstream_neighbor_is_not_null')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('interface_roles_dont_change_and_tree_transitions_from_active_to_unsure_and_best_upstream_neighbor_is_not_null')
         interface.send_i_am_no_longer_upstream()
         interface.send_no_interest()
 
@@ -58,7 +64,8 @@ class SFMRNonRootState:
         Tree transitions from Active to Unsure state AND
         BestUpstream neighbor is not null
         """
-        interface.logger.debug('interface_roles_change_and_tree_transitions_from_active_to_unsure_and_best_upstream_neighbor_is_not_null')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('interface_roles_change_and_tree_transitions_from_active_to_unsure_and_best_upstream_neighbor_is_not_null')
         interface.send_no_interest()
 
     @staticmethod
@@ -72,7 +79,8 @@ class SFMRNonRootState:
         Tree remains in Unsure state AND
         BestUpstream neighbor transmitted IamUpstream message that doesnt cause a change of the BestUpstream neighbor
         """
-        interface.logger.debug('tree_remains_unsure_and_best_upstream_router_reelected')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('tree_remains_unsure_and_best_upstream_router_reelected')
         interface.send_no_interest()
 
     @staticmethod
@@ -81,7 +89,8 @@ class SFMRNonRootState:
         Tree transitions from Inactive to Unsure state AND
         BestUpstream neighbor is not null
         """
-        interface.logger.debug('tree_transitions_from_inactive_to_unsure_and_best_upstream_is_not_null')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('tree_transitions_from_inactive_to_unsure_and_best_upstream_is_not_null')
         interface.send_no_interest()
 
     @staticmethod
@@ -91,5 +100,6 @@ class SFMRNonRootState:
         interface not directly connected to the source AND
         MyRPC changes
         """
-        interface.logger.debug('tree_remains_active_and_my_rpc_changes')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('tree_remains_active_and_my_rpc_changes')
         interface.send_i_am_upstream()
@@ -1,3 +1,4 @@
+import logging
 from hpimdm.utils import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -69,7 +70,8 @@ class SFMRNewRootState:
         Interfaces roles change (NonRoot->Root) AND
         Tree was Active and remains Active
         """
-        interface.logger.debug('interfaces_roles_change_and_tree_remains_active')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('interfaces_roles_change_and_tree_remains_active')
         interface.send_i_am_no_longer_upstream()
         interface.send_my_interest()
 
@@ -79,7 +81,8 @@ class SFMRNewRootState:
         Interfaces roles change (NonRoot->Root) AND
         Tree was Unsure and transitions to Active state
         """
-        interface.logger.debug('interfaces_roles_change_and_tree_was_unsure_and_transitions_to_active')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('interfaces_roles_change_and_tree_was_unsure_and_transitions_to_active')
         interface.send_my_interest()
 
     @staticmethod
@@ -89,7 +92,8 @@ class SFMRNewRootState:
         Tree transitions from Active to Unsure state AND
         BestUpstreamNeighbor is null
         """
-        interface.logger.debug('interfaces_roles_change_and_tree_was_active_and_transitions_to_unsure_and_best_upstream_neighbor_is_null')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('interfaces_roles_change_and_tree_was_active_and_transitions_to_unsure_and_best_upstream_neighbor_is_null')
         interface.send_i_am_no_longer_upstream()
 
     @staticmethod
@@ -99,7 +103,8 @@ class SFMRNewRootState:
         Tree transitions from Active to Unsure state AND
         BestUpstreamNeighbor is not null (possible loop detected)
         """
-        interface.logger.debug('interfaces_roles_change_and_tree_was_active_and_transitions_to_unsure_and_best_upstream_neighbor_not_null')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('interfaces_roles_change_and_tree_was_active_and_transitions_to_unsure_and_best_upstream_neighbor_not_null')
         interface.send_i_am_no_longer_upstream()
         interface.send_my_interest()
 
@@ -110,7 +115,8 @@ class SFMRNewRootState:
         Tree was Unsure and remains Unsure AND
         BestUpstreamNeighbor is not null (possible loop detected)
         """
-        interface.logger.debug('interfaces_roles_change_and_tree_remains_unsure_and_best_upstream_neighbor_not_null')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('interfaces_roles_change_and_tree_remains_unsure_and_best_upstream_neighbor_not_null')
         interface.send_my_interest()
 
     @staticmethod
@@ -120,7 +126,8 @@ class SFMRNewRootState:
         BestUpstreamNeighbor does not change AND
         router changes its interest in receiving data packets (becomes interested or not interested)
         """
-        interface.logger.debug('interfaces_roles_dont_change_and_router_transition_to_it_or_ot')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('interfaces_roles_dont_change_and_router_transition_to_it_or_ot')
         interface.send_my_interest()
 
 
@@ -140,5 +147,6 @@ class SFMRNewRootState:
         (a new IamUpstream message was received from the BestUpstreamNeighbor but that router is still responsible for
         forwarding multicast data packets)
         """
-        interface.logger.debug('interfaces_roles_dont_change_and_best_upstream_neighbor_reelected')
+        if interface.LOGGER.isEnabledFor(logging.DEBUG):
+            interface.logger.debug('interfaces_roles_dont_change_and_best_upstream_neighbor_reelected')
         interface.send_my_interest()
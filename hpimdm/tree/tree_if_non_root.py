@@ -1,6 +1,6 @@
 import logging
 import _thread
-from threading import Timer
+from hpimdm.TimerWheel import Timer
 
 from . import hpim_globals
 from .metric import AssertMetric, Metric
@@ -11,30 +11,33 @@ from .downstream_state import SFMRPruneState, SFMRDownstreamStateABC
 
 class TreeInterfaceNonRoot(TreeInterface):
     LOGGER = logging.getLogger('hpim.KernelEntry.NonRootInterface')
+    ASSERT_LOGGER = LOGGER.getChild('Assert')
+    DOWNSTREAM_LOGGER = LOGGER.getChild('Downstream')
+    __slots__ = ('_assert_logger', '_downstream_logger', '_downstream_node_interest_state',
+                 '_hold_forwarding_state_timer', '_assert_state', '_my_assert_rpc')
 
     def __init__(self, kernel_entry, interface_id, rpc: Metric, best_upstream_router, interest_state, was_root, previous_tree_state, current_tree_state):
-        extra_dict_logger = kernel_entry.kernel_entry_logger.extra.copy()
-        extra_dict_logger['vif'] = interface_id
-        extra_dict_logger['interfacename'] = kernel_entry.get_interface_name(interface_id)
-        logger = logging.LoggerAdapter(TreeInterfaceNonRoot.LOGGER, extra_dict_logger)
-        TreeInterface.__init__(self, kernel_entry, interface_id, best_upstream_router, current_tree_state, logger)
-        self.assert_logger = logging.LoggerAdapter(logger.logger.getChild('Assert'), logger.extra)
-        self.downstream_logger = logging.LoggerAdapter(logger.logger.getChild('Downstream'), logger.extra)
+        TreeInterface.__init__(self, kernel_entry, interface_id, best_upstream_router, current_tree_state)
+        self._assert_logger = None
+        self._downstream_logger = None
 
         # Downstream Node Interest State
         if interest_state:
             self._downstream_node_interest_state = SFMRPruneState.DI
         else:
             self._downstream_node_interest_state = SFMRPruneState.NDI
-        self.downstream_logger.debug('Downstream interest state transitions to ' + str(self._downstream_node_interest_state))
+        if self.DOWNSTREAM_LOGGER.isEnabledFor(logging.DEBUG):
+            self.downstream_logger.debug('Downstream interest state transitions to %s',
+                                         self._downstream_node_interest_state)
 
-        # Assert Winner State
-        self._hold_forwarding_state_timer = Timer(hpim_globals.AL_HOLD_FORWARDING_STATE_TIME,
-                                                  self.hold_forwarding_state_timeout)
+        # Assert Winner State (HoldForwardingState timer is only created when the interface loses an assert)
+        self._hold_forwarding_state_timer = None
         self._assert_state = AssertState.Winner
-        self.assert_logger.debug('Assert state transitions to ' + str(self._assert_state))
+        if self.ASSERT_LOGGER.isEnabledFor(logging.DEBUG):
+            self.assert_logger.debug('Assert state transitions to %s', self._assert_state)
         self._my_assert_rpc = AssertMetric(rpc.metric_preference, rpc.route_metric, self.get_ip())
         self.calculate_assert_winner(creating_interface=True)
+        self.update_sync_state()
 
         # Deal with messages according to tree state and interface role change
         # Event 1
@@ -60,7 +63,26 @@ class TreeInterfaceNonRoot(TreeInterface):
         elif previous_tree_state.is_inactive() and current_tree_state.is_unsure() and best_upstream_router is not None:
             SFMRNonRootState.tree_transitions_from_inactive_to_unsure_and_best_upstream_is_not_null(self)
 
-        self.logger.debug('Created NonRootInterface')
+        if self.LOGGER.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Created NonRootInterface')
+
+    @property
+    def assert_logger(self):
+        """
+        Logger of the Assert state of this interface (only created when it is used for the first time)
+        """
+        if self._assert_logger is None:
+            self._assert_logger = logging.LoggerAdapter(self.ASSERT_LOGGER, self.logger.extra)
+        return self._assert_logger
+
+    @property
+    def downstream_logger(self):
+        """
+        Logger of the Downstream interest state of this interface (only created when it is used for the first time)
+        """
+        if self._downstream_logger is None:
+            self._downstream_logger = logging.LoggerAdapter(self.DOWNSTREAM_LOGGER, self.logger.extra)
+        return self._downstream_logger
 
     ############################################
     # Set ASSERT State
@@ -79,42 +101,48 @@ class TreeInterfaceNonRoot(TreeInterface):
             then this interface transitions to AssertLoser state
         If tree in Inactive state then interface must be in AssertWinner state
         """
-        print("CALCULATE ASSERT WINNER")
+        debug = self.ASSERT_LOGGER.isEnabledFor(logging.DEBUG)
         if self.is_tree_active():
             if self._best_upstream_router is None:
-                self.assert_logger.debug('BEST UPSTREAM NEIGHBOR IS NONE AND TREE IS ACTIVE')
+                if debug:
+                    self.assert_logger.debug('BEST UPSTREAM NEIGHBOR IS NONE AND TREE IS ACTIVE')
                 self.set_assert_state(AssertState.Winner, creating_interface)
             elif self._my_assert_rpc.is_better_than(self._best_upstream_router):
-                self.assert_logger.debug('TREE IS ACTIVE AND WON ASSERT')
-                self.assert_logger.debug("BEST UPSTREAM NEIGHBOR METRIC_PREFERENCE: " +
-                                         str(self._best_upstream_router.metric_preference) + '; METRIC: ' +
-                                         str(self._best_upstream_router.route_metric) + '; IP: ' +
-                                         self._best_upstream_router.get_ip())
-                self.assert_logger.debug("MY METRIC_PREFERENCE: " + str(self._my_assert_rpc.metric_preference) +
-                                         '; METRIC: ' + str(self._my_assert_rpc.route_metric) + '; IP: ' +
-                                         self._my_assert_rpc.get_ip())
+                if debug:
+                    self.assert_logger.debug('TREE IS ACTIVE AND WON ASSERT')
+                    self._log_assert_metrics()
                 self.set_assert_state(AssertState.Winner, creating_interface)
             else:
-                self.assert_logger.debug('TREE IS ACTIVE AND LOST ASSERT')
-                self.assert_logger.debug("BEST UPSTREAM NEIGHBOR METRIC_PREFERENCE: " +
-                                         str(self._best_upstream_router.metric_preference) + '; METRIC: ' +
-                                         str(self._best_upstream_router.route_metric) + '; IP: ' +
-                                         self._best_upstream_router.get_ip())
-                self.assert_logger.debug("MY METRIC_PREFERENCE: " + str(self._my_assert_rpc.metric_preference) +
-                                         '; METRIC: ' + str(self._my_assert_rpc.route_metric) + '; IP: ' +
-                                         self._my_assert_rpc.get_ip())
+                if debug:
+                    self.assert_logger.debug('TREE IS ACTIVE AND LOST ASSERT')
+                    self._log_assert_metrics()
                 self.set_assert_state(AssertState.Loser, creating_interface)
         elif self.is_tree_unsure():
             if self._best_upstream_router is None:
-                self.assert_logger.debug('TREE IS UNSURE AND NO UPSTREAM NEIGHBOR')
+                if debug:
+                    self.assert_logger.debug('TREE IS UNSURE AND NO UPSTREAM NEIGHBOR')
                 self.set_assert_state(AssertState.Winner)
             else:
-                self.assert_logger.debug('TREE IS UNSURE AND UPSTREAM NEIGHBOR CONNECTED TO THIS INTERFACE')
+                if debug:
+                    self.assert_logger.debug('TREE IS UNSURE AND UPSTREAM NEIGHBOR CONNECTED TO THIS INTERFACE')
                 self.set_assert_state(AssertState.Loser, creating_interface)
         else:
-            self.assert_logger.debug('TREE IS INACTIVE AND UPSTREAM NEIGHBOR CONNECTED TO THIS INTERFACE')
+            if debug:
+                self.assert_logger.debug('TREE IS INACTIVE AND UPSTREAM NEIGHBOR CONNECTED TO THIS INTERFACE')
             self.set_assert_state(AssertState.Winner, creating_interface)
 
+    def _log_assert_metrics(self):
+        """
+        Log Assert metrics of the BestUpstream neighbor and of this interface
+        """
+        if not self.ASSERT_LOGGER.isEnabledFor(logging.DEBUG):
+            return
+        self.assert_logger.debug("BEST UPSTREAM NEIGHBOR METRIC_PREFERENCE: %s; METRIC: %s; IP: %s",
+                                 self._best_upstream_router.metric_preference, self._best_upstream_router.route_metric,
+                                 self._best_upstream_router.get_ip())
+        self.assert_logger.debug("MY METRIC_PREFERENCE: %s; METRIC: %s; IP: %s", self._my_assert_rpc.metric_preference,
+                                 self._my_assert_rpc.route_metric, self._my_assert_rpc.get_ip())
+
     def set_assert_state(self, new_state: SFMRAssertABC, creating_interface=False):
         """
         Set Assert state (AssertWinner or AssertLoser)
@@ -126,7 +154,8 @@ class TreeInterfaceNonRoot(TreeInterface):
                     self.clear_hold_forwarding_state_timer()
                 else:
                     self.set_hold_forwarding_state_timer()
-                self.assert_logger.debug('Assert state transitions to ' + str(new_state))
+                if self.ASSERT_LOGGER.isEnabledFor(logging.DEBUG):
+                    self.assert_logger.debug('Assert state transitions to %s', new_state)
                 if not creating_interface:
                     self.change_tree()
                     self.evaluate_in_tree()
@@ -141,7 +170,8 @@ class TreeInterfaceNonRoot(TreeInterface):
         with self.get_state_lock():
             if new_state != self._downstream_node_interest_state:
                 self._downstream_node_interest_state = new_state
-                self.downstream_logger.debug('Downstream interest state transitions to ' + str(new_state))
+                if self.DOWNSTREAM_LOGGER.isEnabledFor(logging.DEBUG):
+                    self.downstream_logger.debug('Downstream interest state transitions to %s', new_state)
 
                 self.change_tree()
                 self.evaluate_in_tree()
@@ -300,7 +330,8 @@ class TreeInterfaceNonRoot(TreeInterface):
         the timer (if the thread of the timer invokes this method it means that the timer expired) - accomplished by
         comparing the thread id of the timer and of the thread that is invoking this method
         """
-        return self._hold_forwarding_state_timer.is_alive() and _thread.get_ident() != self._hold_forwarding_state_timer.ident
+        timer = self._hold_forwarding_state_timer
+        return timer is not None and timer.is_alive() and _thread.get_ident() != timer.ident
 
     def delete(self):
         """
@@ -309,6 +340,9 @@ class TreeInterfaceNonRoot(TreeInterface):
         Clear all state from this interface regarding this tree
         """
         self.clear_hold_forwarding_state_timer()
+        interface = self.get_interface()
+        if interface is not None:
+            interface.upstream_trees.remove(self.get_tree_id())
         super().delete()
         self._my_assert_rpc = None
 
@@ -326,6 +360,7 @@ class TreeInterfaceNonRoot(TreeInterface):
             return
 
         self._my_assert_rpc = AssertMetric(new_rpc.metric_preference, new_rpc.route_metric, self.get_ip())
+        self.update_sync_state()
         if self.current_tree_state.is_active() and not self.is_interface_connected_to_source():
             SFMRNonRootState.tree_remains_active_and_my_rpc_changes(self)
         self.calculate_assert_winner()
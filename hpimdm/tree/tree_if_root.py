@@ -1,21 +1,17 @@
 import logging
-import traceback
-from threading import Thread
 
-from . import data_packets_socket
+from . import hpim_globals
+from . import data_packets_listener
 from .tree_interface import TreeInterface
 from .root_state_machine import SFMRNewRootState #SFMRRootState
 
 
 class TreeInterfaceRoot(TreeInterface):
     LOGGER = logging.getLogger('hpim.KernelEntry.RootInterface')
+    __slots__ = ('_data_packets_interface_name',)
 
     def __init__(self, kernel_entry, interface_id, best_upstream_router, was_non_root, previous_tree_state, current_tree_state):
-        extra_dict_logger = kernel_entry.kernel_entry_logger.extra.copy()
-        extra_dict_logger['vif'] = interface_id
-        extra_dict_logger['interfacename'] = kernel_entry.get_interface_name(interface_id)
-        logger = logging.LoggerAdapter(TreeInterfaceRoot.LOGGER, extra_dict_logger)
-        TreeInterface.__init__(self, kernel_entry, interface_id, best_upstream_router, current_tree_state, logger)
+        TreeInterface.__init__(self, kernel_entry, interface_id, best_upstream_router, current_tree_state)
 
         # event 1
         if was_non_root and previous_tree_state.is_active() and current_tree_state.is_active():
@@ -39,30 +35,17 @@ class TreeInterfaceRoot(TreeInterface):
         elif not was_non_root and best_upstream_router is not None:
             SFMRNewRootState.interfaces_roles_dont_change_and_best_upstream_neighbor_reelected(self)
 
-        # Originator state
-        # TODO TESTE SOCKET RECV DATA PCKTS
-        self.socket_is_enabled = True
-        (s, g) = self.get_tree_id()
-        interface_name = self.get_interface_name()
-        self.socket_pkt = data_packets_socket.get_s_g_bpf_filter_code(s, g, interface_name)
+        # receive data packets of this tree through the listener shared by all trees of this interface
+        # (only if data packets are not detected by polling the packet counters of the kernel)
+        self._data_packets_interface_name = None
+        if hpim_globals.MFC_COUNTERS_POLL_INTERVAL == 0:
+            (s, g) = self.get_tree_id()
+            self._data_packets_interface_name = self.get_interface_name()
+            data_packets_listener.add_tree(self._data_packets_interface_name, s, g, self)
 
-        # run receive method in background
-        receive_thread = Thread(target=self.socket_recv)
-        receive_thread.daemon = True
-        receive_thread.start()
+        if self.LOGGER.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Created RootInterface')
 
-        self.logger.debug('Created RootInterface')
-
-
-    def socket_recv(self):
-        while self.socket_is_enabled:
-            try:
-                self.socket_pkt.recvfrom(0)
-                print("DATA RECEIVED")
-                self.recv_data_msg()
-            except:
-                traceback.print_exc()
-                continue
 
     ###########################################
     # Recv packets
@@ -80,16 +63,12 @@ class TreeInterfaceRoot(TreeInterface):
         """
         previous_best_upstream_router = self._best_upstream_router
         super().change_best_upstream_neighbor_state(best_upstream_neighbor_state)
-        print(self.get_tree_id())
-        print("UPSTREAM CHANGE ASSERT STATE")
-        print("best:", previous_best_upstream_router)
-        print("new best", best_upstream_neighbor_state)
 
         if best_upstream_neighbor_state is None:
-            print("ASSERT IS NONE")
             return
         elif previous_best_upstream_router is None or previous_best_upstream_router is not best_upstream_neighbor_state:
-            print("BEST UPSTREAM REELECTED")
+            if self.LOGGER.isEnabledFor(logging.DEBUG):
+                self.logger.debug('BestUpstream neighbor reelected: %s', best_upstream_neighbor_state)
             # EVENT 6 and 8
             SFMRNewRootState.interfaces_roles_dont_change_and_best_upstream_neighbor_reelected(self)
 
@@ -136,6 +115,7 @@ class TreeInterfaceRoot(TreeInterface):
         due to the removal of the tree by this router
         Clear all state from this interface regarding this tree
         """
-        self.socket_is_enabled = False
-        self.socket_pkt.close()
+        if self._data_packets_interface_name is not None:
+            (s, g) = self.get_tree_id()
+            data_packets_listener.remove_tree(self._data_packets_interface_name, s, g, self)
         super().delete()
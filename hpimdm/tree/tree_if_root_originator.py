@@ -1,54 +1,33 @@
 import logging
-import traceback
-from threading import Timer
-from threading import Thread
+from hpimdm.TimerWheel import Timer
 
-from . import data_packets_socket
+from . import hpim_globals
+from . import data_packets_listener
 from .hpim_globals import SOURCE_LIFETIME
 from .tree_interface import TreeInterface
 
 
 class TreeInterfaceRootOriginator(TreeInterface):
     LOGGER = logging.getLogger('hpim.KernelEntry.RootInterface')
+    __slots__ = ('_source_active_timer', '_data_packets_interface_name')
 
     def __init__(self, kernel_entry, interface_id, current_tree_state):
-        extra_dict_logger = kernel_entry.kernel_entry_logger.extra.copy()
-        extra_dict_logger['vif'] = interface_id
-        extra_dict_logger['interfacename'] = kernel_entry.get_interface_name(interface_id)
-        logger = logging.LoggerAdapter(TreeInterfaceRootOriginator.LOGGER, extra_dict_logger)
-        TreeInterface.__init__(self, kernel_entry, interface_id, None, current_tree_state, logger)
+        TreeInterface.__init__(self, kernel_entry, interface_id, None, current_tree_state)
 
         # Originator state
         self._source_active_timer = None
         self.set_source_active_timer()
 
-        # TODO TESTE SOCKET RECV DATA PCKTS
-        self.socket_is_enabled = True
-        (s, g) = self.get_tree_id()
-        interface_name = self.get_interface_name()
-        self.socket_pkt = data_packets_socket.get_s_g_bpf_filter_code(s, g, interface_name)
+        # receive data packets of this tree through the listener shared by all trees of this interface
+        # (only if data packets are not detected by polling the packet counters of the kernel)
+        self._data_packets_interface_name = None
+        if hpim_globals.MFC_COUNTERS_POLL_INTERVAL == 0:
+            (s, g) = self.get_tree_id()
+            self._data_packets_interface_name = self.get_interface_name()
+            data_packets_listener.add_tree(self._data_packets_interface_name, s, g, self)
 
-        # run receive method in background
-        receive_thread = Thread(target=self.socket_recv)
-        receive_thread.daemon = True
-        receive_thread.start()
-
-        self.logger.debug('Created RootInterfaceOriginator')
-
-    def socket_recv(self):
-        """
-        Socket used to receive data packets from the Root interface...
-        Useful in order to control the tree state of Originator routers
-        """
-        while self.socket_is_enabled:
-            try:
-                self.socket_pkt.recvfrom(0)
-                print("DATA RECEIVED")
-                self.recv_data_msg()
-            except:
-                traceback.print_exc()
-                continue
-        print("EXIT SOCKET")
+        if self.LOGGER.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Created RootInterfaceOriginator')
 
     ##########################################
     # Set timers
@@ -113,13 +92,9 @@ class TreeInterfaceRootOriginator(TreeInterface):
         due to the removal of the tree by this router
         Clear all state from this interface regarding this tree
         """
-        self.socket_is_enabled = False
-        try:
-            from socket import SHUT_RDWR
-            self.socket_pkt.shutdown(SHUT_RDWR)
-        except:
-            pass
-        self.socket_pkt.close()
+        if self._data_packets_interface_name is not None:
+            (s, g) = self.get_tree_id()
+            data_packets_listener.remove_tree(self._data_packets_interface_name, s, g, self)
         super().delete()
         self.clear_source_active_timer()
         self._source_active_timer = None
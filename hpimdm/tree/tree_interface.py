@@ -8,10 +8,14 @@ from .local_membership import LocalMembership
 
 
 class TreeInterface(metaclass=ABCMeta):
-    def __init__(self, kernel_entry, interface_id, best_upstream_router, current_tree_state, logger: logging.LoggerAdapter):
+    LOGGER = logging.getLogger('hpim.KernelEntry.TreeInterface')
+    __slots__ = ('_kernel_entry', '_interface_id', '_logger', '_best_upstream_router', 'current_tree_state',
+                 '_igmp_lock', '_local_membership_state')
+
+    def __init__(self, kernel_entry, interface_id, best_upstream_router, current_tree_state):
         self._kernel_entry = kernel_entry
         self._interface_id = interface_id
-        self.logger = logger
+        self._logger = None
 
         self._best_upstream_router = best_upstream_router  # current assert winner
 
@@ -27,6 +31,28 @@ class TreeInterface(metaclass=ABCMeta):
         except:
             self._local_membership_state = LocalMembership.NoInfo
 
+    @property
+    def logger(self):
+        """
+        Logger of this interface (only created when it is used for the first time)
+        """
+        if self._logger is None:
+            self._logger = logging.LoggerAdapter(self.LOGGER, self.get_logger_extra())
+        return self._logger
+
+    def get_logger_extra(self):
+        """
+        Get a new dict with the information of this tree and interface to be included in log messages
+        """
+        extra = self._kernel_entry.get_logger_extra()
+        extra['vif'] = self._interface_id
+        try:
+            extra['interfacename'] = self._kernel_entry.get_interface_name(self._interface_id)
+        except KeyError:
+            # interface was already removed
+            extra['interfacename'] = None
+        return extra
+
     ###########################################
     # Recv packets
     ###########################################
@@ -46,6 +72,21 @@ class TreeInterface(metaclass=ABCMeta):
         """
         return None
 
+    def update_sync_state(self):
+        """
+        Reflect the result of get_sync_state in the set of Upstream trees of the interface
+        (invoked after each change that may affect the result of get_sync_state)
+        """
+        interface = self.get_interface()
+        if interface is None:
+            return
+        tree = self.get_tree_id()
+        rpc = self.get_sync_state()
+        if rpc is None:
+            interface.upstream_trees.remove(tree)
+        else:
+            interface.upstream_trees.set(tree, rpc.metric_preference, rpc.route_metric)
+
     def send_i_am_no_longer_upstream(self):
         """
         Send an IamNoLongerUpstream message through this interface
@@ -115,7 +156,8 @@ class TreeInterface(metaclass=ABCMeta):
         except:
             pass
 
-        print('Tree Interface deleted')
+        if self.LOGGER.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Tree Interface deleted')
 
     def is_node_in_tree(self):
         """
@@ -166,6 +208,7 @@ class TreeInterface(metaclass=ABCMeta):
         The interface must react to this change in order to send some control messages
         """
         self.current_tree_state = TreeState.Active
+        self.update_sync_state()
 
     def tree_transition_to_unsure(self):
         """
@@ -173,6 +216,7 @@ class TreeInterface(metaclass=ABCMeta):
         The interface must react to this change in order to send some control messages
         """
         self.current_tree_state = TreeState.Unsure
+        self.update_sync_state()
 
     def tree_transition_to_inactive(self):
         """
@@ -180,6 +224,7 @@ class TreeInterface(metaclass=ABCMeta):
         The interface must react to this change in order to send some control messages
         """
         self.current_tree_state = TreeState.Inactive
+        self.update_sync_state()
 
 
     #############################################################
@@ -0,0 +1,30 @@
+import shutil
+import unittest
+import subprocess
+
+from hpimdm.tree import bpf_filter
+
+
+def tcpdump_program(expression):
+    """
+    Get (number of instructions, packed sock_filter array) of expression compiled by tcpdump
+    """
+    output = subprocess.check_output(["tcpdump", "-ddd", expression], stderr=subprocess.DEVNULL).splitlines()
+    program = b''.join(bpf_filter.SOCK_FILTER.pack(*map(int, line.split())) for line in output[1:])
+    return (int(output[0]), program)
+
+
+@unittest.skipIf(shutil.which("tcpdump") is None, "tcpdump is not installed")
+class TestBPFFilter(unittest.TestCase):
+    """
+    Programs assembled in-process must be equal to the ones previously compiled by tcpdump
+    """
+    def test_ipv4_multicast_filter(self):
+        self.assertEqual(bpf_filter.get_multicast_filter(4), tcpdump_program("(ip proto not 2) and ip multicast"))
+
+    def test_ipv6_multicast_filter(self):
+        self.assertEqual(bpf_filter.get_multicast_filter(6), tcpdump_program("(ip6 proto not 58) and ip6 multicast"))
+
+
+if __name__ == '__main__':
+    unittest.main()
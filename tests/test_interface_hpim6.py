@@ -0,0 +1,44 @@
+import os
+import socket
+import unittest
+
+try:
+    import netifaces
+except ImportError:
+    netifaces = None
+
+
+def get_ipv6_interface():
+    """
+    Get name of an interface with an IPv6 address (None if there is no such interface)
+    """
+    for interface_name in netifaces.interfaces():
+        if netifaces.AF_INET6 in netifaces.ifaddresses(interface_name):
+            return interface_name
+    return None
+
+
+@unittest.skipIf(netifaces is None, "netifaces is not installed")
+@unittest.skipIf(not hasattr(os, "geteuid") or os.geteuid() != 0, "raw sockets require root")
+@unittest.skipIf(not socket.has_ipv6, "IPv6 is not supported")
+class TestInterfaceHPIM6(unittest.TestCase):
+    def test_create_interface(self):
+        from hpimdm.InterfaceHPIM6 import InterfaceHPIM6
+
+        interface_name = get_ipv6_interface()
+        if interface_name is None:
+            self.skipTest("no interface with an IPv6 address")
+
+        interface = InterfaceHPIM6(interface_name, 0)
+        try:
+            self.assertEqual(interface.interface_name, interface_name)
+            self.assertEqual(len(interface.upstream_trees), 0)
+            self.assertEqual(interface.get_neighbors(), [])
+            (boot_time, checkpoint_sn) = interface.get_checkpoint_sn()
+            self.assertEqual(boot_time, interface.time_of_boot)
+        finally:
+            interface.remove()
+
+
+if __name__ == '__main__':
+    unittest.main()
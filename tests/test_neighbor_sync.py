@@ -0,0 +1,198 @@
+import heapq
+import random
+import logging
+import unittest
+from threading import RLock
+from unittest import mock
+
+from hpimdm import Neighbor as neighbor_module
+from hpimdm.Neighbor import Neighbor, Synced
+from hpimdm.SyncSnapshot import SyncSnapshot
+from hpimdm.TreeStateIndex import TreeStateIndex
+from hpimdm.tree import hpim_globals
+from hpimdm.packet.Packet import Packet
+from hpimdm.packet.PacketHPIMHeader import PacketHPIMHeader
+from hpimdm.packet.PacketHPIMSync import PacketHPIMSync, PacketHPIMSyncEntry
+
+
+class VirtualClock(object):
+    """
+    Discrete event clock... timers only expire when the network has no packets in flight
+    """
+    def __init__(self):
+        self.now = 0
+        self.order = 0
+        self.timers = []
+
+    def timer(self, interval, function):
+        return VirtualTimer(self, interval, function)
+
+    def fire_next(self):
+        while self.timers:
+            (deadline, _, timer) = heapq.heappop(self.timers)
+            if timer.armed:
+                self.now = deadline
+                timer.armed = False
+                timer.function()
+                return True
+        return False
+
+
+class VirtualTimer(object):
+    def __init__(self, clock, interval, function):
+        self.clock = clock
+        self.interval = interval
+        self.function = function
+        self.armed = False
+
+    def start(self):
+        self.armed = True
+        self.clock.order += 1
+        heapq.heappush(self.clock.timers, (self.clock.now + self.interval, self.clock.order, self))
+
+    def cancel(self):
+        self.armed = False
+
+
+class Network(object):
+    """
+    Link between two interfaces that loses (and reorders) Sync messages
+    """
+    def __init__(self, rnd, loss):
+        self.rnd = rnd
+        self.loss = loss
+        self.interfaces = {}
+        self.in_flight = []
+
+    def send(self, data, src_ip, dst_ip):
+        if self.rnd.random() >= self.loss:
+            self.in_flight.append((data, src_ip, dst_ip))
+
+    def deliver_next(self):
+        (data, src_ip, dst_ip) = self.in_flight.pop(self.rnd.randrange(len(self.in_flight)))
+        self.interfaces[dst_ip].receive_sync(PacketHPIMHeader.parse_bytes(data), src_ip)
+
+
+class FakeKernel(object):
+    def recheck_neighbor_trees(self, vif_index, trees):
+        return
+
+
+class FakeInterface(object):
+    """
+    Interface with the methods used by the neighbor state machine during the synchronization
+    """
+    FRAGMENTATION = 3
+
+    def __init__(self, network, ip, time_of_boot, number_of_trees):
+        self.network = network
+        self.ip = ip
+        self.time_of_boot = time_of_boot
+        self.vif_index = 0
+        self.security_id = 0
+        self.neighbors = {}
+        self.neighbors_lock = RLock()
+        self.tree_state_index = TreeStateIndex()
+        self.interface_logger = logging.LoggerAdapter(logging.getLogger('hpim.Interface'),
+                                                      {'vif': 0, 'interfacename': ip})
+        self.trees = [(("10.0.0.%d" % (i + 1), "224.1.1.%d" % (i + 1)), (1, 10)) for i in range(number_of_trees)]
+        self.removed_neighbors = []
+        network.interfaces[ip] = self
+
+    def get_ip(self):
+        return self.ip
+
+    def get_kernel(self):
+        return FakeKernel()
+
+    def get_security_key(self):
+        return b''
+
+    def get_sync_snapshot(self):
+        return SyncSnapshot(self.time_of_boot, 1, 0, PacketHPIMSyncEntry.encode_entries(self.trees), len(self.trees),
+                            self.FRAGMENTATION)
+
+    def get_sync_entries_fragment(self, encoded_entries, start, end):
+        return PacketHPIMSyncEntry.get_entries_fragment(encoded_entries, start, end)
+
+    def create_sync_msg(self, my_boot_time, my_snapshot_sn, neighbor_snapshot_sn, sync_sn, upstream_trees,
+                        master_flag, more_flag, neighbor_boot_time):
+        pkt_sync = PacketHPIMSync(my_snapshot_sn, neighbor_snapshot_sn, sync_sn, upstream_trees,
+                                  master_flag, more_flag, neighbor_boot_time)
+        return Packet(payload=PacketHPIMHeader(pkt_sync, my_boot_time))
+
+    def encode(self, pkt, group_ip):
+        return pkt.bytes()
+
+    def send_bytes(self, data, group_ip):
+        self.network.send(data, self.ip, group_ip)
+
+    def neighbor_start_synchronization(self, neighbor_ip, my_snapshot_bt, my_snapshot_sn):
+        return
+
+    def remove_neighbor(self, neighbor_ip, known_trees):
+        self.removed_neighbors.append(neighbor_ip)
+
+    def add_neighbor(self, neighbor_ip, neighbor_boot_time):
+        neighbor = Neighbor(self, neighbor_ip, 120, neighbor_boot_time, self.time_of_boot)
+        # SyncWindow advertised in the Hello messages of the neighbor
+        neighbor.sync_window = hpim_globals.SYNC_WINDOW
+        self.neighbors[neighbor_ip] = neighbor
+        return neighbor
+
+    def receive_sync(self, header, ip):
+        pkt_hs = header.payload
+        if pkt_hs.neighbor_boot_time != self.time_of_boot:
+            return
+        with self.neighbors_lock:
+            self.neighbors[ip].recv_sync(pkt_hs.upstream_trees, pkt_hs.neighbor_snapshot_sn, pkt_hs.my_snapshot_sn,
+                                         header.boot_time, pkt_hs.sync_sequence_number, pkt_hs.master_flag,
+                                         pkt_hs.more_flag, pkt_hs.neighbor_boot_time, pkt_hs.get_hello_options())
+
+
+class TestWindowedSync(unittest.TestCase):
+    """
+    Both neighbors must finish a pipelined synchronization over a lossy link before their liveness timers expire
+    """
+    def synchronize(self, seed, loss, trees_a, trees_b):
+        rnd = random.Random(seed)
+        clock = VirtualClock()
+        network = Network(rnd, loss)
+        interface_a = FakeInterface(network, "10.0.0.1", 100, trees_a)
+        interface_b = FakeInterface(network, "10.0.0.2", 200, trees_b)
+        with mock.patch.object(neighbor_module, "Timer", clock.timer):
+            neighbor_b = interface_a.add_neighbor("10.0.0.2", 200)
+            neighbor_a = interface_b.add_neighbor("10.0.0.1", 100)
+            neighbor_b.start_sync_process()
+            neighbor_a.start_sync_process()
+
+            while not (neighbor_a.neighbor_state == Synced and neighbor_b.neighbor_state == Synced):
+                if interface_a.removed_neighbors or interface_b.removed_neighbors:
+                    break
+                if network.in_flight:
+                    network.deliver_next()
+                elif not clock.fire_next():
+                    break
+
+        self.assertEqual(interface_a.removed_neighbors, [], "seed=%d loss=%s" % (seed, loss))
+        self.assertEqual(interface_b.removed_neighbors, [], "seed=%d loss=%s" % (seed, loss))
+        self.assertIs(neighbor_a.neighbor_state, Synced)
+        self.assertIs(neighbor_b.neighbor_state, Synced)
+        self.assertEqual(len(neighbor_b.tree_metric_state), trees_b)
+        self.assertEqual(len(neighbor_a.tree_metric_state), trees_a)
+
+    def test_sync_without_loss(self):
+        self.synchronize(0, 0, 40, 25)
+
+    def test_sync_with_loss(self):
+        for loss in (0.05, 0.1):
+            for seed in range(100):
+                self.synchronize(seed, loss, 40, 25)
+
+    def test_sync_without_trees(self):
+        for seed in range(100):
+            self.synchronize(seed, 0.1, 0, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
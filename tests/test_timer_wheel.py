@@ -0,0 +1,110 @@
+import time
+import unittest
+from threading import Event, Lock, get_ident
+from unittest import mock
+
+from hpimdm import TimerWheel as timer_wheel_module
+from hpimdm.TimerWheel import TimerWheel, Timer
+
+
+class SteppingClock(object):
+    """
+    Replacement of the time module in which each reading of the clock advances it by step seconds
+    """
+    def __init__(self, step):
+        self.now = 1000.0
+        self.step = step
+        self.lock = Lock()
+
+    def monotonic(self):
+        with self.lock:
+            self.now += self.step
+            return self.now
+
+    @staticmethod
+    def sleep(seconds):
+        time.sleep(0.0005)
+
+
+class TestIdleWheel(unittest.TestCase):
+    def test_slot_of_timer_armed_before_wake_up(self):
+        """
+        Clock advances more than one tick between arming a timer in an idle wheel and the wake up of the wheel thread
+        """
+        clock = SteppingClock(0.06)
+        with mock.patch.object(timer_wheel_module, "time", clock):
+            wheel = TimerWheel(tick=0.05, number_of_slots=64, number_of_dispatchers=1)
+            with mock.patch.object(timer_wheel_module, "wheel", wheel):
+                for _ in range(10):
+                    expiration = []
+                    expired = Event()
+                    armed_time = clock.now
+                    Timer(0, lambda: (expiration.append(clock.now), expired.set())).start()
+                    self.assertTrue(expired.wait(5))
+                    # far less than a rotation of the wheel (64 * 0.05 seconds)
+                    self.assertLess(expiration[0] - armed_time, 1)
+                    # let the wheel thread wait for new timers
+                    time.sleep(0.05)
+
+
+class TestTimerWheel(unittest.TestCase):
+    def setUp(self):
+        # wheel with small ticks used only by the timers of the test
+        self.wheel = TimerWheel(tick=0.002, number_of_slots=2048, number_of_dispatchers=2)
+        patcher = mock.patch.object(timer_wheel_module, "wheel", self.wheel)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def wait_timer(self, interval, **kwargs):
+        """
+        Arm a timer and get the time it took to expire
+        """
+        expired = Event()
+        start_time = time.monotonic()
+        timer = Timer(interval, expired.set, **kwargs)
+        timer.start()
+        self.assertTrue(expired.wait(5))
+        return time.monotonic() - start_time
+
+    def test_timer_armed_after_idle_wheel(self):
+        for i in range(30):
+            # wheel is idle while sleeping (no armed timers)
+            time.sleep(0.001 * (i % 7))
+            self.assertLess(self.wait_timer(0), 1)
+            self.assertLess(self.wait_timer(0.01), 1)
+
+    def test_cancel(self):
+        expired = Event()
+        timer = Timer(0.05, expired.set)
+        timer.start()
+        self.assertTrue(timer.is_alive())
+        timer.cancel()
+        self.assertFalse(expired.wait(0.2))
+        self.assertFalse(timer.is_alive())
+        self.assertEqual(self.wheel.get_number_of_armed_timers(), 0)
+
+    def test_blocking_callbacks_do_not_delay_other_timers(self):
+        release = Event()
+        for _ in range(4):
+            Timer(0, release.wait, args=[5], dedicated_thread=True).start()
+        try:
+            # both dispatcher threads are available
+            self.assertLess(self.wait_timer(0.01), 1)
+        finally:
+            release.set()
+
+    def test_dedicated_thread(self):
+        threads = []
+        finished = Event()
+
+        def callback():
+            threads.append(get_ident())
+            finished.set()
+
+        Timer(0, callback, dedicated_thread=True).start()
+        self.assertTrue(finished.wait(5))
+        self.assertNotEqual(threads[0], get_ident())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import socket
+import unittest
+from unittest import mock
+
+from hpimdm import Main
+from hpimdm.UnicastRouting import UnicastRouting
+from hpimdm.tree import hpim_globals
+
+
+class FakeTable(object):
+    """
+    Routing table of IPDB (iterates over routes and is indexed by destination)
+    """
+    def __init__(self, routes):
+        self.routes = routes
+
+    def __contains__(self, dst):
+        return dst in self.routes
+
+    def __iter__(self):
+        return iter(self.routes.values())
+
+
+class FakeRoutes(object):
+    def __init__(self, routes):
+        self.routes = routes
+        self.tables = {hpim_globals.UNICAST_TABLE_ID: FakeTable(routes)}
+
+    def __getitem__(self, spec):
+        return self.routes[spec['dst']]
+
+
+class FakeIPDB(object):
+    def __init__(self, routes):
+        self.routes = FakeRoutes(routes)
+
+
+class FakeKernel(object):
+    def __init__(self):
+        self.vif_name_to_index_dic = {socket.if_indextoname(1): 0}
+        self.unicast_changes = []
+
+    def notify_unicast_changes(self, subnet):
+        self.unicast_changes.append(subnet)
+
+
+def route(dst, gateway, metric):
+    return {'dst': dst, 'family': socket.AF_INET, 'ipdb_scope': 'system', 'oif': 1, 'gateway': gateway,
+            'multipath': [], 'proto': 2, 'priority': metric}
+
+
+class TestRPFCache(unittest.TestCase):
+    """
+    Changes to the unicast routing table must evict cached RPF information of all sources covered by the changed
+    prefix (and only of those sources)
+    """
+    def setUp(self):
+        self.routes = {dst: route(dst, gateway, metric) for (dst, gateway, metric) in
+                       (("10.1.0.0/16", "192.168.1.1", 10), ("10.2.0.0/16", "192.168.1.2", 20),
+                        ("default", "192.168.1.254", 30))}
+        self.kernel = FakeKernel()
+        patches = [mock.patch.object(UnicastRouting, "ipdb", FakeIPDB(self.routes)),
+                   mock.patch.object(Main, "kernel", self.kernel)]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        UnicastRouting.load_prefix_tries()
+
+    @staticmethod
+    def route_change(action, network_address, mask_len):
+        msg = {'family': socket.AF_INET, 'dst_len': mask_len, 'table': hpim_globals.UNICAST_TABLE_ID,
+               'attrs': [("RTA_DST", network_address)]}
+        UnicastRouting.unicast_changes(UnicastRouting.ipdb, msg, action)
+
+    def test_route_change_evicts_covered_sources(self):
+        self.assertEqual(UnicastRouting.get_unicast_info("10.1.2.3")[1], 10)
+        self.assertEqual(UnicastRouting.get_unicast_info("10.1.200.1")[1], 10)
+        self.assertEqual(UnicastRouting.get_unicast_info("10.2.0.1")[1], 20)
+        self.assertEqual(UnicastRouting.get_unicast_info("10.3.0.1")[1], 30)
+
+        # more specific route... only 10.1.2.3 is covered by it
+        self.routes["10.1.2.0/24"] = route("10.1.2.0/24", "192.168.1.3", 5)
+        self.route_change("RTM_NEWROUTE", "10.1.2.0", 24)
+        self.assertNotIn("10.1.2.3", UnicastRouting.rpf_cache)
+        self.assertEqual(set(UnicastRouting.rpf_cache), {"10.1.200.1", "10.2.0.1", "10.3.0.1"})
+        self.assertEqual(UnicastRouting.get_unicast_info("10.1.2.3")[1], 5)
+        self.assertEqual(UnicastRouting.get_unicast_info("10.1.200.1")[1], 10)
+
+        # removed route... sources fall back to the default route
+        del self.routes["10.2.0.0/16"]
+        self.route_change("RTM_DELROUTE", "10.2.0.0", 16)
+        self.assertEqual(set(UnicastRouting.rpf_cache), {"10.1.2.3", "10.1.200.1", "10.3.0.1"})
+        self.assertEqual(UnicastRouting.get_unicast_info("10.2.0.1")[1], 30)
+        self.assertEqual([str(subnet) for subnet in self.kernel.unicast_changes], ["10.1.2.0/24", "10.2.0.0/16"])
+
+    def test_default_route_change_evicts_all_sources(self):
+        for source in ("10.1.2.3", "10.2.0.1", "10.3.0.1"):
+            UnicastRouting.get_unicast_info(source)
+        self.route_change("RTM_NEWROUTE", None, 0)
+        self.assertEqual(UnicastRouting.rpf_cache, {})
+
+
+if __name__ == '__main__':
+    unittest.main()